@@ -0,0 +1,153 @@
+"""
+Local stand-in for the google.generativeai SDK (set LLM_FAKE_MODEL=1)
+
+Implements the small surface meal_agent uses - configure(), GenerativeModel,
+generate_content_async, count_tokens and caching.CachedContent - so plans can
+be generated and benchmarked with no network or API key. Latency is simulated
+from the number of uncached input tokens and output tokens.
+
+Faults can be injected per model with set_faults() (or LLM_FAKE_ERROR_RATE,
+LLM_FAKE_SLOW_RATE, LLM_FAKE_SLOW_LATENCY_S for every model) to exercise
+timeouts, retries, hedging and fallbacks.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+# Simulated model speed
+BASE_LATENCY_S = 0.05
+INPUT_LATENCY_PER_1K_TOKENS_S = 0.02
+OUTPUT_LATENCY_PER_1K_TOKENS_S = 0.2
+
+# "k3f9a|Name|Cuisine|..." (ID references) or "#1 Name|Cuisine|..." (legacy names)
+_ID_LINE = re.compile(r"^([a-z0-9]{4,12})\|([^|]+)\|", re.MULTILINE)
+_NAME_LINE = re.compile(r"^#\d+ ([^|]+)\|", re.MULTILINE)
+_MEALS_PER_DAY = re.compile(r'"meals_per_day":\s*(\d+)')
+
+
+DEFAULT_FAULTS = {
+    "error_rate": float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+    "slow_rate": float(os.getenv("LLM_FAKE_SLOW_RATE", "0")),
+    "slow_latency_s": float(os.getenv("LLM_FAKE_SLOW_LATENCY_S", "10")),
+}
+_faults: Dict[str, Dict[str, float]] = {}
+_rng = random.Random(int(os.getenv("LLM_FAKE_SEED", "0")))
+
+
+class FakeModelError(Exception):
+    """Injected upstream failure (stands in for a 429/503 from the API)"""
+
+
+def set_faults(model_name: str, error_rate: float = 0.0, slow_rate: float = 0.0, slow_latency_s: float = 10.0):
+    """Inject errors and slow responses for one model name"""
+    _faults[model_name] = {"error_rate": error_rate, "slow_rate": slow_rate, "slow_latency_s": slow_latency_s}
+
+
+def clear_faults():
+    _faults.clear()
+
+
+def count_text_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token, like Gemini's tokenizer on English)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+class FakeCachedContent:
+    """Mimics caching.CachedContent: holds a reusable prompt prefix"""
+
+    def __init__(self, model: str, system_instruction: str):
+        self.model = model
+        self.system_instruction = system_instruction
+        self.name = "cachedContents/" + hashlib.sha256(system_instruction.encode()).hexdigest()[:16]
+        self.usage_metadata = SimpleNamespace(total_token_count=count_text_tokens(system_instruction))
+
+    @classmethod
+    def create(cls, model: str, system_instruction: str = "", contents=None, ttl=None, **kwargs):
+        return cls(model, system_instruction)
+
+    def delete(self):
+        pass
+
+
+class FakeGenerativeModel:
+    """Deterministic meal-plan generator with simulated latency"""
+
+    def __init__(self, model_name: str = "models/fake", cached_content: Optional[FakeCachedContent] = None, **kwargs):
+        self.model_name = model_name
+        self.cached_content = cached_content
+
+    @classmethod
+    def from_cached_content(cls, cached_content: FakeCachedContent, **kwargs):
+        return cls(cached_content.model, cached_content=cached_content)
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=count_text_tokens(self._text(contents)))
+
+    async def generate_content_async(self, contents, **kwargs):
+        prompt = self._text(contents)
+        prefix = self.cached_content.system_instruction if self.cached_content else ""
+        text = self._plan_json(prefix + "\n" + prompt)
+
+        input_tokens = count_text_tokens(prompt)
+        cached_tokens = count_text_tokens(prefix) if prefix else 0
+        output_tokens = count_text_tokens(text)
+        faults = _faults.get(self.model_name, DEFAULT_FAULTS)
+        latency = (
+            BASE_LATENCY_S
+            + INPUT_LATENCY_PER_1K_TOKENS_S * input_tokens / 1000
+            + OUTPUT_LATENCY_PER_1K_TOKENS_S * output_tokens / 1000
+        )
+        if _rng.random() < faults["slow_rate"]:
+            latency += faults["slow_latency_s"]
+        await asyncio.sleep(latency)
+        if _rng.random() < faults["error_rate"]:
+            raise FakeModelError(f"{self.model_name}: injected 503 Service Unavailable")
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=input_tokens + cached_tokens,
+                cached_content_token_count=cached_tokens,
+                candidates_token_count=output_tokens
+            )
+        )
+
+    def _text(self, contents) -> str:
+        return contents if isinstance(contents, str) else "\n".join(str(c) for c in contents)
+
+    def _plan_json(self, prompt: str) -> str:
+        """Cycle through the offered recipes to fill a 7-day plan"""
+        match = _MEALS_PER_DAY.search(prompt)
+        meals_per_day = int(match.group(1)) if match else 3
+        meal_types = MEAL_TYPES[:max(1, min(meals_per_day, len(MEAL_TYPES)))]
+
+        ids = [recipe_id for recipe_id, _ in _ID_LINE.findall(prompt)]
+        names = _NAME_LINE.findall(prompt) or ["Unknown"]
+
+        def meal(slot: int, meal_type: str) -> dict:
+            if ids:
+                return {"type": meal_type, "id": ids[slot % len(ids)]}
+            return {"type": meal_type, "recipe": names[slot % len(names)], "cal": 400}
+
+        days = []
+        for day in range(7):
+            meals = [meal(day * len(meal_types) + i, meal_type) for i, meal_type in enumerate(meal_types)]
+            days.append({"day": day + 1, "meals": meals})
+
+        plan = {"days": days}
+        if '"shopping_list"' in prompt:
+            plan["shopping_list"] = ["item"] * 10
+        return json.dumps(plan)
+
+
+# Module-style namespace matching `import google.generativeai as genai`
+genai = SimpleNamespace(
+    configure=lambda **kwargs: None,
+    GenerativeModel=FakeGenerativeModel,
+    caching=SimpleNamespace(CachedContent=FakeCachedContent)
+)
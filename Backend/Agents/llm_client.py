@@ -0,0 +1,281 @@
+"""
+Tail-latency-aware LLM calls for meal-plan generation
+
+LLMClient.generate() walks a model chain (primary, then cheaper fallbacks)
+under one overall deadline:
+- each attempt has its own timeout and failed attempts retry with jittered
+  exponential backoff
+- if an attempt is slower than the model's recent p95 latency, a second
+  (hedged) request is sent and whichever answers first wins
+- the primary model stops early enough to leave the fallback a time slice
+- a circuit breaker per model skips models that keep failing
+- when every model fails or the deadline is reached, a local plan is built
+  from the candidate recipes so the request still succeeds
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from Backend.Agents.prompt_builder import MealPlanPrompt, ContextCache
+
+LLM_PRIMARY_MODEL = os.getenv("MEALPLAN_MODEL", "models/gemini-2.5-flash")
+LLM_FALLBACK_MODELS = [m for m in os.getenv("LLM_FALLBACK_MODELS", "models/gemini-2.5-flash-lite").split(",") if m]
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "30"))
+LLM_ATTEMPT_TIMEOUT_S = float(os.getenv("LLM_ATTEMPT_TIMEOUT_S", "20"))
+LLM_FALLBACK_RESERVE_S = float(os.getenv("LLM_FALLBACK_RESERVE_S", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DEFAULT_DELAY_S = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_S", "8"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+LOCAL_MODEL = "local"
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures; lets one probe through after reset_s.
+    While the probe is outstanding other callers are refused. A probe that
+    never reports back (its request was cancelled) is given up after reset_s.
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, reset_s: float = LLM_BREAKER_RESET_S):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+    @property
+    def probing(self) -> bool:
+        return self.probe_started_at is not None and time.monotonic() - self.probe_started_at < self.reset_s
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probe_started_at = time.monotonic()
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold or self.state == "half_open":
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class ModelStats:
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "breaker": self.breaker.state,
+            "p50_s": self.latency.percentile(50),
+            "p95_s": self.latency.percentile(95)
+        }
+
+
+def build_local_plan(prompt: MealPlanPrompt, meals_per_day: int, num_days: int = 7) -> str:
+    """Round-robin the offered recipes (already ranked and diverse) into a plan"""
+    refs = list(prompt.recipes_by_ref)
+    meal_types = MEAL_TYPES[:max(1, min(meals_per_day, len(MEAL_TYPES)))]
+    days = []
+    for day in range(num_days):
+        meals = []
+        for i, meal_type in enumerate(meal_types):
+            meal = {"type": meal_type}
+            if refs:
+                meal["id"] = refs[(day * len(meal_types) + i) % len(refs)]
+            meals.append(meal)
+        days.append({"day": day + 1, "meals": meals})
+    return json.dumps({"days": days})
+
+
+class LLMClient:
+    """Deadline-bounded, hedged, retried model calls with per-model circuit breakers"""
+
+    def __init__(
+        self,
+        genai_getter: Callable,
+        context_cache: Optional[ContextCache] = None,
+        models: Optional[List[str]] = None,
+        deadline_s: float = LLM_DEADLINE_S,
+        attempt_timeout_s: float = LLM_ATTEMPT_TIMEOUT_S,
+        fallback_reserve_s: float = LLM_FALLBACK_RESERVE_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base_s: float = LLM_BACKOFF_BASE_S,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_default_delay_s: float = LLM_HEDGE_DEFAULT_DELAY_S
+    ):
+        self.genai_getter = genai_getter
+        self.context_cache = context_cache or ContextCache()
+        self.models = models or [LLM_PRIMARY_MODEL] + LLM_FALLBACK_MODELS
+        self.deadline_s = deadline_s
+        self.attempt_timeout_s = attempt_timeout_s
+        self.fallback_reserve_s = fallback_reserve_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay_s = hedge_default_delay_s
+        self._stats: Dict[str, ModelStats] = {}
+        self.local_fallbacks = 0
+
+    def stats(self) -> Dict:
+        return {
+            "models": {name: stats.as_dict() for name, stats in self._stats.items()},
+            "local_fallbacks": self.local_fallbacks,
+            "context_cache": self.context_cache.stats()
+        }
+
+    def _model_stats(self, model_name: str) -> ModelStats:
+        if model_name not in self._stats:
+            self._stats[model_name] = ModelStats()
+        return self._stats[model_name]
+
+    async def generate(self, prompt: MealPlanPrompt, meals_per_day: int) -> Dict:
+        """
+        Return {"text": ..., "model": ...}; model is LOCAL_MODEL when the
+        plan was built locally because no model answered in time.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_s
+
+        for position, model_name in enumerate(self.models):
+            stats = self._model_stats(model_name)
+            if not stats.breaker.allow():
+                print(f"Circuit open for {model_name}; skipping")
+                continue
+
+            # Leave the next model in the chain a slice of the deadline
+            is_last = position == len(self.models) - 1
+            model_deadline = deadline if is_last else deadline - self.fallback_reserve_s
+
+            text = await self._call_with_retries(model_name, prompt, stats, model_deadline)
+            if text is not None:
+                return {"text": text, "model": model_name}
+
+        self.local_fallbacks += 1
+        print("All models failed or deadline reached; building meal plan locally")
+        return {"text": build_local_plan(prompt, meals_per_day), "model": LOCAL_MODEL}
+
+    async def _call_with_retries(self, model_name: str, prompt: MealPlanPrompt, stats: ModelStats, deadline: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                return await asyncio.wait_for(
+                    self._hedged_call(model_name, prompt, stats),
+                    timeout=min(remaining, self.attempt_timeout_s)
+                )
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                stats.breaker.record_failure()
+                print(f"{model_name} attempt {attempt + 1} timed out")
+            except Exception as e:
+                stats.errors += 1
+                stats.breaker.record_failure()
+                print(f"{model_name} attempt {attempt + 1} failed: {e}")
+
+            if attempt == self.max_retries:
+                break
+            if not stats.breaker.allow():
+                # The failures opened the circuit; let the caller move on to the next model
+                print(f"Circuit open for {model_name}; not retrying")
+                return None
+            backoff = self.backoff_base_s * (2 ** attempt) * random.uniform(0.5, 1.5)
+            await asyncio.sleep(max(0.0, min(backoff, deadline - loop.time())))
+        return None
+
+    async def _hedged_call(self, model_name: str, prompt: MealPlanPrompt, stats: ModelStats) -> str:
+        """Send one request; if it outlives the model's p95, race a second one"""
+        hedge_delay = stats.latency.percentile(self.hedge_percentile) or self.hedge_default_delay_s
+        first = asyncio.ensure_future(self._single_call(model_name, prompt, stats))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                stats.hedges += 1
+                tasks.append(asyncio.ensure_future(self._single_call(model_name, prompt, stats)))
+
+            last_error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            stats.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _single_call(self, model_name: str, prompt: MealPlanPrompt, stats: ModelStats) -> str:
+        genai = self.genai_getter()
+        started = time.monotonic()
+        stats.calls += 1
+
+        model = await asyncio.to_thread(self.context_cache.model_for, genai, model_name, prompt)
+        if model is not None:
+            # Prefix is cached server-side; only the user part is sent
+            response = await model.generate_content_async(prompt.suffix)
+        else:
+            model = genai.GenerativeModel(model_name)
+            response = await model.generate_content_async(prompt.text)
+
+        text = response.text
+        stats.latency.record(time.monotonic() - started)
+        stats.breaker.record_success()
+        return text
@@ -1,16 +1,45 @@
 # agents/meal_agent.py
-import google.generativeai as genai
 from Backend.Models.user_models import UserFullProfile
 # ^ 1. load from SQL database, not pydantic model
 from Backend.Routers.recipe_repo import RecipeRepository
-import json
+from Backend.Agents.prompt_builder import PromptBuilder, ContextCache
+from Backend.Agents.llm_client import LLMClient, build_local_plan, LOCAL_MODEL, LLM_PRIMARY_MODEL
+from Backend.Services.shopping_list import build_shopping_list
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '../../.env'))
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Distinct recipes offered to the model per plan, and the MMR lambda used to pick them
+MEALPLAN_CANDIDATES = int(os.getenv("MEALPLAN_CANDIDATES", "14"))
+MEALPLAN_DIVERSITY = float(os.getenv("MEALPLAN_DIVERSITY", "0.5"))
+
+_prompt_builder = PromptBuilder()
+_genai = None
+
+
+def _get_genai():
+    """Import and configure the Gemini SDK on first use (keeps app startup fast)"""
+    global _genai
+    if _genai is None:
+        if os.getenv("LLM_FAKE_MODEL") == "1":
+            # Offline stand-in for local runs and benchmarks
+            from Backend.Agents.fake_model import genai
+        else:
+            import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
+
+
+# Model chain (MEALPLAN_MODEL, then LLM_FALLBACK_MODELS) with deadlines and hedging
+_llm_client = LLMClient(_get_genai, ContextCache())
+
+
+def get_llm_stats() -> dict:
+    """Per-model call, hedge and circuit-breaker statistics"""
+    return _llm_client.stats()
 
 async def generate_mealplan(data: UserFullProfile):
     # ^1. load from SQL database, not pydantic model
@@ -20,7 +49,9 @@ async def generate_mealplan(data: UserFullProfile):
     Flow:
     1. Search vector database for recipes matching user's goals and preferences
     2. Retrieve full recipe data from MySQL
-    3. Pass user profile + relevant recipes to Gemini for meal plan generation
+    3. Pass user profile + relevant recipes (by short ID) to Gemini
+    4. Resolve the recipe IDs in Gemini's plan back to the full recipes
+    5. Build the shopping list locally from the chosen recipes' ingredients
     """
     
     # Initialize recipe repository
@@ -30,33 +61,28 @@ async def generate_mealplan(data: UserFullProfile):
     user_goal = data.user.goals  # e.g., 'lose_fat', 'gain_muscle', 'maintain'
     cuisine_preferences = data.preferences.favorite_cuisines or []
     allergies = data.nutrition.allergies or []
+    fridge = data.fridge_contents.ingredients_on_hand or []
     
     # Search for relevant recipes (get more than needed for variety)
     num_days = 7  # Generate a week's worth of meals
     meals_per_day = data.preferences.meal_frequency or 3
     total_meals_needed = num_days * meals_per_day
     
-    # AGGRESSIVE OPTIMIZATION: Retrieve exactly what's needed (21 recipes for 7 days × 3 meals)
-    # This gives Gemini just enough variety without wasting tokens
+    # DIVERSE RETRIEVAL: MMR picks distinct dishes, so fewer candidates still
+    # cover the week (14 recipes for 21 meals instead of 21 near-duplicates)
     #
-    # 21 recipes × 50 tokens = ~1,050 tokens (was ~2,480 with 31 recipes)
-    # ^2. token optimization needed. send ids instead of full recipes
+    # 14 recipes × ~15 tokens (id|name|macros rows) = ~210 tokens
+    # Recipes using what's already in the fridge are ranked up
     relevant_recipes = repo.search_recipes(
         goal=user_goal,
         preferences=cuisine_preferences if cuisine_preferences else None,
         allergies=allergies if allergies else None,
-        n_results=total_meals_needed
+        n_results=min(total_meals_needed, MEALPLAN_CANDIDATES),
+        diversity=MEALPLAN_DIVERSITY,
+        fields=["name", "cuisine", "nutrition", "ingredients"],
+        fridge=fridge if fridge else None
     )
     
-    # Format recipes for the prompt
-    recipes_text = _format_recipes_for_prompt(relevant_recipes)
-    
-    # ULTRA-COMPACT system instruction (50 tokens instead of 500)
-    system_instruction = """Create 7-day meal plan. Use ONLY recipes below. Match goal (lose_fat=-500cal, gain_muscle=+300cal, maintain=TDEE). Avoid allergies. Return JSON: {"days":[{"day":1,"meals":[{"type":"breakfast","recipe":"Name","cal":400}]}],"shopping_list":["item"]}"""
-    
-    # Build the complete prompt
-    user_data = json.dumps(data.model_dump(), indent=2)
-    
     # MINIMALIST USER PROFILE: Only send essential fields
     # Extract just what Gemini needs - no fluff
     user_summary = {
@@ -66,46 +92,40 @@ async def generate_mealplan(data: UserFullProfile):
         "cuisines": cuisine_preferences,
         "meals_per_day": meals_per_day
     }
-    user_data_compact = json.dumps(user_summary)
-    
-    # ULTRA-COMPACT PROMPT: Removed headers and extra text
-    prompt = f"""{system_instruction}
-
-RECIPES:
-{recipes_text}
-
-USER: {user_data_compact}"""
     
-    model = genai.GenerativeModel('models/gemini-2.5-flash')
-    response = await model.generate_content_async(prompt)
+    # Shared prefix (instructions + catalog slice, recipes as short IDs) and
+    # per-user suffix, trimmed to PROMPT_TOKEN_BUDGET
+    prompt = _prompt_builder.build(relevant_recipes, user_summary)
+    if not _prompt_builder.calibrated:
+        # Once per process: measure with the model's tokenizer and rebuild if the
+        # ~4 chars/token estimate was off
+        model = _get_genai().GenerativeModel(LLM_PRIMARY_MODEL)
+        if await asyncio.to_thread(_prompt_builder.calibrate, model, prompt) != 1.0:
+            prompt = _prompt_builder.build(relevant_recipes, user_summary)
     
-    return response.text
-
-
-def _format_recipes_for_prompt(recipes: list) -> str:
-    #^3. recipe formatting to be revisited
-    """Ultra-compact recipe format: ~50 tokens per recipe (was ~175)
+    # Deadline-bounded call: retries, hedging, fallback model, then local plan
+    result = await _llm_client.generate(prompt, meals_per_day)
     
-    Format: #1 RecipeName|Cuisine|Cal:X P:Xg C:Xg F:Xg
-    - Removed ingredients (Gemini doesn't need them for meal planning)
-    - Removed source, fiber, description
-    - Minimal whitespace
-    """
-    if not recipes:
-        return "No recipes."
+    # Map recipe IDs in the answer back to the recipes we offered
+    try:
+        plan = _prompt_builder.resolve(result["text"], prompt)
+    except ValueError as e:
+        print(f"Could not resolve meal plan from {result['model']}: {e}")
+        result = {"text": build_local_plan(prompt, meals_per_day), "model": LOCAL_MODEL}
+        plan = _prompt_builder.resolve(result["text"], prompt)
     
-    formatted = []
-    for i, recipe in enumerate(recipes, 1):
-        nutrition = recipe.get('nutrition', {})
-        if isinstance(nutrition, str):
-            nutrition = json.loads(nutrition)
-        
-        # ULTRA-COMPACT: Just name, cuisine, and macros
-        recipe_text = (
-            f"#{i} {recipe.get('name', 'Unknown')}|{recipe.get('cuisine', 'N/A')}|"
-            f"Cal:{nutrition.get('calories', 0)} P:{nutrition.get('protein', 0)}g "
-            f"C:{nutrition.get('carbohydrates', 0)}g F:{nutrition.get('fat', 0)}g"
-        )
-        formatted.append(recipe_text)
+    # Shopping list from the recipes' ingredients, minus what's in the fridge
+    # (the model only assigns recipes to meals)
+    # shopping_list stays a list of names; amounts and on-hand items are extra keys
+    planned_ids = [meal["recipe_id"] for day in plan["days"] for meal in day["meals"] if meal.get("recipe_id")]
+    shopping = build_shopping_list(
+        planned_ids,
+        {recipe["id"]: recipe for recipe in relevant_recipes},
+        fridge
+    )
+    plan["shopping_list"] = [item["name"] for item in shopping["items"]]
+    plan["shopping_items"] = shopping["items"]
+    plan["on_hand"] = shopping["on_hand"]
     
-    return "\n".join(formatted)
+    plan["generated_by"] = result["model"]
+    return plan
@@ -0,0 +1,168 @@
+"""
+Off-peak precomputation of upcoming meal plans
+
+Most users ask for their weekly plan at around the same hours, and each plan
+waits on the LLM. During PRECOMPUTE_WINDOW (server local time, e.g.
+"02:00-05:00"; empty disables) the scheduler picks users who generated a plan
+in the last PRECOMPUTE_ACTIVE_DAYS days but not in the last
+PRECOMPUTE_DUE_AFTER_DAYS, generates their next plan with at most
+PRECOMPUTE_MAX_CONCURRENT generations at once, and stores it in
+PendingMealPlans tagged with the profile version it was built from.
+POST /users/{user_id}/mealplans serves it while that version is current.
+
+A MySQL named lock keeps a pass to one process when several API workers run
+the scheduler. Plans that fell back to the local planner are not stored; the
+user gets a real generation on request instead.
+"""
+import asyncio
+import datetime
+import os
+import time
+from typing import Dict, Optional, Tuple
+from Backend.Models.user_models import UserFullProfile
+from Backend.Routers.users_repo import UsersRepository
+from Backend.Routers.mealplan_repo import MealPlanRepository
+from Backend.Agents.meal_agent import generate_mealplan
+from Backend.Agents.llm_client import LOCAL_MODEL
+from Backend.database import acquire_named_lock, release_named_lock
+
+PRECOMPUTE_WINDOW = os.getenv("PRECOMPUTE_WINDOW", "")
+PRECOMPUTE_ACTIVE_DAYS = int(os.getenv("PRECOMPUTE_ACTIVE_DAYS", "21"))
+PRECOMPUTE_DUE_AFTER_DAYS = int(os.getenv("PRECOMPUTE_DUE_AFTER_DAYS", "5"))
+PRECOMPUTE_MAX_CONCURRENT = int(os.getenv("PRECOMPUTE_MAX_CONCURRENT", "2"))
+PRECOMPUTE_BATCH = int(os.getenv("PRECOMPUTE_BATCH", "200"))
+PRECOMPUTE_POLL_S = float(os.getenv("PRECOMPUTE_POLL_S", "300"))
+PRECOMPUTE_LOCK = "garden_of_eaten.plan_precompute"
+
+
+def parse_window(window: str) -> Optional[Tuple[datetime.time, datetime.time]]:
+    """'HH:MM-HH:MM' -> (start, end); may wrap past midnight. Empty disables."""
+    if not window.strip():
+        return None
+    try:
+        start, end = (datetime.datetime.strptime(part.strip(), "%H:%M").time() for part in window.split("-"))
+    except ValueError:
+        raise ValueError(f"PRECOMPUTE_WINDOW must look like 02:00-05:00, got {window!r}")
+    return start, end
+
+
+def in_window(window: Optional[Tuple[datetime.time, datetime.time]], now: datetime.time) -> bool:
+    if window is None:
+        return False
+    start, end = window
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+class PlanPrecomputeScheduler:
+    """Generates pending plans for soon-due users during the off-peak window"""
+
+    def __init__(self, window: str = PRECOMPUTE_WINDOW, max_concurrent: int = PRECOMPUTE_MAX_CONCURRENT,
+                 active_days: int = PRECOMPUTE_ACTIVE_DAYS, due_after_days: int = PRECOMPUTE_DUE_AFTER_DAYS,
+                 batch: int = PRECOMPUTE_BATCH, poll_s: float = PRECOMPUTE_POLL_S, generate=generate_mealplan):
+        self.window_spec = window
+        self.window = parse_window(window)
+        self.max_concurrent = max_concurrent
+        self.active_days = active_days
+        self.due_after_days = due_after_days
+        self.batch = batch
+        self.poll_s = poll_s
+        self.generate = generate
+        self.running = False
+        self.passes = 0
+        self.passes_skipped = 0  # another process held the lock
+        self.generated = 0
+        self.local_fallbacks = 0
+        self.failed = 0
+        self.last_pass: Optional[Dict] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window is not None
+
+    def in_window(self) -> bool:
+        return in_window(self.window, datetime.datetime.now().time())
+
+    async def run_forever(self):
+        """Poll every poll_s seconds; run a pass whenever inside the window"""
+        while True:
+            if self.in_window():
+                try:
+                    await self.run_pass()
+                except Exception as e:
+                    print(f"Plan precompute pass failed: {e}")
+            await asyncio.sleep(self.poll_s)
+
+    async def run_pass(self) -> Optional[Dict]:
+        """One batch of candidates; stops starting new generations once the window closes"""
+        lock = await asyncio.to_thread(acquire_named_lock, PRECOMPUTE_LOCK)
+        if lock is None:
+            self.passes_skipped += 1
+            return None
+
+        self.running = True
+        started = time.time()
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        results = {"generated": 0, "local_fallbacks": 0, "failed": 0, "skipped": 0}
+
+        async def precompute(user_id: int):
+            async with semaphore:
+                if not self.in_window():
+                    results["skipped"] += 1
+                    return
+                try:
+                    outcome = await self._precompute(user_id)
+                except Exception as e:
+                    print(f"Precomputing a plan for user {user_id} failed: {e}")
+                    outcome = "failed"
+                results[outcome] += 1
+
+        try:
+            candidates = await asyncio.to_thread(
+                MealPlanRepository.find_precompute_candidates, self.active_days, self.due_after_days,
+                limit=self.batch
+            )
+            await asyncio.gather(*(precompute(user_id) for user_id in candidates))
+        finally:
+            self.running = False
+            await asyncio.to_thread(release_named_lock, lock, PRECOMPUTE_LOCK)
+
+        self.passes += 1
+        self.generated += results["generated"]
+        self.local_fallbacks += results["local_fallbacks"]
+        self.failed += results["failed"]
+        self.last_pass = {
+            "started_at": started,
+            "duration_s": round(time.time() - started, 1),
+            "candidates": len(candidates),
+            **results
+        }
+        return self.last_pass
+
+    async def _precompute(self, user_id: int) -> str:
+        # The version is read with the profile, so a PATCH during generation
+        # leaves a plan tagged with the old version, which is never served
+        payload, version = await asyncio.to_thread(UsersRepository.get_user_payload_and_version, user_id)
+        if payload is None:
+            return "skipped"
+        meal_plan = await self.generate(UserFullProfile.model_validate(payload))
+        if meal_plan.get("generated_by") == LOCAL_MODEL:
+            return "local_fallbacks"
+        await asyncio.to_thread(MealPlanRepository.save_pending_plan, user_id, version, meal_plan)
+        return "generated"
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "window": self.window_spec or None,
+            "in_window": self.in_window(),
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "passes": self.passes,
+            "passes_skipped": self.passes_skipped,
+            "generated": self.generated,
+            "local_fallbacks": self.local_fallbacks,
+            "failed": self.failed,
+            "last_pass": self.last_pass
+        }
@@ -0,0 +1,286 @@
+"""
+Token-budgeted meal-plan prompt assembly
+
+The prompt is split into a shared prefix (instructions + recipe catalog slice)
+and a per-user suffix. Recipes are referenced by short stable IDs so the model
+only echoes a few characters per meal; resolve() maps them back to the full
+recipes locally. When the model API supports context caching, the prefix is
+cached server-side and reused across requests with the same catalog slice.
+
+Caching is inert with the default settings: the prefix for
+MEALPLAN_CANDIDATES=14 recipes is ~350 tokens, below Gemini's minimum
+cacheable size (PROMPT_CACHE_MIN_TOKENS=1024), so full prompts are sent. It
+engages only when MEALPLAN_CANDIDATES and PROMPT_TOKEN_BUDGET allow a
+prefix of at least that size. At most PROMPT_CACHE_MAX_ENTRIES prefixes are
+kept; expired and least recently used ones are dropped and deleted
+server-side.
+
+Token counts are estimated at ~4 characters per token; calibrate() scales
+the estimate once by the model's own count_tokens.
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+# Gemini rejects cached contents smaller than this
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+PROMPT_CACHE_TTL_MINUTES = int(os.getenv("PROMPT_CACHE_TTL_MINUTES", "30"))
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "64"))
+
+SYSTEM_INSTRUCTION = (
+    "Create 7-day meal plan. Use ONLY recipes below, by id. "
+    "Match goal (lose_fat=-500cal, gain_muscle=+300cal, maintain=TDEE). Avoid allergies. "
+    'Return JSON only: {"days":[{"day":1,"meals":[{"type":"breakfast","id":"<id>"}]}]}'
+)
+RECIPE_HEADER = "id|name|cuisine|kcal|protein_g|carbs_g|fat_g"
+
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def estimate_tokens(text: str, ratio: float = 1.0) -> int:
+    """
+    Approximate token count (~4 characters per token), scaled by ratio
+    (measured / estimated tokens, see PromptBuilder.calibrate)
+    """
+    return max(1, math.ceil((len(text) + 3) // 4 * ratio))
+
+
+def short_recipe_id(recipe_id: str, length: int = 5) -> str:
+    """Stable short reference for a recipe ID (same recipe -> same ID in every prompt)"""
+    return hashlib.sha1(str(recipe_id).encode()).hexdigest()[:length]
+
+
+class MealPlanPrompt:
+    """An assembled prompt plus what is needed to resolve the model's answer"""
+
+    def __init__(self, prefix: str, suffix: str, recipes_by_ref: Dict[str, Dict], dropped: int, token_ratio: float = 1.0):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.recipes_by_ref = recipes_by_ref
+        self.dropped = dropped
+        self.prefix_tokens = estimate_tokens(prefix, token_ratio)
+        self.suffix_tokens = estimate_tokens(suffix, token_ratio)
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.suffix}"
+
+    @property
+    def tokens(self) -> int:
+        return self.prefix_tokens + self.suffix_tokens
+
+    @property
+    def cache_key(self) -> str:
+        return hashlib.sha256(self.prefix.encode()).hexdigest()
+
+
+class PromptBuilder:
+    """Builds meal-plan prompts within a token budget"""
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        # Measured / estimated tokens; 1.0 until calibrate() has run
+        self.token_ratio = 1.0
+        self.calibrated = False
+
+    def calibrate(self, model, prompt: MealPlanPrompt) -> float:
+        """
+        Measure the prompt with the model's tokenizer (model.count_tokens) and
+        scale later estimates by measured / estimated. Keeps the current ratio
+        if counting fails; either way it is not retried.
+        """
+        self.calibrated = True
+        estimated = estimate_tokens(prompt.text)
+        try:
+            measured = model.count_tokens(prompt.text).total_tokens
+        except Exception as e:
+            print(f"Could not count prompt tokens; keeping the ~4 chars/token estimate: {e}")
+            return self.token_ratio
+        self.token_ratio = measured / estimated
+        print(f"Prompt tokens: estimated {estimated}, measured {measured} (ratio {self.token_ratio:.2f})")
+        return self.token_ratio
+
+    def build(self, recipes: List[Dict], user_summary: Dict) -> MealPlanPrompt:
+        """
+        Assemble instructions + as many recipes (in ranked order) as fit the
+        budget, followed by the compact user profile.
+        """
+        suffix = f"USER: {json.dumps(user_summary, separators=(',', ':'))}"
+        ratio = self.token_ratio
+        used = (
+            estimate_tokens(SYSTEM_INSTRUCTION, ratio) + estimate_tokens(RECIPE_HEADER, ratio)
+            + estimate_tokens(suffix, ratio) + 4
+        )
+
+        lines = []
+        recipes_by_ref = {}
+        for recipe in recipes:
+            ref = self._unique_ref(recipe["id"], recipes_by_ref)
+            line = self._format_recipe(ref, recipe)
+            cost = estimate_tokens(line, ratio)
+            if used + cost > self.token_budget:
+                break
+            used += cost
+            lines.append(line)
+            recipes_by_ref[ref] = recipe
+
+        catalog = "\n".join([RECIPE_HEADER] + lines) if lines else "No recipes."
+        prefix = f"{SYSTEM_INSTRUCTION}\n\nRECIPES:\n{catalog}"
+        dropped = len(recipes) - len(lines)
+        if dropped:
+            print(f"Prompt budget {self.token_budget} reached: dropped {dropped} lowest-ranked recipes")
+        return MealPlanPrompt(prefix, suffix, recipes_by_ref, dropped, ratio)
+
+    def _unique_ref(self, recipe_id: str, taken: Dict[str, Dict]) -> str:
+        length = 5
+        ref = short_recipe_id(recipe_id, length)
+        while ref in taken and taken[ref]["id"] != recipe_id:
+            length += 1
+            ref = short_recipe_id(recipe_id, length)
+        return ref
+
+    def _format_recipe(self, ref: str, recipe: Dict) -> str:
+        """id|name|cuisine|kcal|protein|carbs|fat with whole-number macros"""
+        nutrition = recipe.get('nutrition', {})
+        if isinstance(nutrition, str):
+            nutrition = json.loads(nutrition)
+        macros = "|".join(
+            str(round(float(nutrition.get(key, 0) or 0)))
+            for key in ("calories", "protein", "carbs", "fat")
+        )
+        name = recipe.get('name', 'Unknown').replace("|", "/")
+        return f"{ref}|{name}|{recipe.get('cuisine', 'N/A')}|{macros}"
+
+    def resolve(self, response_text: str, prompt: MealPlanPrompt) -> Dict:
+        """
+        Parse the model's JSON and replace recipe references with the recipes.
+        Raises ValueError if the response is not a JSON meal plan.
+        """
+        try:
+            plan = json.loads(_JSON_FENCE.sub("", response_text.strip()))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Model response is not valid JSON: {e}")
+        if not isinstance(plan, dict) or not isinstance(plan.get("days"), list):
+            raise ValueError("Model response has no 'days' list")
+
+        for day in plan["days"]:
+            day["meals"] = [self._resolve_meal(meal, prompt) for meal in day.get("meals", [])]
+        return plan
+
+    def _resolve_meal(self, meal: Dict, prompt: MealPlanPrompt) -> Dict:
+        ref = str(meal.get("id", ""))
+        recipe = prompt.recipes_by_ref.get(ref)
+        if recipe is None:
+            return {"type": meal.get("type"), "recipe_id": None, "unresolved_id": ref}
+
+        nutrition = recipe.get("nutrition", {})
+        if isinstance(nutrition, str):
+            nutrition = json.loads(nutrition)
+        return {
+            "type": meal.get("type"),
+            "recipe_id": recipe["id"],
+            "name": recipe.get("name"),
+            "cuisine": recipe.get("cuisine"),
+            "calories": nutrition.get("calories", 0),
+            "protein": nutrition.get("protein", 0),
+            "carbs": nutrition.get("carbs", 0),
+            "fat": nutrition.get("fat", 0)
+        }
+
+
+class ContextCache:
+    """
+    Reuses a server-side cached prompt prefix per distinct prefix.
+
+    Falls back to sending the full prompt when the prefix is below the
+    provider's minimum cacheable size or the API does not support caching.
+    Entries are kept in LRU order, capped at max_entries; expired and evicted
+    cached contents are deleted on the server.
+    """
+
+    def __init__(
+        self,
+        min_tokens: int = PROMPT_CACHE_MIN_TOKENS,
+        ttl_minutes: int = PROMPT_CACHE_TTL_MINUTES,
+        max_entries: int = PROMPT_CACHE_MAX_ENTRIES
+    ):
+        self.min_tokens = min_tokens
+        self.ttl = datetime.timedelta(minutes=ttl_minutes)
+        self.max_entries = max_entries
+        # (model, prefix hash) -> (cached content, expires_at), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsupported = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def model_for(self, genai, model_name: str, prompt: MealPlanPrompt):
+        """GenerativeModel bound to the cached prefix, or None if caching is not usable"""
+        if self._unsupported or prompt.prefix_tokens < self.min_tokens:
+            return None
+
+        key = (model_name, prompt.cache_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return genai.GenerativeModel.from_cached_content(cached_content=entry[0])
+
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=model_name,
+                system_instruction=prompt.prefix,
+                ttl=self.ttl
+            )
+        except AttributeError:
+            print("Context caching not supported by this SDK; sending full prompts")
+            self._unsupported = True
+            return None
+        except Exception as e:
+            print(f"Could not create cached prompt prefix: {e}")
+            return None
+
+        with self._lock:
+            self.misses += 1
+            # Expire locally a minute early so we never reference an evicted cache
+            ttl_seconds = self.ttl.total_seconds()
+            replaced = self._entries.pop(key, None)
+            self._entries[key] = (cached, now + max(ttl_seconds - 60, ttl_seconds / 2))
+            evicted = [replaced[0]] if replaced else []
+            evicted += self._evict(now)
+        self._delete(evicted)
+        return genai.GenerativeModel.from_cached_content(cached_content=cached)
+
+    def _evict(self, now: float) -> List:
+        """Drop expired entries, then the least recently used beyond max_entries (call under the lock)"""
+        evicted = []
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            evicted.append(self._entries.pop(key)[0])
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[1][0])
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _delete(cached_contents: List):
+        """Free evicted prefixes server-side instead of waiting for their TTL"""
+        for cached in cached_contents:
+            try:
+                cached.delete()
+            except Exception as e:
+                print(f"Could not delete cached prompt prefix: {e}")
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
@@ -0,0 +1,103 @@
+"""
+Embedding throughput and memory: per-worker models vs the shared service
+
+Usage: python -m Backend.Benchmarks.embedding_service_benchmark [--workers 1 4 8] [--queries 200]
+
+For each worker count N, N processes each encode --queries search-style
+queries one at a time (as API workers do):
+- local:   every worker loads its own SentenceTransformer
+- service: workers use EmbeddingClient against one EmbeddingServer process
+Reports queries/s across all workers and summed peak RSS (workers + service).
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import secrets
+import tempfile
+import time
+from Backend.Services.embedding_service import EmbeddingClient, main as serve
+
+QUERIES = ["low calorie, high protein, low carb, healthy fats, weight loss. Preferred cuisines: Asian",
+           "high protein, moderate carbs, nutrient dense, muscle building. Preferred cuisines: Mexican",
+           "balanced nutrition, moderate calories, healthy eating. Preferred cuisines: Mediterranean"]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def process_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(mode, address, queries, barrier, results):
+    if mode == "local":
+        from Backend.Services.recipe_embedder import load_sentence_transformer
+        model = load_sentence_transformer()
+    else:
+        model = EmbeddingClient(address)
+    model.encode("warm up")
+    barrier.wait()
+    started = time.perf_counter()
+    for i in range(queries):
+        model.encode(f"{QUERIES[i % len(QUERIES)]} #{i}")
+    results.put((time.perf_counter() - started, peak_rss_mb()))
+
+
+def run(ctx, mode, workers, queries, address):
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(mode, address, queries, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    timings = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    wall = max(elapsed for elapsed, _ in timings)
+    return workers * queries / wall, sum(rss for _, rss in timings)
+
+
+def wait_for_service(address: str, timeout_s: float = 120):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            EmbeddingClient(address).encode("ping")
+            return
+        except (OSError, EOFError):
+            time.sleep(0.5)
+    raise RuntimeError(f"Embedding service did not start at {address}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--address", help="Service socket (default: in a private temporary directory)")
+    args = parser.parse_args()
+    args.address = args.address or os.path.join(tempfile.mkdtemp(prefix="wondereats-embed-"), "bench.sock")
+    # Inherited by the spawned service and workers
+    os.environ.setdefault("EMBEDDING_SERVICE_AUTHKEY", secrets.token_hex(32))
+
+    ctx = multiprocessing.get_context("spawn")
+    server = ctx.Process(target=serve, args=(["--address", args.address],), daemon=True)
+    server.start()
+    try:
+        wait_for_service(args.address)
+        print(f"{'workers':>7} {'mode':>8} {'queries/s':>10} {'RSS MB':>8}")
+        for workers in args.workers:
+            qps, rss = run(ctx, "local", workers, args.queries, args.address)
+            print(f"{workers:>7} {'local':>8} {qps:>10.1f} {rss:>8.0f}")
+            qps, rss = run(ctx, "service", workers, args.queries, args.address)
+            rss += process_rss_mb(server.pid)
+            print(f"{workers:>7} {'service':>8} {qps:>10.1f} {rss:>8.0f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Tail-latency benchmark for LLMClient against the fault-injecting fake model
+
+Usage: python -m Backend.Benchmarks.llm_tail_benchmark [--requests 200] [--slow-rate 0.05] [--error-rate 0.05]
+
+The primary fake model is slow (slow_latency_s) on slow-rate of calls and
+fails on error-rate of calls; the fallback model is healthy. Compares a
+single un-hedged call (old behaviour) with LLMClient's hedging, retries,
+fallback and deadline, reporting p50/p95/p99 and where answers came from.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+import numpy as np
+from Backend.Agents import fake_model
+from Backend.Agents.llm_client import LLMClient
+from Backend.Agents.prompt_builder import PromptBuilder, ContextCache
+
+PRIMARY = "models/fake-primary"
+FALLBACK = "models/fake-fallback"
+
+
+def make_prompt():
+    recipes = [{"id": f"spoon_{i}", "name": f"Recipe {i}", "cuisine": "Asian",
+                "nutrition": {"calories": 400, "protein": 30, "carbs": 40, "fat": 12}} for i in range(14)]
+    return PromptBuilder().build(recipes, {"goal": "maintain", "meals_per_day": 3})
+
+
+async def run(label, requests, call):
+    latencies, sources = [], Counter()
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            sources[await call()] += 1
+        except Exception:
+            sources["error"] += 1
+        latencies.append(time.perf_counter() - started)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"{label:>10} p50={p50:7.1f}ms p95={p95:7.1f}ms p99={p99:7.1f}ms  {dict(sources)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    fake_model.set_faults(PRIMARY, error_rate=args.error_rate, slow_rate=args.slow_rate, slow_latency_s=args.slow_latency)
+    fake_model.set_faults(FALLBACK)
+    prompt = make_prompt()
+    genai_getter = lambda: fake_model.genai
+
+    async def single_call():
+        model = fake_model.genai.GenerativeModel(PRIMARY)
+        await model.generate_content_async(prompt.text)
+        return PRIMARY
+
+    client = LLMClient(
+        genai_getter,
+        ContextCache(min_tokens=10 ** 9),  # measure the call path, not caching
+        models=[PRIMARY, FALLBACK],
+        deadline_s=args.deadline,
+        attempt_timeout_s=args.deadline,
+        fallback_reserve_s=args.deadline / 3,
+        backoff_base_s=0.02,
+        hedge_default_delay_s=0.3
+    )
+
+    async def client_call():
+        return (await client.generate(prompt, meals_per_day=3))["model"]
+
+    await run("single", args.requests, single_call)
+    await run("client", args.requests, client_call)
+    print(f"\nclient stats: {client.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Response payload benchmark for the recipe endpoints
+
+Usage: python -m Backend.Benchmarks.payload_benchmark [--sizes 10 100 1000] [--repeat 20]
+
+For search results of each size, compares full rows vs a projection
+(fields=name,cuisine,nutrition) and reports:
+- serialize time: json.dumps vs FastAPI's jsonable_encoder + json.dumps
+  (the default JSONResponse path) vs dumps() (orjson when installed)
+- bytes on the wire: raw, gzip and brotli (when installed)
+"""
+import argparse
+import json
+import statistics
+import time
+from fastapi.encoders import jsonable_encoder
+from Backend.Routers import responses
+
+PROJECTION = ["id", "name", "cuisine", "nutrition"]
+
+
+def make_recipe(i: int) -> dict:
+    return {
+        "id": f"spoon_{700000 + i}",
+        "name": f"Grilled Chicken Quinoa Bowl {i} with Lemon Herb Dressing",
+        "cuisine": "Mediterranean",
+        "description": "A bright, protein-packed bowl with fluffy quinoa, charred chicken and crisp vegetables. " * 2,
+        "nutrition": {"calories": 420.37 + i, "protein": 32.5, "carbohydrates": 38.12, "fat": 14.9,
+                      "fiber": 6.1, "sugar": 4.3, "sodium": 540.0},
+        "ingredients": [{"name": name, "amount": 1.5, "unit": "cup"}
+                        for name in ["quinoa", "chicken breast", "cucumber", "cherry tomatoes", "red onion",
+                                     "feta cheese", "olive oil", "lemon", "parsley", "garlic"]],
+        "instructions": "1. Cook the quinoa. 2. Season and grill the chicken. 3. Chop the vegetables. "
+                        "4. Whisk the dressing. 5. Assemble the bowls and serve. " * 3,
+        "tags": ["high-protein", "gluten-free", "lunch", "dinner"]
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"orjson={'yes' if responses.orjson else 'no'} brotli={'yes' if responses.brotli else 'no'}\n")
+    print(f"{'size':>5} {'shape':>9} {'json ms':>8} {'encoder ms':>11} {'fast ms':>8} "
+          f"{'raw KB':>8} {'gzip KB':>8} {'br KB':>8}")
+    for size in args.sizes:
+        full = [make_recipe(i) for i in range(size)]
+        projected = [{field: recipe[field] for field in PROJECTION} for recipe in full]
+        for shape, recipes in (("full", full), ("projected", projected)):
+            payload = {"status": "success", "count": len(recipes), "recipes": recipes}
+            json_ms = timed(lambda: json.dumps(payload).encode("utf-8"), args.repeat)
+            encoder_ms = timed(lambda: json.dumps(jsonable_encoder(payload)).encode("utf-8"), args.repeat)
+            fast_ms = timed(lambda: responses.dumps(payload), args.repeat)
+
+            body = responses.dumps(payload)
+            gzip_kb = len(responses.compress(body, "gzip")) / 1024
+            br_kb = len(responses.compress(body, "br")) / 1024 if responses.brotli else float("nan")
+            print(f"{size:>5} {shape:>9} {json_ms:>8.2f} {encoder_ms:>11.2f} {fast_ms:>8.2f} "
+                  f"{len(body) / 1024:>8.1f} {gzip_kb:>8.1f} {br_kb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Read-path benchmark for GET /users/{id} and GET /users/{id}/mealplans
+
+Usage: python -m Backend.Benchmarks.profile_read_benchmark [--repeat 20000] [--history 10]
+
+Turns representative profile rows (no MySQL needed) into response bytes:
+- per-model: the six models built one by one, then FastAPI's default
+  jsonable_encoder + json.dumps (the previous GET /users/{id} path)
+- model_construct: the same models built without validation
+- validated: one nested UserFullProfile.model_validate (get_user, and
+  GET /users/{id} with VALIDATE_DB_ROWS=1)
+- trusted: profile_from_rows dict + orjson (GET /users/{id} by default)
+It also times a page of meal plan history: json.loads + the default
+response path vs json_column + FastJSONResponse (orjson when installed).
+"""
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from Backend.Models.user_models import (
+    UserFullProfile, User, UserNutritionProfile, UserPreferences, UserInsights, UserFrigeContents
+)
+from Backend.Routers.users_repo import UsersRepository
+from Backend.Routers.responses import FastJSONResponse
+from Backend.database import json_column, orjson
+
+USER_ROW = {"id": 42, "Name": "Amira Haddad", "Age": 31, "Height_cm": 168.0, "Weight_kg": 64.5,
+            "Goals": json.dumps("lose_fat"), "Budget_weekly": 120, "Scheduling_constraints": None,
+            "Equipment_available": None}
+NUTRITION_ROW = {"BMR": 1402.5, "TDEE": 2173.9, "Maintenance_cals": 2173.9,
+                 "Allergies": json.dumps(["peanuts", "shellfish"]), "Dietary_identities": None, "User_id": 42}
+PREFERENCES_ROW = {"Favorite_cuisines": json.dumps(["Mediterranean", "Japanese", "Mexican"]),
+                   "Disliked_ingredients": json.dumps(["cilantro", "olives"]), "Meal_frequency": 3,
+                   "Snack_preference": 1, "User_id": 42}
+INSIGHTS_ROW = {"Cultural_context": json.dumps("Lebanese home cooking"),
+                "Lifestyle_habits": json.dumps("Desk job, runs three times a week"),
+                "Health_conditions": json.dumps(["iron deficiency"]), "Energy_levels": "moderate", "User_id": 42}
+FRIDGE_ROW = {"Ingredients_on_hand": json.dumps(["eggs", "spinach", "greek yogurt", "chickpeas", "lemons"]),
+              "user_id": 42}
+
+MEAL = {"name": "Chickpea Shakshuka", "calories": 520, "protein": 28, "carbs": 48, "fat": 22,
+        "ingredients": ["eggs", "chickpeas", "tomatoes", "spinach", "feta"], "instructions": "Simmer, crack, bake."}
+
+
+def history_rows(count: int):
+    plan = {"meal_plan": {"days": [{"day": d, "meals": [MEAL] * 4} for d in range(7)],
+                          "shopping_list": {"produce": ["spinach", "tomatoes"], "protein": ["eggs"]}}}
+    return [{"id": i, "User_id": 42, "Generated_meals": json.dumps(plan),
+             "Ingredients_used": json.dumps(["eggs", "chickpeas", "spinach"]),
+             "User_feedback": json.dumps({"rating": 4}), "Energy_levels": "high", "created_at": None}
+            for i in range(count)]
+
+
+def per_call_us(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def rows():
+    return USER_ROW, NUTRITION_ROW, PREFERENCES_ROW, INSIGHTS_ROW, FRIDGE_ROW
+
+
+def build_per_model(build) -> UserFullProfile:
+    profile = UsersRepository.profile_from_rows(*rows())
+    return build(UserFullProfile, user=build(User, **profile["user"]),
+                 nutrition=build(UserNutritionProfile, **profile["nutrition"]),
+                 preferences=build(UserPreferences, **profile["preferences"]),
+                 insights=build(UserInsights, **profile["insights"]),
+                 fridge_contents=build(UserFrigeContents, **profile["fridge_contents"]))
+
+
+def per_model_read() -> bytes:
+    profile = build_per_model(lambda model, **fields: model(**fields))
+    return json.dumps(jsonable_encoder(profile)).encode("utf-8")
+
+
+def construct_read() -> bytes:
+    profile = build_per_model(lambda model, **fields: model.model_construct(**fields))
+    return profile.model_dump_json().encode("utf-8")
+
+
+def validated_read() -> bytes:
+    return FastJSONResponse(UserFullProfile.model_validate(UsersRepository.profile_from_rows(*rows())).model_dump()).body
+
+
+def trusted_read() -> bytes:
+    return FastJSONResponse(UsersRepository.profile_from_rows(*rows())).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--history", type=int, default=10, help="Meal plan rows per history page")
+    args = parser.parse_args()
+
+    reads = [("per-model", per_model_read), ("model_construct", construct_read),
+             ("validated", validated_read), ("trusted", trusted_read)]
+    expected = json.loads(per_model_read())
+    for name, read in reads:
+        if json.loads(read()) != expected:
+            raise SystemExit(f"❌ {name} produced different JSON than the per-model path")
+
+    print(f"orjson={'yes' if orjson else 'no'}\n")
+    print(f"{'GET /users/{id}':<28} {'us/read':>9} {'speedup':>8}")
+    baseline = None
+    for name, read in reads:
+        us = per_call_us(read, args.repeat)
+        baseline = baseline or us
+        print(f"{name:<28} {us:>9.1f} {baseline / us:>7.1f}x")
+
+    template = history_rows(args.history)
+
+    def history_stdlib():
+        history = [dict(row) for row in template]
+        for row in history:
+            for field in ("Generated_meals", "Ingredients_used", "User_feedback"):
+                row[field] = json.loads(row[field])
+        return json.dumps(jsonable_encoder({"history": history})).encode("utf-8")
+
+    def history_fast():
+        history = [dict(row) for row in template]
+        for row in history:
+            for field in ("Generated_meals", "Ingredients_used", "User_feedback"):
+                row[field] = json_column(row[field])
+        return FastJSONResponse({"history": history}).body
+
+    pages = max(1, args.repeat // 100)
+    print(f"\n{f'history page ({args.history} rows)':<28} {'us/read':>9} {'speedup':>8}")
+    baseline = per_call_us(history_stdlib, pages)
+    print(f"{'json.loads + encoder':<28} {baseline:>9.1f} {1:>7.1f}x")
+    fast = per_call_us(history_fast, pages)
+    print(f"{'json_column + orjson':<28} {fast:>9.1f} {baseline / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Prompt size and latency benchmark using the local fake model
+
+Usage: python -m Backend.Benchmarks.prompt_benchmark [--plans 20]
+
+Compares, per generated plan:
+- legacy:   21 recipes as '#1 Name|Cuisine|Cal:X P:Xg ...' rows, model echoes names
+- ids:      PromptBuilder (14 candidates, short recipe IDs, token budget)
+- ids+cache: same, with the shared prefix served from the context cache
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from Backend.Agents.fake_model import FakeGenerativeModel, genai as fake_genai
+from Backend.Agents.prompt_builder import PromptBuilder, ContextCache
+
+LEGACY_INSTRUCTION = """Create 7-day meal plan. Use ONLY recipes below. Match goal (lose_fat=-500cal, gain_muscle=+300cal, maintain=TDEE). Avoid allergies. Return JSON: {"days":[{"day":1,"meals":[{"type":"breakfast","recipe":"Name","cal":400}]}],"shopping_list":["item"]}"""
+
+DISHES = ["Grilled Chicken Quinoa Bowl", "Mediterranean Chickpea Salad", "Teriyaki Salmon with Greens",
+          "Turkey Black Bean Chili", "Greek Yogurt Berry Parfait", "Shrimp Stir-Fry with Broccoli",
+          "Lentil and Spinach Curry", "Egg White Veggie Omelette"]
+CUISINES = ["Mediterranean", "Asian", "Mexican", "American"]
+
+
+def make_recipes(count: int):
+    return [{
+        "id": f"spoon_{700000 + i}",
+        "name": f"{DISHES[i % len(DISHES)]} with Lemon Herb Dressing",
+        "cuisine": CUISINES[i % len(CUISINES)],
+        "nutrition": {"calories": 420.37 + i, "protein": 32.5, "carbs": 38.12, "fat": 14.9},
+    } for i in range(count)]
+
+
+def legacy_prompt(recipes, user_summary) -> str:
+    rows = [
+        f"#{i} {r['name']}|{r['cuisine']}|Cal:{r['nutrition']['calories']} P:{r['nutrition']['protein']}g "
+        f"C:{r['nutrition'].get('carbohydrates', 0)}g F:{r['nutrition']['fat']}g"
+        for i, r in enumerate(recipes, 1)
+    ]
+    return f"{LEGACY_INSTRUCTION}\n\nRECIPES:\n" + "\n".join(rows) + f"\n\nUSER: {json.dumps(user_summary)}"
+
+
+async def run(label, plans, generate):
+    billed, cached, output, latencies = [], [], [], []
+    for _ in range(plans):
+        started = time.perf_counter()
+        response = await generate()
+        latencies.append(time.perf_counter() - started)
+        usage = response.usage_metadata
+        billed.append(usage.prompt_token_count - usage.cached_content_token_count)
+        cached.append(usage.cached_content_token_count)
+        output.append(usage.candidates_token_count)
+    print(f"{label:>10} {statistics.mean(billed):>10.0f} {statistics.mean(cached):>8.0f} "
+          f"{statistics.mean(output):>8.0f} {statistics.median(latencies) * 1000:>9.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=20)
+    args = parser.parse_args()
+
+    user_summary = {"goal": "lose_fat", "tdee": 2500, "allergies": ["peanuts"],
+                    "cuisines": ["Mediterranean", "Asian"], "meals_per_day": 3}
+    model = FakeGenerativeModel("models/fake")
+    builder = PromptBuilder()
+    # Force caching on: the fake API has no minimum cacheable size
+    cache = ContextCache(min_tokens=0)
+
+    legacy = legacy_prompt(make_recipes(21), user_summary)
+    prompt = builder.build(make_recipes(14), user_summary)
+
+    async def cached_generate():
+        cached_model = cache.model_for(fake_genai, "models/fake", prompt)
+        return await cached_model.generate_content_async(prompt.suffix)
+
+    print(f"{'prompt':>10} {'in tokens':>10} {'cached':>8} {'out tok':>8} {'p50 ms':>9}")
+    await run("legacy", args.plans, lambda: model.generate_content_async(legacy))
+    await run("ids", args.plans, lambda: model.generate_content_async(prompt.text))
+    await run("ids+cache", args.plans, cached_generate)
+
+    response = await model.generate_content_async(prompt.text)
+    plan = builder.resolve(response.text, prompt)
+    resolved = sum(1 for day in plan["days"] for meal in day["meals"] if meal["recipe_id"])
+    print(f"\nresolved {resolved} meal slots back to recipe IDs; cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
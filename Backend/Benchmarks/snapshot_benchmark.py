@@ -0,0 +1,124 @@
+"""
+Node bootstrap benchmark: catalog snapshot vs re-seeding
+
+Usage: python -m Backend.Benchmarks.snapshot_benchmark [--sizes 1000 10000] [--mysql]
+
+For a synthetic catalog of each size, measures writing a snapshot, then the
+time to a serving-ready node from it: checksum verification, NumPy vector
+store load and ingredient bitmaps (plus the MySQL bulk load with --mysql).
+For comparison it estimates the re-embedding time alone from the local
+encoder's measured throughput (when sentence_transformers is installed),
+before counting any recipe API calls.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from Backend.Services.catalog_snapshot import SnapshotWriter, read_manifest, iter_snapshot
+from Backend.Services.ingredient_bitmaps import IngredientBitmapIndex
+from Backend.Services.numpy_vector_store import NumpyRecipeVectorStore, EMBEDDING_DIM
+from Backend.Services.recipe_embedder import EMBEDDING_MODEL_NAME, EMBEDDING_TEXT_VERSION
+
+CUISINES = ["Mediterranean", "Asian", "Mexican", "Italian", "American"]
+INGREDIENTS = ["chicken breast", "rice", "broccoli", "olive oil", "garlic", "onion", "tomato", "salmon",
+               "quinoa", "spinach", "black bean", "egg", "greek yogurt", "lemon", "bell pepper"]
+
+
+def make_recipes(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    recipes = [{
+        "id": f"bench_{i:07d}",
+        "name": f"Recipe {i}",
+        "source": "synthetic",
+        "cuisine": CUISINES[i % len(CUISINES)],
+        "description": "A quick weeknight dish with plenty of protein and vegetables.",
+        "nutrition": {"calories": float(rng.uniform(150, 1100)), "protein": float(rng.uniform(5, 60)),
+                      "carbs": float(rng.uniform(5, 120)), "fat": float(rng.uniform(2, 50))},
+        "ingredients": [INGREDIENTS[j] for j in rng.choice(len(INGREDIENTS), 6, replace=False)],
+        "instructions": "Prep, cook and serve.",
+        "tags": ["dinner"],
+        "popularity_score": 0
+    } for i in range(size)]
+    embeddings = rng.normal(size=(size, EMBEDDING_DIM)).astype(np.float32)
+    return recipes, embeddings
+
+
+def encode_rate():
+    """Recipes/s of the local embedding model, or None if it is not installed"""
+    try:
+        from Backend.Services.recipe_embedder import load_sentence_transformer
+    except ImportError:
+        return None
+    try:
+        model = load_sentence_transformer()
+    except ImportError:
+        return None
+    documents = ["Recipe: grilled chicken bowl. Cuisine: Asian. Ingredients: chicken, rice, broccoli"] * 256
+    model.encode(documents[:8])
+    started = time.perf_counter()
+    model.encode(documents)
+    return len(documents) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--mysql", action="store_true", help="Also bulk-load the configured MySQL database")
+    args = parser.parse_args()
+
+    rate = encode_rate()
+    repo = None
+    if args.mysql:
+        from Backend.Routers.recipe_repo import RecipeRepository
+        repo = RecipeRepository()
+
+    print(f"{'recipes':>8} {'write s':>8} {'MB':>6} {'verify s':>9} {'vectors s':>10} {'bitmaps s':>10} "
+          f"{'mysql s':>8} {'ready s':>8} {'re-embed s':>11}")
+    for size in args.sizes:
+        recipes, embeddings = make_recipes(size)
+        workdir = tempfile.mkdtemp()
+        try:
+            started = time.perf_counter()
+            writer = SnapshotWriter(f"{workdir}/snapshot", EMBEDDING_DIM, EMBEDDING_MODEL_NAME, EMBEDDING_TEXT_VERSION)
+            for start in range(0, size, args.batch):
+                writer.write_batch(recipes[start:start + args.batch], embeddings[start:start + args.batch])
+            manifest = writer.close()
+            write_s = time.perf_counter() - started
+            size_mb = sum(f["bytes"] for f in manifest["files"].values()) / 1e6
+
+            started = time.perf_counter()
+            read_manifest(f"{workdir}/snapshot", verify=True)
+            verify_s = time.perf_counter() - started
+
+            store = NumpyRecipeVectorStore(f"{workdir}/vectors")
+            bitmaps = IngredientBitmapIndex(f"{workdir}/ingredients")
+            vectors_s = bitmaps_s = mysql_s = 0.0
+            with store.deferred_saves():
+                for batch, batch_embeddings in iter_snapshot(f"{workdir}/snapshot", args.batch):
+                    step = time.perf_counter()
+                    store.add_embedded_recipes(batch, batch_embeddings)
+                    vectors_s += time.perf_counter() - step
+                    step = time.perf_counter()
+                    bitmaps.add_recipes(batch)
+                    bitmaps_s += time.perf_counter() - step
+                    if repo is not None:
+                        step = time.perf_counter()
+                        repo.bulk_upsert_recipes(batch, args.batch)
+                        mysql_s += time.perf_counter() - step
+                step = time.perf_counter()
+                store.flush()
+                vectors_s += time.perf_counter() - step
+            ready_s = verify_s + vectors_s + bitmaps_s + mysql_s
+
+            reembed = f"{size / rate:>11.1f}" if rate else f"{'n/a':>11}"
+            mysql = f"{mysql_s:>8.2f}" if repo is not None else f"{'skipped':>8}"
+            print(f"{size:>8} {write_s:>8.2f} {size_mb:>6.1f} {verify_s:>9.2f} {vectors_s:>10.2f} "
+                  f"{bitmaps_s:>10.2f} {mysql} {ready_s:>8.2f} {reembed}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Startup benchmark: import time, time-to-listening and time-to-ready
+
+Usage: python -m Backend.Benchmarks.startup_benchmark [--runs 5] [--port 8123]
+
+For each run a fresh uvicorn process is started and polled:
+- time-to-listening: first 200 from /health (liveness)
+- time-to-ready: first 200 from /health/ready (model, vector store and DB loaded)
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+
+def measure_import_time() -> float:
+    """Seconds to import Backend.main in a fresh interpreter"""
+    code = (
+        "import time; t = time.perf_counter(); import Backend.main; "
+        "print(time.perf_counter() - t)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, started: float, timeout: float) -> float:
+    """Poll url until it returns 200; return seconds since started (or -1 on timeout)"""
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return -1.0
+
+
+def measure_server_startup(port: int, timeout: float) -> dict:
+    """Start uvicorn and time liveness and readiness"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "Backend.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        listening = wait_for(f"http://127.0.0.1:{port}/health", started, timeout)
+        ready = wait_for(f"http://127.0.0.1:{port}/health/ready", started, timeout)
+    finally:
+        process.terminate()
+        process.wait()
+    return {"listening": listening, "ready": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    imports, listening, ready = [], [], []
+    for run in range(1, args.runs + 1):
+        imports.append(measure_import_time())
+        result = measure_server_startup(args.port, args.timeout)
+        listening.append(result["listening"])
+        ready.append(result["ready"])
+        print(f"run {run}: import={imports[-1]:.2f}s listening={result['listening']:.2f}s ready={result['ready']:.2f}s")
+
+    print("=" * 60)
+    print(f"median import Backend.main: {statistics.median(imports):.2f}s")
+    print(f"median time-to-listening:   {statistics.median(listening):.2f}s")
+    print(f"median time-to-ready:       {statistics.median(ready):.2f}s  (-1 = not ready before timeout)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Typeahead benchmark for the in-memory recipe prefix index
+
+Usage: python -m Backend.Benchmarks.suggest_benchmark [--sizes 10000 100000] [--queries 2000]
+
+For a synthetic catalog of each size, measures the index build, then replays
+users typing recipe names and ingredients one character at a time and
+reports per-keystroke latency percentiles. Prefixes of up to
+CACHED_PREFIX_LENGTH characters are memoized after their first use; the
+"uncached" columns clear the memo before every query. It also times an
+incremental update of one import batch.
+"""
+import argparse
+import time
+import numpy as np
+from Backend.Services.prefix_index import PrefixIndex, CACHED_PREFIX_LENGTH
+
+ADJECTIVES = ["spicy", "creamy", "grilled", "roasted", "crispy", "smoky", "lemon", "garlic", "herbed", "sweet",
+              "tangy", "braised", "baked", "pan seared", "slow cooked", "honey glazed", "zesty", "easy", "classic", "vegan"]
+DISHES = ["chicken", "salmon", "tofu", "beef", "shrimp", "lentil", "chickpea", "turkey", "pork", "quinoa",
+          "mushroom", "eggplant", "cod", "lamb", "black bean", "sweet potato", "halloumi", "tempeh", "duck", "paneer"]
+FORMS = ["bowl", "curry", "tacos", "salad", "stir fry", "soup", "pasta", "skewers", "wrap", "burger",
+         "risotto", "stew", "traybake", "noodles", "flatbread", "casserole", "chili", "frittata", "masala", "tagine"]
+INGREDIENTS = ["chicken breast", "brown rice", "broccoli", "olive oil", "garlic", "red onion", "cherry tomato",
+               "salmon fillet", "quinoa", "baby spinach", "black beans", "eggs", "greek yogurt", "lemon juice",
+               "bell pepper", "coconut milk", "ginger", "soy sauce", "chickpeas", "feta cheese", "cumin",
+               "smoked paprika", "sweet potato", "avocado", "lime", "cilantro", "parmesan", "basil", "tofu", "kale"]
+
+
+def make_recipes(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    popularity = rng.zipf(1.6, size).clip(max=10_000)
+    return [{
+        "id": f"bench_{i:07d}",
+        "name": f"{ADJECTIVES[rng.integers(len(ADJECTIVES))]} {DISHES[rng.integers(len(DISHES))]} "
+                f"{FORMS[rng.integers(len(FORMS))]} {i}",
+        "ingredients": [INGREDIENTS[j] for j in rng.choice(len(INGREDIENTS), 8, replace=False)],
+        "popularity_score": int(popularity[i])
+    } for i in range(size)]
+
+
+def typing_sessions(recipes, count: int, seed: int = 1):
+    """Keystroke prefixes of real names and ingredients: 'c', 'cr', 'cre', ..."""
+    rng = np.random.default_rng(seed)
+    prefixes = []
+    while len(prefixes) < count:
+        recipe = recipes[rng.integers(len(recipes))]
+        target = recipe["name"] if rng.random() < 0.7 else recipe["ingredients"][0]
+        prefixes.extend(target[:length] for length in range(1, min(len(target), 10) + 1))
+    return prefixes[:count]
+
+
+def percentiles_us(samples):
+    values = np.asarray(samples) * 1e6
+    return np.percentile(values, 50), np.percentile(values, 99), values.max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=500, help="Recipes per incremental update")
+    args = parser.parse_args()
+
+    print(f"{'recipes':>8} {'entries':>9} {'build s':>8} {'p50 us':>8} {'p99 us':>8} {'max us':>8} "
+          f"{'unc p50':>8} {'unc p99':>8} {'update ms':>10}")
+    for size in args.sizes:
+        recipes = make_recipes(size)
+        index = PrefixIndex()
+        started = time.perf_counter()
+        index.build(recipes)
+        build_s = time.perf_counter() - started
+
+        prefixes = typing_sessions(recipes, args.queries)
+        for prefix in prefixes[:50]:
+            index.suggest(prefix, args.limit)
+
+        cached = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.suggest(prefix, args.limit)
+            cached.append(time.perf_counter() - started)
+
+        uncached = []
+        for prefix in prefixes:
+            index._cache = {}
+            started = time.perf_counter()
+            index.suggest(prefix, args.limit)
+            uncached.append(time.perf_counter() - started)
+
+        batch = make_recipes(args.batch, seed=size)
+        for i, recipe in enumerate(batch):
+            recipe["id"] = f"update_{i:07d}"
+        started = time.perf_counter()
+        index.add_recipes(batch)
+        update_ms = (time.perf_counter() - started) * 1e3
+
+        p50, p99, worst = percentiles_us(cached)
+        unc_p50, unc_p99, _ = percentiles_us(uncached)
+        print(f"{size:>8} {index.entry_count:>9} {build_s:>8.2f} {p50:>8.1f} {p99:>8.1f} {worst:>8.1f} "
+              f"{unc_p50:>8.1f} {unc_p99:>8.1f} {update_ms:>10.1f}")
+    print(f"(prefixes up to {CACHED_PREFIX_LENGTH} characters are memoized between updates)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Recall/latency benchmark: NumPy index vs ChromaDB (HNSW)
+
+Usage: python -m Backend.Benchmarks.vector_recall_benchmark [--sizes 1000 10000 50000] [--k 15]
+           [--m 16 32] [--construction-ef 100 200] [--search-ef 10 50 100]
+
+Synthetic clustered unit vectors (384-dim, like MiniLM) with random macro
+metadata are loaded into both backends. Ground truth is exact float32
+brute-force search. For each catalog size we report recall@k and per-query
+latency (p50/p95), unfiltered and with a calories < 600 filter. One Chroma
+collection is built per HNSW parameter combination, to pick HNSW_* settings.
+"""
+import itertools
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from Backend.Services.numpy_vector_store import NumpyVectorIndex, EMBEDDING_DIM
+from Backend.Services.recipe_embedder import hnsw_metadata, HNSW_SPACE, HNSW_M, HNSW_CONSTRUCTION_EF, HNSW_SEARCH_EF
+
+CUISINES = ["Mediterranean", "Asian", "Mexican", "Italian", "American", "General"]
+FILTER = {"calories": {"$lt": 600}}
+
+
+def make_catalog(size: int, dim: int, seed: int = 0):
+    """Clustered unit vectors plus random metadata"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(size // 200, 8), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = [{
+        "name": f"recipe {i}",
+        "cuisine": CUISINES[i % len(CUISINES)],
+        "source": "synthetic",
+        "calories": float(rng.uniform(150, 1100)),
+        "protein": float(rng.uniform(5, 60)),
+        "carbs": float(rng.uniform(5, 120)),
+        "fat": float(rng.uniform(2, 50)),
+        "tags": ""
+    } for i in range(size)]
+    return vectors, metadatas
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int, mask: np.ndarray = None) -> set:
+    scores = vectors @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+def percentiles(samples):
+    return np.percentile(samples, 50) * 1000, np.percentile(samples, 95) * 1000
+
+
+def bench_numpy(index, queries, truths, k, mask):
+    recalls, latencies = [], []
+    for query, truth in zip(queries, truths):
+        started = time.perf_counter()
+        rows, _ = index.search(query, k, mask)
+        latencies.append(time.perf_counter() - started)
+        recalls.append(len(truth & set(rows.tolist())) / k)
+    return float(np.mean(recalls)), percentiles(latencies)
+
+
+def bench_chroma(collection, queries, truths, k, where):
+    recalls, latencies = [], []
+    for query, truth in zip(queries, truths):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, where=where)
+        latencies.append(time.perf_counter() - started)
+        found = {int(recipe_id) for recipe_id in result["ids"][0]}
+        recalls.append(len(truth & found) / k)
+    return float(np.mean(recalls)), percentiles(latencies)
+
+
+def build_chroma(path, vectors, metadatas, m=HNSW_M, construction_ef=HNSW_CONSTRUCTION_EF, search_ef=HNSW_SEARCH_EF):
+    import chromadb
+    from chromadb.config import Settings
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection(
+        name=f"bench_m{m}_c{construction_ef}_s{search_ef}",
+        metadata=hnsw_metadata(HNSW_SPACE, m, construction_ef, search_ef),
+        embedding_function=None
+    )
+    batch = 5000
+    for start in range(0, len(vectors), batch):
+        stop = start + batch
+        collection.add(
+            ids=[str(i) for i in range(start, min(stop, len(vectors)))],
+            embeddings=vectors[start:stop].tolist(),
+            metadatas=metadatas[start:stop]
+        )
+    return collection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--m", type=int, nargs="+", default=[HNSW_M])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[HNSW_CONSTRUCTION_EF])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[HNSW_SEARCH_EF])
+    args = parser.parse_args()
+    hnsw_grid = list(itertools.product(args.m, args.construction_ef, args.search_ef))
+
+    print(f"{'size':>7} {'backend':>22} {'filter':>8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in args.sizes:
+        vectors, metadatas = make_catalog(size, EMBEDDING_DIM)
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(0, size, args.queries)] + 0.3 * rng.normal(size=(args.queries, EMBEDDING_DIM)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        workdir = tempfile.mkdtemp()
+        try:
+            index = NumpyVectorIndex(f"{workdir}/numpy")
+            index.upsert([str(i) for i in range(size)], vectors, metadatas, [""] * size)
+            filter_mask = index.mask_for(FILTER)
+
+            collections = [] if args.skip_chroma else [
+                (f"chroma M{m}/c{construction_ef}/s{search_ef}",
+                 build_chroma(f"{workdir}/chroma", vectors, metadatas, m, construction_ef, search_ef))
+                for m, construction_ef, search_ef in hnsw_grid
+            ]
+
+            for label, mask, where in (("none", None, None), ("cal<600", filter_mask, FILTER)):
+                truths = [exact_top_k(vectors, q, args.k, mask) for q in queries]
+                recall, (p50, p95) = bench_numpy(index, queries, truths, args.k, mask)
+                print(f"{size:>7} {'numpy':>22} {label:>8} {recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+                for backend, collection in collections:
+                    recall, (p50, p95) = bench_chroma(collection, queries, truths, args.k, where)
+                    print(f"{size:>7} {backend:>22} {label:>8} {recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
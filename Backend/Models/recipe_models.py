@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+#recipe models
+class RecipeBatchRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[List[str]] = None
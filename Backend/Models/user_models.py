@@ -1,6 +1,11 @@
+import os
 from pydantic import BaseModel
 from typing import List, Optional
 
+# Profile rows we wrote ourselves are served without re-validation;
+# set VALIDATE_DB_ROWS=1 (debugging, schema changes) to validate them again
+VALIDATE_DB_ROWS = os.getenv("VALIDATE_DB_ROWS", "0").lower() in ("1", "true", "yes")
+
 #user models
 class User(BaseModel):
     user_id: str
@@ -40,4 +45,35 @@ class UserFullProfile(BaseModel):
     nutrition: UserNutritionProfile
     preferences: UserPreferences
     insights: UserInsights
-    fridge_contents: UserFrigeContents
\ No newline at end of file
+    fridge_contents: UserFrigeContents
+
+#partial update models (PATCH /users/{user_id}): only the fields sent are applied
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    age: Optional[int] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+    goals: Optional[str] = None
+    budget_per_week: Optional[float] = None
+    scheduling_constraints: Optional[str] = None
+    equipment_available: Optional[List[str]] = None
+
+class UserNutritionProfileUpdate(BaseModel):
+    bmr: Optional[float] = None
+    tdee: Optional[float] = None
+    maintenance_calories: Optional[float] = None
+    allergies: Optional[List[str]] = None
+    dietary_identities: Optional[List[str]] = None
+
+class UserPreferencesUpdate(BaseModel):
+    favorite_cuisines: Optional[List[str]] = None
+    disliked_ingredients: Optional[List[str]] = None
+    meal_frequency: Optional[int] = None
+    snack_preference: Optional[bool] = None
+
+class UserProfileUpdate(BaseModel):
+    user: Optional[UserUpdate] = None
+    nutrition: Optional[UserNutritionProfileUpdate] = None
+    preferences: Optional[UserPreferencesUpdate] = None
+    insights: Optional[UserInsights] = None
+    fridge_contents: Optional[UserFrigeContents] = None
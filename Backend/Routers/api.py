@@ -1,13 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import JSONResponse, Response
 from typing import Optional, List
-from Backend.Models.user_models import UserFullProfile
-from Backend.Agents.meal_agent import generate_mealplan
+import asyncio
+from Backend.Models.user_models import UserFullProfile, UserProfileUpdate
+from Backend.Models.recipe_models import RecipeBatchRequest
+from Backend.Agents.meal_agent import generate_mealplan, get_llm_stats
 from Backend.Routers.users_repo import UsersRepository
-from Backend.Routers.mealplan_repo import MealPlanRepository
-from Backend.Routers.recipe_repo import RecipeRepository
+from Backend.Routers.mealplan_repo import MealPlanRepository, history_page_version
+from Backend.Routers.recipe_repo import RecipeRepository, recipe_columns, MAX_BATCH_IDS, SEARCH_MODES
+from Backend.Services.single_flight import SingleFlight, normalize_key, casefold
+from Backend.Routers.responses import (
+    FastJSONResponse, parse_fields, dumps, make_etag, etag_matches, etag_headers, not_modified
+)
+from Backend.Services.shopping_list import ingredients_used
+from Backend.Services.import_jobs import ImportJobManager, ImportQueueFull
+from Backend.Agents.plan_precompute import PlanPrecomputeScheduler
 
 router = APIRouter()
 recipe_repo = RecipeRepository()
+import_jobs = ImportJobManager(recipe_repo)
+plan_scheduler = PlanPrecomputeScheduler()
+
+# Identical concurrent requests share one computation (app retries, same-goal bursts)
+search_flight = SingleFlight("recipe_search")
+mealplan_flight = SingleFlight("mealplan_generation")
 
 # ==================== USER ENDPOINTS ====================
 
@@ -21,50 +37,99 @@ async def create_user(user_data: UserFullProfile):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/users/{user_id}")
-async def get_user(user_id: int):
-    """Retrieve a user profile"""
-    user_data = UsersRepository.get_user(user_id)
+async def get_user(user_id: int, if_none_match: Optional[str] = Header(None)):
+    """Retrieve a user profile (ETag from Profile_version; If-None-Match gives 304)"""
+    if if_none_match:
+        # Revalidation only needs the version, not the five profile rows
+        version = UsersRepository.get_profile_version(user_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        etag = make_etag("user", user_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    # Trusted rows go straight to orjson, skipping model validation and jsonable_encoder
+    user_data, version = UsersRepository.get_user_payload_and_version(user_id)
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
-    return user_data
+    return FastJSONResponse(user_data, headers=etag_headers(make_etag("user", user_id, version)))
+
+@router.patch("/users/{user_id}")
+async def update_user(user_id: int, update: UserProfileUpdate):
+    """
+    Partially update a user profile: send only the sections and fields that
+    changed. Unchanged values are not rewritten; replaced section rows are
+    kept in the *History tables.
+    """
+    try:
+        result = UsersRepository.update_profile(user_id, update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if result["updated"]:
+        # A plan still generating from the old profile must not be handed to new requests
+        mealplan_flight.forget(user_id)
+    return {"status": "success", "user_id": user_id, **result}
 
 # ==================== MEAL PLAN ENDPOINTS ====================
 
 @router.post("/users/{user_id}/mealplans")
 async def generate_meal_plan(user_id: int):
     """Generate a meal plan for a user"""
+    # Duplicate submissions while a plan is generating get the same plan
+    return await mealplan_flight.do(user_id, lambda: _generate_and_save_meal_plan(user_id))
+
+async def _generate_and_save_meal_plan(user_id: int) -> dict:
     # Check if user exists
     if not UsersRepository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get user data
-    user_data = UsersRepository.get_user(user_id)
-    
-    # Generate meal plan
-    meal_plan = await generate_mealplan(user_data)
+    # A plan precomputed off-peak from the current profile version is served as is
+    meal_plan = MealPlanRepository.claim_pending_plan(user_id)
+    precomputed = meal_plan is not None
+    if not precomputed:
+        # Get user data
+        user_data = UsersRepository.get_user(user_id)
+        
+        # Generate meal plan
+        meal_plan = await generate_mealplan(user_data)
     
     # Save to history
-    save_result = MealPlanRepository.save_meal_plan(user_id, meal_plan)
+    save_result = MealPlanRepository.save_meal_plan(
+        user_id,
+        meal_plan,
+        ingredients_used=ingredients_used(meal_plan)
+    )
     
     return {
         "status": "success",
         "user_id": user_id,
         "meal_plan": meal_plan,
-        "meal_plan_id": save_result["meal_plan_id"]
+        "meal_plan_id": save_result["meal_plan_id"],
+        "precomputed": precomputed
     }
 
 @router.get("/users/{user_id}/mealplans")
-async def get_meal_plan_history(user_id: int, limit: int = 10):
-    """Get meal plan history for a user"""
-    if not UsersRepository.user_exists(user_id):
+async def get_meal_plan_history(user_id: int, limit: int = 10, if_none_match: Optional[str] = Header(None)):
+    """Get meal plan history for a user (ETag from the page's ids and updated_at; If-None-Match gives 304)"""
+    if if_none_match:
+        version = MealPlanRepository.get_history_version(user_id, limit)
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        etag = make_etag("mealplans", user_id, limit, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    elif not UsersRepository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
     history = MealPlanRepository.get_meal_plan_history(user_id, limit)
-    return {
+    etag = make_etag("mealplans", user_id, limit, history_page_version(history))
+    return FastJSONResponse({
         "status": "success",
         "user_id": user_id,
         "history": history
-    }
+    }, headers=etag_headers(etag))
 
 @router.post("/mealplans/{meal_plan_id}/feedback")
 async def submit_feedback(meal_plan_id: int, feedback: dict, energy_levels: Optional[str] = None):
@@ -77,32 +142,60 @@ async def submit_feedback(meal_plan_id: int, feedback: dict, energy_levels: Opti
 
 # ==================== RECIPE ENDPOINTS ====================
 
-@router.post("/recipes/import")
+@router.post("/recipes/import", status_code=202)
 async def import_recipes(goal: str, cuisine: Optional[str] = None, limit: int = 50):
     """
-    Import recipes from external APIs into BOTH MySQL and ChromaDB
+    Start a background import from external APIs into BOTH MySQL and ChromaDB
     
     Args:
         goal: 'lose_fat', 'gain_muscle', or 'maintain'
         cuisine: Optional cuisine filter (e.g., 'Mediterranean', 'Asian')
         limit: Maximum number of recipes to import
+    
+    Returns the job id; poll GET /recipes/import/{job_id} for progress.
     """
     try:
-        result = await recipe_repo.seed_from_apis(goal, cuisine, limit)
-        return {
-            "status": "success",
-            "message": f"Imported {result['imported']} recipes",
-            "details": result
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job = import_jobs.submit(goal, cuisine, limit)
+    except ImportQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {
+        "status": "accepted",
+        "job_id": job.id,
+        "job": job.progress()
+    }
+
+@router.get("/recipes/import")
+async def list_import_jobs():
+    """Recent import jobs, newest first"""
+    return {"status": "success", "jobs": import_jobs.list()}
+
+@router.get("/recipes/import/{job_id}")
+async def get_import_job(job_id: str):
+    """Phase, counts, throughput and error of an import job"""
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {"status": "success", "job": job.progress()}
+
+@router.delete("/recipes/import/{job_id}")
+async def cancel_import_job(job_id: str):
+    """Cancel a queued or running import job (recipes already written are kept)"""
+    job = import_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {"status": "success", "job": job.progress()}
 
 @router.get("/recipes/search")
 async def search_recipes(
     goal: str,
     cuisines: Optional[List[str]] = None,
     allergies: Optional[List[str]] = None,
-    limit: int = 10
+    tags: Optional[List[str]] = None,
+    diversity: Optional[float] = None,
+    limit: int = 10,
+    fields: Optional[str] = None,
+    fridge: Optional[List[str]] = None,
+    mode: str = "auto"
 ):
     """
     Search recipes using vector similarity (ChromaDB) and fetch from MySQL
@@ -111,44 +204,153 @@ async def search_recipes(
         goal: 'lose_fat', 'gain_muscle', or 'maintain'
         cuisines: List of preferred cuisines
         allergies: List of allergens to avoid
+        tags: Tags every result must carry (e.g. 'vegetarian', 'gluten-free')
+        diversity: Optional MMR lambda in [0, 1]; lower = more varied results
         limit: Maximum number of results
+        fields: Comma-separated fields to return (e.g. 'name,cuisine,nutrition')
+        fridge: Ingredients on hand; recipes using more of them rank higher
+        mode: 'auto' (vector, SQL while it is unavailable), 'vector' (never
+              falls back; empty while the store is empty) or 'sql'
+              (structured filters only, ranked by popularity)
     """
+    projection = parse_fields(fields)
+    try:
+        recipe_columns(projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown search mode '{mode}'. Must be one of: {', '.join(SEARCH_MODES)}")
+    
     try:
-        results = recipe_repo.search_recipes(
+        # goal is looked up case-sensitively; cuisines, allergies, tags and fridge items are not
+        key = normalize_key(goal, casefold(cuisines or []), casefold(allergies or []), casefold(tags or []),
+                            diversity, limit, projection or [], casefold(fridge or []), mode)
+        results = await search_flight.do(key, lambda: asyncio.to_thread(
+            recipe_repo.search_recipes,
             goal=goal,
             preferences=cuisines,
             allergies=allergies,
-            n_results=limit
-        )
-        return {
+            n_results=limit,
+            tags=tags,
+            diversity=diversity,
+            fields=projection,
+            fridge=fridge,
+            mode=mode
+        ))
+        return FastJSONResponse({
             "status": "success",
             "count": len(results),
             "recipes": results
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Declared before /recipes/{recipe_id} so "suggest" is not taken for an id
+@router.get("/recipes/suggest")
+async def suggest_recipes(q: str, limit: int = 10):
+    """
+    Typeahead: recipes whose name or an ingredient has a word starting with q,
+    most popular first (in-memory prefix index, no database round trip)
+    
+    Args:
+        q: What the user has typed so far (e.g. 'chick')
+        limit: Maximum number of suggestions (1-50)
+    """
+    if not 1 <= limit <= 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+    suggestions = recipe_repo.suggest_index.suggest(q, limit)
+    return FastJSONResponse({
+        "status": "success",
+        "query": q,
+        "ready": recipe_repo.suggest_index.built,
+        "count": len(suggestions),
+        "suggestions": suggestions
+    })
+
+async def _get_recipes_batch(ids: List[str], fields: Optional[List[str]]):
+    """Hydrate recipes in the requested order; unknown ids get a not-found marker"""
+    if not ids:
+        raise HTTPException(status_code=400, detail="At least one recipe id is required")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} recipe ids per request")
+    try:
+        recipe_columns(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        rows = await asyncio.to_thread(recipe_repo.get_recipes_by_ids, ids, fields)
+        recipes = [rows.get(recipe_id, {"id": recipe_id, "found": False}) for recipe_id in ids]
+        missing = [recipe_id for recipe_id in dict.fromkeys(ids) if recipe_id not in rows]
+        return FastJSONResponse({
+            "status": "success",
+            "count": len(ids) - sum(1 for recipe_id in ids if recipe_id not in rows),
+            "recipes": recipes,
+            "missing": missing
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/recipes")
+async def get_recipes(ids: str, fields: Optional[str] = None):
+    """
+    Get many recipes in one round trip
+    
+    Args:
+        ids: Comma-separated recipe IDs; results keep this order
+        fields: Comma-separated fields to return (e.g. 'name,cuisine,nutrition')
+    """
+    return await _get_recipes_batch(parse_fields(ids) or [], parse_fields(fields))
+
+@router.post("/recipes/batch")
+async def get_recipes_batch(request: RecipeBatchRequest):
+    """Same as GET /recipes?ids=... for ID lists too long for a query string"""
+    return await _get_recipes_batch(request.ids, request.fields)
+
 @router.get("/recipes/{recipe_id}")
-async def get_recipe(recipe_id: str):
-    """Get a specific recipe by ID from MySQL"""
+async def get_recipe(recipe_id: str, fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    """
+    Get a specific recipe by ID from MySQL (fields= limits the columns returned).
+    
+    The ETag comes from Recipes.last_updated and the projection, read with one
+    primary key lookup, so If-None-Match answers 304 before the recipe is
+    fetched, parsed or serialized.
+    """
+    projection = parse_fields(fields)
+    try:
+        recipe_columns(projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        recipe = recipe_repo.get_recipe_by_id(recipe_id)
+        version = recipe_repo.get_recipe_version(recipe_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        etag = make_etag("recipe", recipe_id, version, projection or [])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        recipe = recipe_repo.get_recipe_by_id(recipe_id, projection, version)
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
-        return {
+        body = dumps({
             "status": "success",
             "recipe": recipe
-        }
+        })
+        return Response(body, media_type="application/json", headers=etag_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/recipes/stats/database")
-async def get_database_stats():
-    """Get statistics about MySQL and ChromaDB sync status"""
+async def get_database_stats(refresh: bool = False):
+    """
+    Get statistics about MySQL and ChromaDB sync status: counts by source and
+    cuisine and last sync times, from maintained counters (refresh=true recounts)
+    """
     try:
-        stats = recipe_repo.get_database_stats()
+        stats = await asyncio.to_thread(recipe_repo.get_database_stats, refresh)
         return {
             "status": "success",
             "stats": stats
@@ -159,6 +361,34 @@ async def get_database_stats():
 # ==================== HEALTH CHECK ====================
 
 @router.get("/health")
+@router.get("/health/live")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness probe: the process is up and serving requests"""
     return {"status": "healthy"}
+
+@router.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: embedding model, vector store and MySQL are all available"""
+    checks = await asyncio.to_thread(recipe_repo.readiness)
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming_up", "checks": checks}
+    )
+
+# ==================== METRICS ====================
+
+@router.get("/metrics")
+async def get_metrics():
+    """Runtime counters for upstream model calls, request coalescing and caches"""
+    return {
+        "status": "success",
+        "llm": get_llm_stats(),
+        "recipe_cache": recipe_repo.recipe_cache.stats(),
+        "import_jobs": import_jobs.stats(),
+        "plan_precompute": plan_scheduler.stats(),
+        "suggest_index": recipe_repo.suggest_index.stats(),
+        "single_flight": {
+            flight.name: flight.stats() for flight in (search_flight, mealplan_flight)
+        }
+    }
@@ -1,12 +1,28 @@
-from Backend.database import get_db_connection, get_db_cursor
+from Backend.database import get_db_connection, get_db_cursor, json_column
 import json
-from typing import Optional, List
+import os
+from typing import Optional, List, Union
 from datetime import datetime
 
+# A precomputed plan older than this is regenerated on request instead of served
+PENDING_PLAN_MAX_AGE_H = int(os.getenv("PENDING_PLAN_MAX_AGE_H", "48"))
+
+def history_version(count: int, last_id: Optional[int], updated_at: Optional[datetime]) -> str:
+    """Version token of a history page: changes when a plan is added, dropped or updated (feedback)"""
+    return f"{count}-{last_id or 0}-{updated_at.isoformat() if updated_at else ''}"
+
+def history_page_version(history: List[dict]) -> str:
+    """history_version of rows returned by get_meal_plan_history"""
+    return history_version(
+        len(history),
+        max((row['id'] for row in history), default=None),
+        max((row['updated_at'] for row in history if row.get('updated_at')), default=None)
+    )
+
 class MealPlanRepository:
     
     @staticmethod
-    def save_meal_plan(user_id: int, meal_plan: str, ingredients_used: Optional[List[str]] = None) -> dict:
+    def save_meal_plan(user_id: int, meal_plan: Union[dict, str], ingredients_used: Optional[List[str]] = None) -> dict:
         """Save a generated meal plan to history"""
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
@@ -38,7 +54,7 @@ class MealPlanRepository:
             sql = """
                 SELECT * FROM MealPlanHistory 
                 WHERE User_id = %s 
-                ORDER BY created_at DESC 
+                ORDER BY created_at DESC, id DESC
                 LIMIT %s
             """
             cursor.execute(sql, (user_id, limit))
@@ -46,15 +62,38 @@ class MealPlanRepository:
             
             # Parse JSON fields
             for result in results:
-                if result['Generated_meals']:
-                    result['Generated_meals'] = json.loads(result['Generated_meals']) if isinstance(result['Generated_meals'], str) else result['Generated_meals']
-                if result['Ingredients_used']:
-                    result['Ingredients_used'] = json.loads(result['Ingredients_used']) if isinstance(result['Ingredients_used'], str) else result['Ingredients_used']
-                if result['User_feedback']:
-                    result['User_feedback'] = json.loads(result['User_feedback']) if isinstance(result['User_feedback'], str) else result['User_feedback']
+                result['Generated_meals'] = json_column(result['Generated_meals'])
+                result['Ingredients_used'] = json_column(result['Ingredients_used'])
+                result['User_feedback'] = json_column(result['User_feedback'])
             
             return results
     
+    @staticmethod
+    def get_history_version(user_id: int, limit: int = 10) -> Optional[str]:
+        """
+        history_version of the page get_meal_plan_history(user_id, limit) would
+        return, from aggregates only (no JSON columns read), or None if the
+        user does not exist
+        """
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            
+            cursor.execute("SELECT id FROM User WHERE id = %s", (user_id,))
+            if not cursor.fetchone():
+                return None
+            
+            cursor.execute("""
+                SELECT COUNT(*) AS count, MAX(id) AS last_id, MAX(updated_at) AS updated_at
+                FROM (
+                    SELECT id, updated_at FROM MealPlanHistory
+                    WHERE User_id = %s
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT %s
+                ) page
+            """, (user_id, limit))
+            page = cursor.fetchone()
+            return history_version(page['count'], page['last_id'], page['updated_at'])
+    
     @staticmethod
     def update_feedback(meal_plan_id: int, feedback: dict, energy_levels: Optional[str] = None) -> dict:
         """Update user feedback for a meal plan"""
@@ -73,3 +112,69 @@ class MealPlanRepository:
             ))
             
             return {"status": "success", "updated_rows": cursor.rowcount}
+    
+    @staticmethod
+    def save_pending_plan(user_id: int, profile_version: int, meal_plan: dict) -> None:
+        """Store (or replace) the precomputed plan for a user"""
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("""
+                INSERT INTO PendingMealPlans (User_id, Profile_version, Generated_meals, created_at)
+                VALUES (%s, %s, %s, NOW())
+                ON DUPLICATE KEY UPDATE
+                    Profile_version = VALUES(Profile_version),
+                    Generated_meals = VALUES(Generated_meals),
+                    created_at = VALUES(created_at)
+            """, (user_id, profile_version, json.dumps(meal_plan)))
+    
+    @staticmethod
+    def claim_pending_plan(user_id: int, max_age_h: int = PENDING_PLAN_MAX_AGE_H) -> Optional[dict]:
+        """
+        Take the user's precomputed plan if it was generated from the current
+        Profile_version within max_age_h hours. The pending row is removed
+        either way (a stale plan will not become valid again), so concurrent
+        requests cannot both get it.
+        """
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("""
+                SELECT p.Generated_meals,
+                       p.Profile_version = u.Profile_version
+                           AND p.created_at >= NOW() - INTERVAL %s HOUR AS fresh
+                FROM PendingMealPlans p
+                JOIN User u ON u.id = p.User_id
+                WHERE p.User_id = %s
+                FOR UPDATE
+            """, (max_age_h, user_id))
+            pending = cursor.fetchone()
+            if not pending:
+                return None
+            cursor.execute("DELETE FROM PendingMealPlans WHERE User_id = %s", (user_id,))
+            return json_column(pending['Generated_meals']) if pending['fresh'] else None
+    
+    @staticmethod
+    def find_precompute_candidates(active_days: int, due_after_days: int, max_age_h: int = PENDING_PLAN_MAX_AGE_H,
+                                   limit: int = 200) -> List[int]:
+        """
+        Users who generated a plan within active_days but not within
+        due_after_days (so their next one is coming up), and who have no
+        fresh pending plan for their current profile; most overdue first.
+        """
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("""
+                SELECT h.User_id AS user_id
+                FROM MealPlanHistory h
+                JOIN User u ON u.id = h.User_id
+                LEFT JOIN PendingMealPlans p
+                    ON p.User_id = h.User_id
+                   AND p.Profile_version = u.Profile_version
+                   AND p.created_at >= NOW() - INTERVAL %s HOUR
+                WHERE h.created_at >= NOW() - INTERVAL %s DAY
+                  AND p.User_id IS NULL
+                GROUP BY h.User_id
+                HAVING MAX(h.created_at) < NOW() - INTERVAL %s DAY
+                ORDER BY MAX(h.created_at), h.User_id
+                LIMIT %s
+            """, (max_age_h, active_days, due_after_days, limit))
+            return [row['user_id'] for row in cursor.fetchall()]
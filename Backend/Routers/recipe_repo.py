@@ -1,15 +1,114 @@
-from Backend.database import get_db_connection, get_db_cursor
+from Backend.database import get_db_connection, get_db_cursor, check_db_connection
 from Backend.Services.recipe_importer import RecipeImporter
-from Backend.Services.recipe_embedder import RecipeVectorStore
+from Backend.Services.recipe_embedder import create_vector_store
+from Backend.Services.cache import TTLCache
+from Backend.Services.ingredient_bitmaps import get_ingredient_index
+from Backend.Services.catalog_stats import CatalogStats
+from Backend.Services.recipe_filters import build_macro_sql, cuisine_variants
+from Backend.Services.prefix_index import PrefixIndex
 import json
+import os
+import numpy as np
 from typing import List, Dict, Optional
 
+# Columns a client may request with fields=...; id is always returned
+RECIPE_FIELDS = ("id", "name", "source", "cuisine", "description", "nutrition",
+                 "ingredients", "instructions", "tags", "popularity_score")
+DEFAULT_RECIPE_FIELDS = ("id", "name", "cuisine", "description", "nutrition",
+                         "ingredients", "instructions", "tags")
+JSON_FIELDS = ("nutrition", "ingredients", "tags")
+
+# Hydrated recipe rows (DEFAULT_RECIPE_FIELDS) cached by id
+RECIPE_CACHE_SIZE = int(os.getenv("RECIPE_CACHE_SIZE", "2000"))
+RECIPE_CACHE_TTL_S = float(os.getenv("RECIPE_CACHE_TTL_S", "600"))
+MAX_BATCH_IDS = 200
+
+# Share of the final ranking given to fridge coverage, and how many extra
+# candidates are fetched so on-hand recipes can move up
+FRIDGE_WEIGHT = float(os.getenv("FRIDGE_WEIGHT", "0.3"))
+FRIDGE_FETCH_MULTIPLIER = 3
+
+# auto: vector search, falling back to SQL while the vector store warms up,
+# fails or is empty; vector: vector search only, empty or raising instead of
+# falling back; sql: structured MySQL-only search (no semantic ranking)
+SEARCH_MODES = ("auto", "vector", "sql")
+
+
+def recipe_columns(fields: Optional[List[str]] = None) -> str:
+    """
+    SELECT list for a field projection (pushed down into MySQL).
+    Raises ValueError for unknown fields.
+    """
+    if not fields:
+        return ", ".join(DEFAULT_RECIPE_FIELDS)
+    unknown = [field for field in fields if field not in RECIPE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown recipe fields: {', '.join(unknown)}. Allowed: {', '.join(RECIPE_FIELDS)}")
+    return ", ".join(["id"] + [field for field in dict.fromkeys(fields) if field != "id"])
+
+
+def parse_recipe_row(recipe: Dict) -> Dict:
+    """Decode the JSON columns present in a Recipes row"""
+    for field in JSON_FIELDS:
+        if field in recipe:
+            value = recipe[field]
+            if isinstance(value, str):
+                recipe[field] = json.loads(value)
+            elif value is None and field == 'tags':
+                recipe[field] = []
+    return recipe
+
+
+def project_recipe(recipe: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """Copy of a recipe row limited to the requested fields (id always kept)"""
+    if not fields:
+        return dict(recipe)
+    projected = {"id": recipe["id"]}
+    for field in fields:
+        if field in recipe:
+            projected[field] = recipe[field]
+    return projected
+
+
 class RecipeRepository:
     """Central repository managing recipe data across MySQL and ChromaDB"""
     
     def __init__(self):
         self.importer = RecipeImporter()
-        self.vector_store = RecipeVectorStore()
+        # Cheap to construct: the embedding model and ChromaDB load on first use
+        self.vector_store = create_vector_store()
+        self.recipe_cache = TTLCache(RECIPE_CACHE_SIZE, RECIPE_CACHE_TTL_S)
+        self.catalog_stats = CatalogStats()
+        # Typeahead over names and ingredients, built by warm_up
+        self.suggest_index = PrefixIndex()
+        self.warming = False
+    
+    @property
+    def ingredient_index(self):
+        return get_ingredient_index()
+    
+    def warm_up(self):
+        """Load the embedding model and vector store (run in the background at startup)"""
+        print("Warming up recipe search...")
+        self.warming = True
+        try:
+            self.vector_store.warm_up()
+            if len(self.ingredient_index) == 0:
+                self.rebuild_ingredient_index()
+            self.refresh_catalog_stats()
+            self.rebuild_suggest_index()
+            print("✅ Recipe search ready")
+        except Exception as e:
+            # Leave readiness false; the first request retries the load
+            print(f"Error warming up recipe search: {e}")
+        finally:
+            self.warming = False
+    
+    def readiness(self) -> Dict[str, bool]:
+        """Readiness of each dependency needed to serve recipe and plan requests"""
+        status = self.vector_store.readiness()
+        status["database"] = check_db_connection()
+        return status
     
     async def seed_from_apis(self, goal: str, cuisine: Optional[str] = None, limit: int = 50) -> Dict:
         """
@@ -26,8 +125,10 @@ class RecipeRepository:
         
         # 2. Save to MySQL (source of truth)
         saved_count = 0
+        new_recipes = []
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
+            existing = self._existing_rows(cursor, [recipe['id'] for recipe in recipes])
             for recipe in recipes:
                 try:
                     cursor.execute("""
@@ -35,7 +136,7 @@ class RecipeRepository:
                         (id, name, source, cuisine, description, nutrition, ingredients, instructions, tags, created_at)
                         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
                         ON DUPLICATE KEY UPDATE 
-                            last_updated = NOW()
+                            last_updated = NOW(6)
                     """, (
                         recipe['id'],
                         recipe['name'],
@@ -48,11 +149,19 @@ class RecipeRepository:
                         json.dumps(recipe.get('tags', []))
                     ))
                     saved_count += 1
+                    if recipe['id'] not in existing:
+                        new_recipes.append(recipe)
                 except Exception as e:
                     print(f"Error saving recipe {recipe['id']} to MySQL: {e}")
+        self.recipe_cache.invalidate(recipe['id'] for recipe in recipes)
+        # Duplicates only get last_updated bumped, so only new rows change the counts
+        self.catalog_stats.record_upsert(new_recipes, {})
+        self.catalog_stats.mark_synced({recipe['source'] for recipe in recipes})
+        self.suggest_index.add_recipes(new_recipes)
         
-        # 3. Sync to ChromaDB
+        # 3. Sync to ChromaDB and the ingredient bitmaps
         self.vector_store.add_recipes(recipes)
+        self.ingredient_index.add_recipes(recipes)
         
         return {
             "imported": len(recipes), 
@@ -60,71 +169,283 @@ class RecipeRepository:
             "saved_vector": len(recipes)
         }
     
+    def bulk_upsert_recipes(self, recipes: List[Dict], batch_size: int = 1000) -> int:
+        """
+        Write many recipes to MySQL with multi-row INSERT ... ON DUPLICATE KEY
+        UPDATE statements (one round trip per batch); returns rows written
+        """
+        sql = """
+            INSERT INTO Recipes
+            (id, name, source, cuisine, description, nutrition, ingredients, instructions, tags, popularity_score, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+            ON DUPLICATE KEY UPDATE
+                name = VALUES(name), source = VALUES(source), cuisine = VALUES(cuisine),
+                description = VALUES(description), nutrition = VALUES(nutrition),
+                ingredients = VALUES(ingredients), instructions = VALUES(instructions),
+                tags = VALUES(tags), last_updated = NOW(6)
+        """
+        written = 0
+        existing, seen = {}, set()
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            for start in range(0, len(recipes), batch_size):
+                batch = recipes[start:start + batch_size]
+                # Rows as they were before this call (an id repeated in a later batch is not "existing")
+                unseen = [recipe['id'] for recipe in batch if recipe['id'] not in seen]
+                seen.update(unseen)
+                existing.update(self._existing_rows(cursor, unseen))
+                cursor.executemany(sql, [(
+                    recipe['id'],
+                    recipe['name'],
+                    recipe.get('source', 'user_generated'),
+                    recipe.get('cuisine'),
+                    recipe.get('description', ''),
+                    json.dumps(recipe['nutrition']),
+                    json.dumps(recipe.get('ingredients', [])),
+                    recipe.get('instructions', ''),
+                    json.dumps(recipe.get('tags', [])),
+                    recipe.get('popularity_score', 0) or 0
+                ) for recipe in batch])
+                written += len(batch)
+        self.recipe_cache.invalidate(recipe['id'] for recipe in recipes)
+        self.catalog_stats.record_upsert(recipes, existing)
+        self.suggest_index.add_recipes(recipes)
+        return written
+    
+    def _existing_rows(self, cursor, recipe_ids: List[str]) -> Dict[str, Dict]:
+        """{id: {source, cuisine}} for ids already in Recipes (primary-key lookups)"""
+        existing = {}
+        for start in range(0, len(recipe_ids), MAX_BATCH_IDS):
+            chunk = recipe_ids[start:start + MAX_BATCH_IDS]
+            cursor.execute(
+                f"SELECT id, source, cuisine FROM Recipes WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            existing.update({row['id']: row for row in cursor.fetchall()})
+        return existing
+    
+    def refresh_catalog_stats(self):
+        """Reload the catalog counts with one aggregate over Recipes"""
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("""
+                SELECT source, cuisine, COUNT(*) as count, MAX(last_updated) as last_updated
+                FROM Recipes
+                GROUP BY source, cuisine
+            """)
+            self.catalog_stats.load(cursor.fetchall())
+    
+    def rebuild_suggest_index(self) -> int:
+        """Build the typeahead index from MySQL"""
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("SELECT id, name, ingredients, popularity_score FROM Recipes")
+            recipes = [parse_recipe_row(row) for row in cursor.fetchall()]
+        
+        self.suggest_index.build(recipes)
+        return len(recipes)
+    
+    def rebuild_ingredient_index(self) -> int:
+        """Rebuild the ingredient bitmaps from MySQL (e.g. for a catalog seeded before they existed)"""
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("SELECT id, ingredients FROM Recipes")
+            recipes = [parse_recipe_row(row) for row in cursor.fetchall()]
+        
+        if recipes:
+            self.ingredient_index.add_recipes(recipes)
+        return len(recipes)
+    
     def search_recipes(
         self,
         goal: str,
         preferences: Optional[List[str]] = None,
         allergies: Optional[List[str]] = None,
-        n_results: int = 15
+        n_results: int = 15,
+        tags: Optional[List[str]] = None,
+        diversity: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+        fridge: Optional[List[str]] = None,
+        mode: str = "auto"
     ) -> List[Dict]:
         """
         Search workflow: ChromaDB (get IDs) → MySQL (get full data)
+        
+        diversity: optional MMR lambda; lower values return more varied recipes
+        fields: optional column projection (see RECIPE_FIELDS)
+        fridge: ingredients on hand; recipes using more of them rank higher
+        mode: one of SEARCH_MODES
         """
-        # 1. Semantic search in ChromaDB (FAST)
-        vector_results = self.vector_store.search_by_goals_and_taste(
-            goal=goal,
-            preferences=preferences,
-            allergies=allergies,
-            n_results=n_results
-        )
-        
-        if not vector_results:
+        recipe_columns(fields)  # reject unknown fields before searching
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Must be one of: {', '.join(SEARCH_MODES)}")
+        fetch = n_results * FRIDGE_FETCH_MULTIPLIER if fridge else n_results
+        
+        # 1. Semantic search in ChromaDB (FAST), filtered by macros, cuisine and tags
+        recipe_ids = None
+        if mode == "vector" or (mode == "auto" and not self.warming):
+            try:
+                vector_results = self.vector_store.search_by_goals_and_taste(
+                    goal=goal,
+                    preferences=preferences,
+                    allergies=allergies,
+                    n_results=fetch,
+                    required_tags=tags,
+                    diversity=diversity
+                )
+                recipe_ids = [r['recipe_id'] for r in vector_results]
+            except Exception as e:
+                if mode == "vector":
+                    raise
+                print(f"Vector search failed, using SQL search: {e}")
+        
+        # Structured search when asked for, or in auto mode when the vector
+        # store is warming up, failing or empty (vector mode never falls back)
+        if mode == "sql" or (
+            mode == "auto" and not recipe_ids and (recipe_ids is None or self.vector_store.is_empty())
+        ):
+            recipe_ids = self.search_recipe_ids_sql(goal, preferences, allergies, fetch, tags)
+        
+        if not recipe_ids:
             return []
         
-        # 2. Get recipe IDs
-        recipe_ids = [r['recipe_id'] for r in vector_results]
+        # 2. Rank by what is in the fridge
+        if fridge:
+            recipe_ids = self._rank_by_fridge(recipe_ids, fridge)[:n_results]
+        
+        # 3. Fetch full data from the recipe cache / MySQL
+        rows = self.get_recipes_by_ids(recipe_ids, fields)
         
-        # 3. Fetch full data from MySQL
+        # Keep the vector store's ranking (IN (...) returns rows in key order)
+        return [rows[recipe_id] for recipe_id in recipe_ids if recipe_id in rows]
+    
+    def search_recipe_ids_sql(
+        self,
+        goal: str,
+        preferences: Optional[List[str]] = None,
+        allergies: Optional[List[str]] = None,
+        n_results: int = 15,
+        tags: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        MySQL-only search on the indexed macro columns and RecipeTags
+        (migrations/001_recipe_macro_columns_and_tags.sql): every goal bound,
+        all required tags, no allergen in the name or ingredients. Preferred
+        cuisines come first, then the rest, each by popularity.
+        """
+        conditions, values = build_macro_sql(goal)
+        
+        required = list(dict.fromkeys(tag.lower() for tag in tags or []))
+        if required:
+            conditions.append(f"""id IN (
+                SELECT recipe_id FROM RecipeTags
+                WHERE tag IN ({', '.join(['%s'] * len(required))})
+                GROUP BY recipe_id
+                HAVING COUNT(*) = %s
+            )""")
+            values += required + [len(required)]
+        
+        for allergen in allergies or []:
+            escaped = allergen.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append("LOWER(CONCAT(name, ' ', CAST(ingredients AS CHAR))) NOT LIKE %s")
+            values.append(f"%{escaped}%")
+        
+        # Preferred cuisines use the (cuisine, calories) index; the second pass fills up
+        passes = [(None, [])]
+        if preferences:
+            variants = cuisine_variants(preferences)
+            placeholders = ', '.join(['%s'] * len(variants))
+            passes = [
+                (f"cuisine IN ({placeholders})", variants),
+                (f"(cuisine IS NULL OR cuisine NOT IN ({placeholders}))", variants)
+            ]
+        
+        recipe_ids = []
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
-            placeholders = ','.join(['%s'] * len(recipe_ids))
-            cursor.execute(f"""
-                SELECT id, name, cuisine, description, nutrition, ingredients, instructions, tags
-                FROM Recipes
-                WHERE id IN ({placeholders})
-            """, recipe_ids)
-            
-            full_recipes = cursor.fetchall()
+            for clause, clause_values in passes:
+                if len(recipe_ids) >= n_results:
+                    break
+                where = conditions + [clause] if clause else conditions
+                cursor.execute(f"""
+                    SELECT id FROM Recipes
+                    WHERE {' AND '.join(where)}
+                    ORDER BY popularity_score DESC, id
+                    LIMIT %s
+                """, values + clause_values + [n_results - len(recipe_ids)])
+                recipe_ids.extend(row['id'] for row in cursor.fetchall())
+        return recipe_ids
+    
+    def _rank_by_fridge(self, recipe_ids: List[str], fridge: List[str]) -> List[str]:
+        """Blend vector rank with fridge coverage (one popcount pass over all candidates)"""
+        rank_score = 1.0 - np.arange(len(recipe_ids), dtype=np.float32) / len(recipe_ids)
+        coverage = self.ingredient_index.coverage(recipe_ids, fridge)
+        score = (1.0 - FRIDGE_WEIGHT) * rank_score + FRIDGE_WEIGHT * coverage
+        return [recipe_ids[i] for i in np.argsort(-score, kind="stable")]
+    
+    def get_recipes_by_ids(self, recipe_ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Hydrate many recipes with one IN (...) query, returning {id: recipe}
+        for the ids that exist. Rows come from the recipe cache when the
+        projection is covered by DEFAULT_RECIPE_FIELDS; misses are cached
+        along with their last_updated (see get_recipe_by_id).
+        """
+        columns = recipe_columns(fields)
+        unique_ids = list(dict.fromkeys(recipe_ids))
+        if not unique_ids:
+            return {}
         
-        # 4. Parse JSON fields
-        for recipe in full_recipes:
-            recipe['nutrition'] = json.loads(recipe['nutrition']) if isinstance(recipe['nutrition'], str) else recipe['nutrition']
-            recipe['ingredients'] = json.loads(recipe['ingredients']) if isinstance(recipe['ingredients'], str) else recipe['ingredients']
-            recipe['tags'] = json.loads(recipe.get('tags', '[]')) if isinstance(recipe.get('tags'), str) else recipe.get('tags', [])
+        cacheable = not fields or set(fields) <= set(DEFAULT_RECIPE_FIELDS)
+        if cacheable:
+            columns = recipe_columns() + ", last_updated"
+            found = self.recipe_cache.get_many(unique_ids)
+        else:
+            found = {}
         
-        return full_recipes
+        missing = [recipe_id for recipe_id in unique_ids if recipe_id not in found]
+        if missing:
+            with get_db_connection() as conn:
+                cursor = get_db_cursor(conn)
+                placeholders = ','.join(['%s'] * len(missing))
+                cursor.execute(f"""
+                    SELECT {columns}
+                    FROM Recipes
+                    WHERE id IN ({placeholders})
+                """, missing)
+                
+                rows = {row['id']: parse_recipe_row(row) for row in cursor.fetchall()}
+            
+            if cacheable:
+                self.recipe_cache.set_many(rows)
+            found.update(rows)
+        
+        projection = fields or DEFAULT_RECIPE_FIELDS  # never expose last_updated
+        return {recipe_id: project_recipe(recipe, projection) for recipe_id, recipe in found.items()}
     
-    def get_recipe_by_id(self, recipe_id: str) -> Optional[Dict]:
-        """Get single recipe from MySQL"""
+    def get_recipe_by_id(self, recipe_id: str, fields: Optional[List[str]] = None, version=None) -> Optional[Dict]:
+        """
+        Get single recipe from MySQL (optionally only the given fields).
+        version (from get_recipe_version) drops a cached copy written before
+        it, e.g. by another worker, so the body matches an ETag built from it.
+        """
+        if version is not None:
+            cached = self.recipe_cache.get(recipe_id)
+            if cached is not None and cached.get("last_updated") != version:
+                self.recipe_cache.invalidate([recipe_id])
+        return self.get_recipes_by_ids([recipe_id], fields).get(recipe_id)
+    
+    @staticmethod
+    def get_recipe_version(recipe_id: str):
+        """last_updated of a recipe (one primary key lookup), or None if it does not exist"""
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
-            cursor.execute("""
-                SELECT id, name, cuisine, description, nutrition, ingredients, instructions, tags
-                FROM Recipes
-                WHERE id = %s
-            """, (recipe_id,))
-            
-            recipe = cursor.fetchone()
-            
-            if recipe:
-                recipe['nutrition'] = json.loads(recipe['nutrition']) if isinstance(recipe['nutrition'], str) else recipe['nutrition']
-                recipe['ingredients'] = json.loads(recipe['ingredients']) if isinstance(recipe['ingredients'], str) else recipe['ingredients']
-                recipe['tags'] = json.loads(recipe.get('tags', '[]')) if isinstance(recipe.get('tags'), str) else recipe.get('tags', [])
-            
-            return recipe
+            cursor.execute("SELECT last_updated FROM Recipes WHERE id = %s", (recipe_id,))
+            row = cursor.fetchone()
+            return row['last_updated'] if row else None
     
     def track_recipe_usage(self, user_id: int, meal_plan_id: int, recipe_ids: List[str]):
         """Track which recipes were used in meal plans (MySQL only)"""
+        tracked = []
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
             for recipe_id in recipe_ids:
@@ -140,22 +461,26 @@ class RecipeRepository:
                         SET popularity_score = popularity_score + 1
                         WHERE id = %s
                     """, (recipe_id,))
+                    tracked.append(recipe_id)
                 except Exception as e:
                     print(f"Error tracking recipe usage for {recipe_id}: {e}")
+        self.suggest_index.bump_popularity(tracked)
     
-    def get_database_stats(self) -> Dict:
-        """Get statistics about both databases"""
-        # MySQL count
-        with get_db_connection() as conn:
-            cursor = get_db_cursor(conn)
-            cursor.execute("SELECT COUNT(*) as count FROM Recipes")
-            mysql_count = cursor.fetchone()['count']
+    def get_database_stats(self, refresh: bool = False) -> Dict:
+        """Get statistics about both databases (from the maintained counts, not COUNT(*))"""
+        if refresh or self.catalog_stats.is_stale:
+            self.refresh_catalog_stats()
+        catalog = self.catalog_stats.snapshot()
         
-        # ChromaDB count
+        # ChromaDB count (cached by the store)
         vector_count = self.vector_store.get_recipe_count()
         
         return {
-            "mysql_recipes": mysql_count,
+            "mysql_recipes": catalog["total"],
             "vector_recipes": vector_count,
-            "in_sync": mysql_count == vector_count
+            "in_sync": catalog["total"] == vector_count,
+            "by_source": catalog["by_source"],
+            "by_cuisine": catalog["by_cuisine"],
+            "last_sync": catalog["last_sync"],
+            "stats_age_s": catalog["age_s"]
         }
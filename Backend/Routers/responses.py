@@ -0,0 +1,194 @@
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+from typing import Any, List, Optional
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(value: Any):
+    """Encode types the JSON encoders do not handle natively"""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+
+    Returning it directly from an endpoint also skips FastAPI's
+    jsonable_encoder pass over the payload.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Clients may cache but must revalidate (If-None-Match) before reusing
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag from a resource's version parts (ids, version counters,
+    timestamps, projections) or its body bytes. Weak, because the
+    compression middleware serves different bytes for the same content.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a fields=name,cuisine,nutrition query parameter"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Parse Accept-Encoding into {encoding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        pieces = part.strip().split(";")
+        encoding = pieces[0].strip().lower()
+        if not encoding:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[encoding] = q
+    return accepted
+
+
+def negotiate_encoding(header: str) -> Optional[str]:
+    """Pick br (if available) or gzip from an Accept-Encoding header"""
+    accepted = _accepted_encodings(header)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = None
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing single-chunk JSON responses with brotli or
+    gzip, negotiated from Accept-Encoding. Streaming responses, small bodies
+    and already-encoded responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            response_headers = [(k.lower(), v) for k, v in start_message.get("headers", [])]
+            content_type = dict(response_headers).get(b"content-type", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in dict(response_headers)
+                or not content_type.startswith(b"application/json")
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            vary = dict(response_headers).get(b"vary")
+            new_headers = [(k, v) for k, v in response_headers if k not in (b"content-length", b"vary")]
+            new_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": new_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
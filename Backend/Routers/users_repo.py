@@ -1,7 +1,47 @@
-from Backend.database import get_db_connection, get_db_cursor
-from Backend.Models.user_models import UserFullProfile, User, UserNutritionProfile, UserPreferences, UserInsights, UserFrigeContents
+from Backend.database import get_db_connection, get_db_cursor, json_column
+from Backend.Models.user_models import UserFullProfile, UserProfileUpdate, VALIDATE_DB_ROWS
 import json
-from typing import Optional
+import math
+from typing import Optional, Tuple
+
+# Profile sections for partial updates:
+# section -> (table, user id column, {field: column}, history table)
+PROFILE_SECTIONS = {
+    "user": ("User", "id", {
+        "name": "Name", "age": "Age", "height_cm": "Height_cm", "weight_kg": "Weight_kg", "goals": "Goals",
+        "budget_per_week": "Budget_weekly", "scheduling_constraints": "Scheduling_constraints",
+        "equipment_available": "Equipment_available"
+    }, None),
+    "nutrition": ("UserNutritionProfile", "User_id", {
+        "bmr": "BMR", "tdee": "TDEE", "maintenance_calories": "Maintenance_cals", "allergies": "Allergies",
+        "dietary_identities": "Dietary_identities"
+    }, "UserNutritionProfileHistory"),
+    "preferences": ("UserPreferences", "User_id", {
+        "favorite_cuisines": "Favorite_cuisines", "disliked_ingredients": "Disliked_ingredients",
+        "meal_frequency": "Meal_frequency", "snack_preference": "Snack_preference"
+    }, "UserPreferencesHistory"),
+    "insights": ("UserInsights", "User_id", {
+        "cultural_context": "Cultural_context", "lifestyle_habits": "Lifestyle_habits",
+        "health_conditions": "Health_conditions", "energy_levels": "Energy_levels"
+    }, "UserInsightsHistory"),
+    "fridge_contents": ("UserFridgeContents", "user_id", {
+        "ingredients_on_hand": "Ingredients_on_hand"
+    }, "UserFridgeContentsHistory"),
+}
+JSON_FIELDS = {
+    "goals", "scheduling_constraints", "equipment_available", "allergies", "dietary_identities",
+    "favorite_cuisines", "disliked_ingredients", "cultural_context", "lifestyle_habits", "health_conditions",
+    "ingredients_on_hand"
+}
+# NOT NULL columns: a PATCH may change them but not clear them
+REQUIRED_FIELDS = {"name", "age", "height_cm", "weight_kg", "goals", "bmr", "tdee", "maintenance_calories", "meal_frequency"}
+
+
+def _same(stored, value) -> bool:
+    # FLOAT columns round-trip with single precision
+    if isinstance(stored, float) and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return math.isclose(stored, value, rel_tol=1e-6)
+    return stored == value
 
 class UsersRepository:
     
@@ -77,74 +117,171 @@ class UsersRepository:
     @staticmethod
     def get_user(user_id: int) -> Optional[UserFullProfile]:
         """Retrieve a user with all related profiles"""
+        payload = UsersRepository.get_user_payload(user_id)
+        if payload is None:
+            return None
+        # One nested validation runs in pydantic-core; cheaper than building
+        # the six models one by one (even with model_construct)
+        return UserFullProfile.model_validate(payload)
+    
+    @staticmethod
+    def get_user_payload(user_id: int) -> Optional[dict]:
+        """
+        Retrieve a user as a plain dict shaped like UserFullProfile.model_dump(),
+        for endpoints that only serialize it
+        """
+        return UsersRepository.get_user_payload_and_version(user_id)[0]
+    
+    @staticmethod
+    def get_user_payload_and_version(user_id: int) -> Tuple[Optional[dict], Optional[int]]:
+        """get_user_payload plus the Profile_version it was read at"""
+        with get_db_connection() as conn:
+            rows = UsersRepository._fetch_profile_rows(get_db_cursor(conn), user_id)
+        if rows is None:
+            return None, None
+        
+        payload = UsersRepository.profile_from_rows(*rows)
+        if VALIDATE_DB_ROWS:
+            payload = UserFullProfile.model_validate(payload).model_dump()
+        return payload, rows[0]['Profile_version']
+    
+    @staticmethod
+    def get_profile_version(user_id: int) -> Optional[int]:
+        """Profile_version of a user (one primary key lookup), or None if the user does not exist"""
         with get_db_connection() as conn:
             cursor = get_db_cursor(conn)
-            
-            # Get User
-            cursor.execute("SELECT * FROM User WHERE id = %s", (user_id,))
-            user_row = cursor.fetchone()
-            if not user_row:
+            cursor.execute("SELECT Profile_version FROM User WHERE id = %s", (user_id,))
+            row = cursor.fetchone()
+            return row['Profile_version'] if row else None
+    
+    @staticmethod
+    def _fetch_profile_rows(cursor, user_id: int, for_update: bool = False) -> Optional[tuple]:
+        """(user, nutrition, preferences, insights, fridge) rows, or None if the user does not exist"""
+        lock = " FOR UPDATE" if for_update else ""
+        
+        # Get User
+        cursor.execute("SELECT * FROM User WHERE id = %s" + lock, (user_id,))
+        user_row = cursor.fetchone()
+        if not user_row:
+            return None
+        
+        # Get UserNutritionProfile
+        cursor.execute("SELECT * FROM UserNutritionProfile WHERE User_id = %s" + lock, (user_id,))
+        nutrition_row = cursor.fetchone()
+        
+        # Get UserPreferences
+        cursor.execute("SELECT * FROM UserPreferences WHERE User_id = %s" + lock, (user_id,))
+        preferences_row = cursor.fetchone()
+        
+        # Get UserInsights
+        cursor.execute("SELECT * FROM UserInsights WHERE User_id = %s" + lock, (user_id,))
+        insights_row = cursor.fetchone()
+        
+        # Get UserFridgeContents
+        cursor.execute("SELECT * FROM UserFridgeContents WHERE User_id = %s" + lock, (user_id,))
+        fridge_row = cursor.fetchone()
+        
+        return user_row, nutrition_row, preferences_row, insights_row, fridge_row
+    
+    @staticmethod
+    def profile_from_rows(user_row: dict, nutrition_row: dict, preferences_row: dict,
+                          insights_row: dict, fridge_row: Optional[dict]) -> dict:
+        """
+        Map the profile rows to UserFullProfile's field layout without
+        validating; values are converted to the model's types here so the
+        result serializes exactly like the model would.
+        """
+        return {
+            "user": {
+                "user_id": str(user_row['id']),
+                "name": user_row['Name'],
+                "age": user_row['Age'],
+                "height_cm": user_row['Height_cm'],
+                "weight_kg": user_row['Weight_kg'],
+                "goals": json_column(user_row['Goals']),
+                "budget_per_week": float(user_row['Budget_weekly']) if user_row['Budget_weekly'] is not None else None,
+                "scheduling_constraints": json_column(user_row.get('Scheduling_constraints')),
+                "equipment_available": json_column(user_row.get('Equipment_available'))
+            },
+            "nutrition": {
+                "bmr": nutrition_row['BMR'],
+                "tdee": nutrition_row['TDEE'],
+                "maintenance_calories": nutrition_row['Maintenance_cals'],
+                "allergies": json_column(nutrition_row['Allergies'], []),
+                "dietary_identities": json_column(nutrition_row.get('Dietary_identities'))
+            },
+            "preferences": {
+                "favorite_cuisines": json_column(preferences_row['Favorite_cuisines']),
+                "disliked_ingredients": json_column(preferences_row['Disliked_ingredients']),
+                "meal_frequency": preferences_row['Meal_frequency'],
+                # BOOLEAN columns come back as 0/1
+                "snack_preference": bool(preferences_row['Snack_preference']) if preferences_row['Snack_preference'] is not None else None
+            },
+            "insights": {
+                "cultural_context": json_column(insights_row['Cultural_context']),
+                "lifestyle_habits": json_column(insights_row['Lifestyle_habits']),
+                "health_conditions": json_column(insights_row['Health_conditions']),
+                "energy_levels": insights_row['Energy_levels']
+            },
+            "fridge_contents": {
+                "ingredients_on_hand": json_column(fridge_row['Ingredients_on_hand']) if fridge_row else None
+            }
+        }
+    
+    @staticmethod
+    def update_profile(user_id: int, update: UserProfileUpdate) -> Optional[dict]:
+        """
+        Apply a partial profile update in one transaction.
+        
+        Only fields that differ from the stored profile are written, and only
+        the section tables containing them are touched. The replaced rows
+        are first copied into the matching *History table (INSERT ... SELECT,
+        one statement per section) and User.Profile_version is incremented.
+        Returns None if the user does not exist.
+        """
+        changes = {section: fields for section, fields in update.model_dump(exclude_unset=True).items() if fields}
+        for fields in changes.values():
+            cleared = sorted(field for field, value in fields.items() if value is None and field in REQUIRED_FIELDS)
+            if cleared:
+                raise ValueError(f"Cannot clear required fields: {', '.join(cleared)}")
+        
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            rows = UsersRepository._fetch_profile_rows(cursor, user_id, for_update=True)
+            if rows is None:
                 return None
+            stored = UsersRepository.profile_from_rows(*rows)
+            version = rows[0]['Profile_version']
             
-            # Get UserNutritionProfile
-            cursor.execute("SELECT * FROM UserNutritionProfile WHERE User_id = %s", (user_id,))
-            nutrition_row = cursor.fetchone()
-            
-            # Get UserPreferences
-            cursor.execute("SELECT * FROM UserPreferences WHERE User_id = %s", (user_id,))
-            preferences_row = cursor.fetchone()
-            
-            # Get UserInsights
-            cursor.execute("SELECT * FROM UserInsights WHERE User_id = %s", (user_id,))
-            insights_row = cursor.fetchone()
-            
-            # Get UserFridgeContents
-            cursor.execute("SELECT * FROM UserFridgeContents WHERE User_id = %s", (user_id,))
-            fridge_row = cursor.fetchone()
-            
-            # Build UserFullProfile
-            user = User(
-                user_id=str(user_row['id']),
-                name=user_row['Name'],
-                age=user_row['Age'],
-                height_cm=user_row['Height_cm'],
-                weight_kg=user_row['Weight_kg'],
-                goals=json.loads(user_row['Goals']) if isinstance(user_row['Goals'], str) else user_row['Goals'],
-                budget_per_week=user_row['Budget_weekly']
-            )
-            
-            nutrition = UserNutritionProfile(
-                bmr=nutrition_row['BMR'],
-                tdee=nutrition_row['TDEE'],
-                maintenance_calories=nutrition_row['Maintenance_cals'],
-                allergies=json.loads(nutrition_row['Allergies']) if nutrition_row['Allergies'] else []
-            )
-            
-            preferences = UserPreferences(
-                favorite_cuisines=json.loads(preferences_row['Favorite_cuisines']) if preferences_row['Favorite_cuisines'] else None,
-                disliked_ingredients=json.loads(preferences_row['Disliked_ingredients']) if preferences_row['Disliked_ingredients'] else None,
-                meal_frequency=preferences_row['Meal_frequency'],
-                snack_preference=preferences_row['Snack_preference']
-            )
-            
-            insights = UserInsights(
-                cultural_context=json.loads(insights_row['Cultural_context']) if insights_row['Cultural_context'] else None,
-                lifestyle_habits=json.loads(insights_row['Lifestyle_habits']) if insights_row['Lifestyle_habits'] else None,
-                health_conditions=json.loads(insights_row['Health_conditions']) if insights_row['Health_conditions'] else None,
-                energy_levels=insights_row['Energy_levels']
-            )
+            changed = {}
+            for section, fields in changes.items():
+                diff = {field: value for field, value in fields.items() if not _same(stored[section][field], value)}
+                if diff:
+                    changed[section] = diff
+            if not changed:
+                return {"updated": [], "profile_version": version}
             
-            fridge_contents = UserFrigeContents(
-                ingredients_on_hand=json.loads(fridge_row['Ingredients_on_hand']) if fridge_row and fridge_row['Ingredients_on_hand'] else None
-            )
+            for section, diff in changed.items():
+                table, owner, columns, history = PROFILE_SECTIONS[section]
+                values = [json.dumps(value) if field in JSON_FIELDS and value is not None else value
+                          for field, value in diff.items()]
+                if section == "fridge_contents" and rows[4] is None:
+                    # No fridge row yet, so no prior version to keep
+                    cursor.execute(f"INSERT INTO {table} ({', '.join(columns[field] for field in diff)}, {owner}) "
+                                   f"VALUES ({', '.join(['%s'] * (len(diff) + 1))})", (*values, user_id))
+                else:
+                    if history:
+                        # Snapshot the version being replaced
+                        section_columns = ", ".join(columns.values())
+                        cursor.execute(f"""
+                            INSERT INTO {history} ({section_columns}, {owner}, Profile_version)
+                            SELECT {section_columns}, {owner}, %s FROM {table} WHERE {owner} = %s
+                        """, (version, user_id))
+                    assignments = ", ".join(f"{columns[field]} = %s" for field in diff)
+                    cursor.execute(f"UPDATE {table} SET {assignments} WHERE {owner} = %s", (*values, user_id))
             
-            return UserFullProfile(
-                user=user,
-                nutrition=nutrition,
-                preferences=preferences,
-                insights=insights,
-                fridge_contents=fridge_contents
-            )
+            cursor.execute("UPDATE User SET Profile_version = %s WHERE id = %s", (version + 1, user_id))
+            return {"updated": list(changed), "profile_version": version + 1}
     
     @staticmethod
     def user_exists(user_id: int) -> bool:
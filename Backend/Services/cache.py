@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after ttl_s seconds.
+
+    Used from request threads (asyncio.to_thread) as well as the event loop,
+    so every operation takes the lock. Values are shared: callers must not
+    mutate what they get back.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Return {key: value} for the keys present and not expired"""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] <= now:
+                    if entry is not None:
+                        del self._entries[key]
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+                self.hits += 1
+        return found
+
+    def set(self, key: Hashable, value: Any):
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[Hashable, Any]):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_s
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,129 @@
+"""
+Catalog snapshot format
+
+A snapshot is a directory holding everything needed to bring up a node
+without calling the recipe APIs or re-embedding:
+
+    manifest.json       format version, counts, embedding model/template, sha256 per file
+    recipes.jsonl.gz    one Recipes row per line (JSON columns decoded)
+    embeddings.npy      (recipe_count, dim) matrix, row i belongs to line i
+
+Snapshots are written to a temporary directory and renamed into place, so a
+reader never sees a partial one.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from typing import Dict, Iterator, List, Tuple
+
+SNAPSHOT_FORMAT = "wondereats-catalog-snapshot"
+SNAPSHOT_FORMAT_VERSION = 1
+RECIPES_FILE = "recipes.jsonl.gz"
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotWriter:
+    """Streams recipes and their embeddings into a new snapshot directory"""
+
+    def __init__(self, path: str, dim: int, embedding_model: str, embedding_text_version: int, dtype: str = "float32"):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "embedding_model": embedding_model,
+            "embedding_text_version": embedding_text_version,
+            "embedding_dim": dim,
+            "embedding_dtype": self.dtype.name
+        }
+        self.count = 0
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        self._recipes = gzip.open(os.path.join(self.tmp_path, RECIPES_FILE), "wt", encoding="utf-8")
+        # Raw rows until the final count is known for the .npy header
+        self._raw = open(os.path.join(self.tmp_path, "embeddings.raw"), "wb")
+
+    def write_batch(self, recipes: List[Dict], embeddings):
+        embeddings = np.asarray(embeddings, dtype=self.dtype).reshape(len(recipes), self.dim)
+        for recipe in recipes:
+            self._recipes.write(json.dumps(recipe, default=str, separators=(",", ":")))
+            self._recipes.write("\n")
+        self._raw.write(embeddings.tobytes())
+        self.count += len(recipes)
+
+    def close(self) -> Dict:
+        self._recipes.close()
+        self._raw.close()
+
+        raw_path = os.path.join(self.tmp_path, "embeddings.raw")
+        matrix = np.lib.format.open_memmap(
+            os.path.join(self.tmp_path, EMBEDDINGS_FILE), mode="w+", dtype=self.dtype, shape=(self.count, self.dim)
+        )
+        if self.count:
+            matrix[:] = np.memmap(raw_path, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+        matrix.flush()
+        del matrix
+        os.remove(raw_path)
+
+        self.manifest.update({
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "recipe_count": self.count,
+            "files": {
+                name: {
+                    "sha256": file_sha256(os.path.join(self.tmp_path, name)),
+                    "bytes": os.path.getsize(os.path.join(self.tmp_path, name))
+                }
+                for name in (RECIPES_FILE, EMBEDDINGS_FILE)
+            }
+        })
+        with open(os.path.join(self.tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump(self.manifest, f, indent=2)
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp_path, self.path)
+        return self.manifest
+
+
+def read_manifest(path: str, verify: bool = True) -> Dict:
+    """Load the manifest; with verify, check format and every file checksum (raises ValueError)"""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')} v{manifest.get('format_version')}")
+    if verify:
+        for name, expected in manifest["files"].items():
+            actual = file_sha256(os.path.join(path, name))
+            if actual != expected["sha256"]:
+                raise ValueError(f"Checksum mismatch for {name}: expected {expected['sha256']}, got {actual}")
+    return manifest
+
+
+def iter_snapshot(path: str, batch_size: int = 1000) -> Iterator[Tuple[List[Dict], np.ndarray]]:
+    """Yield (recipes, float32 embeddings) batches in file order"""
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+    offset = 0
+    batch: List[Dict] = []
+    with gzip.open(os.path.join(path, RECIPES_FILE), "rt", encoding="utf-8") as f:
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch, np.asarray(embeddings[offset:offset + len(batch)], dtype=np.float32)
+                offset += len(batch)
+                batch = []
+    if batch:
+        yield batch, np.asarray(embeddings[offset:offset + len(batch)], dtype=np.float32)
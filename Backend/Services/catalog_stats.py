@@ -0,0 +1,92 @@
+"""
+Catalog statistics kept in memory
+
+Recipe counts with per-source and per-cuisine breakdowns and the last sync
+time per source. Loaded once with a single GROUP BY aggregate, then kept
+current by the write path (record_upsert) instead of running COUNT(*) on
+every stats call. Writers in other processes (the import CLIs) are picked up
+by the periodic reload (CATALOG_STATS_REFRESH_S).
+"""
+import datetime
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+CATALOG_STATS_REFRESH_S = float(os.getenv("CATALOG_STATS_REFRESH_S", "3600"))
+
+
+def _iso(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+    return value.isoformat()
+
+
+class CatalogStats:
+    def __init__(self, refresh_s: float = CATALOG_STATS_REFRESH_S):
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self.total = 0
+        self.by_source: Counter = Counter()
+        self.by_cuisine: Counter = Counter()
+        self.last_sync: Dict[str, object] = {}
+        self.loaded_at: Optional[float] = None
+
+    def load(self, rows: Iterable[Dict]):
+        """Replace the counts from (source, cuisine, count, last_updated) aggregate rows"""
+        by_source, by_cuisine, last_sync = Counter(), Counter(), {}
+        for row in rows:
+            source, cuisine = row["source"], row["cuisine"] or "General"
+            by_source[source] += row["count"]
+            by_cuisine[cuisine] += row["count"]
+            if row.get("last_updated") and (source not in last_sync or row["last_updated"] > last_sync[source]):
+                last_sync[source] = row["last_updated"]
+        with self._lock:
+            self.by_source, self.by_cuisine, self.last_sync = by_source, by_cuisine, last_sync
+            self.total = sum(by_source.values())
+            self.loaded_at = time.monotonic()
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_s
+
+    def record_upsert(self, recipes: List[Dict], existing: Dict[str, Dict]):
+        """
+        Apply written recipes; existing maps ids that were already stored to
+        their previous {source, cuisine}, so updates move between buckets
+        rather than adding to the total.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            for recipe in {recipe["id"]: recipe for recipe in recipes}.values():
+                source = recipe.get("source", "user_generated")
+                previous = existing.get(recipe["id"])
+                if previous is None:
+                    self.total += 1
+                else:
+                    self.by_source[previous["source"]] -= 1
+                    self.by_cuisine[previous["cuisine"] or "General"] -= 1
+                self.by_source[source] += 1
+                self.by_cuisine[recipe.get("cuisine") or "General"] += 1
+                self.last_sync[source] = now
+            self.by_source += Counter()  # drop emptied buckets
+            self.by_cuisine += Counter()
+
+    def mark_synced(self, sources: Iterable[str]):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            for source in sources:
+                self.last_sync[source] = now
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "by_source": dict(self.by_source.most_common()),
+                "by_cuisine": dict(self.by_cuisine.most_common()),
+                "last_sync": {source: _iso(value) for source, value in self.last_sync.items()},
+                "age_s": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at is not None else None
+            }
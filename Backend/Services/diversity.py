@@ -0,0 +1,60 @@
+import numpy as np
+from typing import List, Optional
+
+DEFAULT_MMR_LAMBDA = 0.5
+# How many nearest neighbours to fetch per requested result before re-ranking
+MMR_FETCH_MULTIPLIER = 4
+
+
+def mmr_rerank(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+    relevance: Optional[np.ndarray] = None
+) -> List[int]:
+    """
+    Maximal marginal relevance: pick k candidates that are relevant to the
+    query but dissimilar to each other.
+
+    Each step selects argmax(lambda * relevance - (1 - lambda) * max similarity
+    to anything already selected). lambda=1 is plain nearest-neighbour order,
+    lambda=0 is maximum diversity.
+
+    Args:
+        query: query embedding (dim,)
+        candidates: candidate embeddings (n, dim)
+        k: number of candidates to select
+        lambda_mult: relevance/diversity trade-off in [0, 1]
+        relevance: optional precomputed relevance per candidate (defaults to
+            cosine similarity to the query)
+
+    Returns:
+        Indices into candidates, in selection order.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    n = len(candidates)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    if relevance is None:
+        query = np.asarray(query, dtype=np.float32)
+        relevance = candidates @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    max_similarity = candidates @ candidates[selected[0]]
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, candidates @ candidates[best], out=max_similarity)
+
+    return selected
@@ -0,0 +1,273 @@
+"""
+Shared embedding service for multi-worker deployments
+
+Every uvicorn worker otherwise loads its own SentenceTransformer (~90MB of
+weights plus torch). Run one service process instead:
+
+    EMBEDDING_SERVICE_AUTHKEY=<secret> python -m Backend.Services.embedding_service
+
+and start the API with the same EMBEDDING_SERVICE_AUTHKEY and
+EMBEDDING_SERVICE_ADDRESS set to the service's address (a socket path, or
+host:port). Workers then send encode requests over a
+multiprocessing.connection channel. The service collects the requests that
+arrive within a short window (EMBEDDING_BATCH_WINDOW_MS) and encodes them in
+one forward pass. Clients can also ask which model the service encodes with
+(EmbeddingClient.model_name), so stored vectors are labelled with it.
+
+multiprocessing.connection unpickles what it receives, so anyone who can
+connect and knows the auth key can run code as the service user:
+- EMBEDDING_SERVICE_AUTHKEY has no default; server and client refuse to
+  start without it. Use a long random secret.
+- The default address is a socket in a private (0700) directory under the
+  user's home, and sockets are created 0600.
+- TCP addresses must be loopback unless EMBEDDING_SERVICE_ALLOW_REMOTE=1,
+  which is only safe on an isolated network (the channel is not encrypted).
+"""
+import argparse
+import ipaddress
+import os
+import queue
+import threading
+import time
+import numpy as np
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional, Union
+
+EMBEDDING_SERVICE_ADDRESS = os.getenv("EMBEDDING_SERVICE_ADDRESS", "")
+EMBEDDING_SERVICE_DEFAULT_ADDRESS = os.path.join(os.path.expanduser("~"), ".wondereats", "embed.sock")
+EMBEDDING_SERVICE_ALLOW_REMOTE = os.getenv("EMBEDDING_SERVICE_ALLOW_REMOTE", "0").lower() in ("1", "true", "yes")
+# Client wait for a reply, and server wait for the next request on an idle connection
+EMBEDDING_SERVICE_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT_S", "30"))
+EMBEDDING_SERVICE_IDLE_S = float(os.getenv("EMBEDDING_SERVICE_IDLE_S", "300"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "128"))
+# Request asking for the service's model name; any other request is a list of texts
+MODEL_NAME_REQUEST = "model_name"
+
+
+def service_authkey(authkey: Optional[bytes] = None) -> bytes:
+    """The shared secret (EMBEDDING_SERVICE_AUTHKEY); there is deliberately no default"""
+    authkey = authkey or os.getenv("EMBEDDING_SERVICE_AUTHKEY", "").encode()
+    if not authkey:
+        raise RuntimeError("EMBEDDING_SERVICE_AUTHKEY must be set (a long random secret shared by "
+                           "the embedding service and the API workers)")
+    return authkey
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address: str, allow_remote: bool = EMBEDDING_SERVICE_ALLOW_REMOTE):
+    """
+    'host:port' -> (host, port) for TCP; anything else is a Unix socket path.
+    Non-loopback hosts are rejected unless allow_remote.
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        if not allow_remote and not _is_loopback(host):
+            raise ValueError(f"Embedding service address {address} is not loopback; set "
+                             f"EMBEDDING_SERVICE_ALLOW_REMOTE=1 only on an isolated network")
+        return host.strip("[]"), int(port)
+    return address
+
+
+def _prepare_socket_dir(path: str):
+    """Create the socket's directory private to this user if it does not exist yet"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+
+
+class EmbeddingServer:
+    """Owns the model; micro-batches encode requests from all connections"""
+
+    def __init__(
+        self,
+        model,
+        address: str,
+        model_name: str,
+        authkey: Optional[bytes] = None,
+        batch_window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+        idle_timeout_s: float = EMBEDDING_SERVICE_IDLE_S
+    ):
+        self.model = model
+        self.model_name = model_name
+        self.address = parse_address(address)
+        self.authkey = service_authkey(authkey)
+        self.idle_timeout_s = idle_timeout_s
+        self.batch_window_s = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self._requests = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+
+    def _listen(self) -> Listener:
+        if not isinstance(self.address, str):
+            return Listener(self.address, authkey=self.authkey)
+        _prepare_socket_dir(self.address)
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket from a previous run
+        # Bind with a restrictive umask so the socket is never reachable by others, even briefly
+        previous = os.umask(0o177)
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            os.umask(previous)
+        os.chmod(self.address, 0o600)
+        return listener
+
+    def serve_forever(self):
+        listener = self._listen()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        with listener:
+            print(f"Embedding service listening on {self.address}")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._connection_loop, args=(conn,), daemon=True).start()
+
+    def _connection_loop(self, conn):
+        """
+        One outstanding request per connection; the reply is sent by the
+        batcher. Connections idle for idle_timeout_s are closed (clients
+        reconnect on their next call).
+        """
+        try:
+            while conn.poll(self.idle_timeout_s):
+                request = conn.recv()
+                if request == MODEL_NAME_REQUEST:
+                    conn.send(("ok", self.model_name))  # nothing queued for this connection
+                else:
+                    self._requests.put((conn, request))
+        except (EOFError, OSError):
+            pass
+        conn.close()
+
+    def _batch_loop(self):
+        while True:
+            pending = [self._requests.get()]
+            size = len(pending[0][1])
+            deadline = time.monotonic() + self.batch_window_s
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[1])
+            self._encode_batch(pending)
+
+    def _encode_batch(self, pending):
+        texts = [text for _, request_texts in pending for text in request_texts]
+        try:
+            embeddings = np.asarray(self.model.encode(texts, batch_size=max(32, len(texts))), dtype=np.float32)
+            self.batches += 1
+            self.texts += len(texts)
+        except Exception as e:
+            embeddings, error = None, f"Embedding failed: {e}"
+
+        offset = 0
+        for conn, request_texts in pending:
+            if embeddings is None:
+                reply = ("error", error)
+            else:
+                reply = ("ok", embeddings[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+            try:
+                conn.send(reply)
+            except (EOFError, OSError):
+                pass  # client went away; its connection loop cleans up
+
+
+class EmbeddingClient:
+    """
+    Drop-in for SentenceTransformer.encode backed by the embedding service.
+
+    Thread-safe: each in-flight call uses its own pooled connection, so
+    concurrent requests from one worker are batched by the service as well.
+    Extra encode() keyword arguments are not forwarded.
+    """
+
+    def __init__(self, address: str = EMBEDDING_SERVICE_ADDRESS, authkey: Optional[bytes] = None,
+                 timeout_s: float = EMBEDDING_SERVICE_TIMEOUT_S):
+        self.address = parse_address(address or EMBEDDING_SERVICE_DEFAULT_ADDRESS)
+        self.authkey = service_authkey(authkey)
+        self.timeout_s = timeout_s
+        self._idle = []
+        self._lock = threading.Lock()
+        self._model_name: Optional[str] = None
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Client(self.address, authkey=self.authkey)
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    @property
+    def model_name(self) -> str:
+        """Model the service encodes with (asked once, then cached)"""
+        if self._model_name is None:
+            self._model_name = self._request(MODEL_NAME_REQUEST)
+        return self._model_name
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = self._request(texts)
+        return embeddings[0] if single else embeddings
+
+    def _request(self, request):
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.send(request)
+                replied = conn.poll(self.timeout_s)
+                if replied:
+                    status, payload = conn.recv()
+            except (EOFError, OSError):
+                # Service restarted: drop the stale connection and retry once
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            if not replied:
+                # A late reply would arrive on this connection, so it cannot be reused
+                conn.close()
+                raise TimeoutError(f"Embedding service did not reply within {self.timeout_s}s")
+            self._release(conn)
+            if status != "ok":
+                raise RuntimeError(payload)
+            return payload
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=EMBEDDING_SERVICE_ADDRESS or EMBEDDING_SERVICE_DEFAULT_ADDRESS)
+    parser.add_argument("--window-ms", type=float, default=EMBEDDING_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_MAX_BATCH)
+    args = parser.parse_args(argv)
+    service_authkey()  # fail before loading the model
+
+    from Backend.Services.recipe_embedder import load_sentence_transformer, EMBEDDING_MODEL_NAME
+    model = load_sentence_transformer(EMBEDDING_MODEL_NAME)
+    model.encode("warm up")
+    EmbeddingServer(model, args.address, EMBEDDING_MODEL_NAME, batch_window_ms=args.window_ms, max_batch=args.max_batch).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
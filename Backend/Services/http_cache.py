@@ -0,0 +1,175 @@
+"""
+On-disk cache for recipe provider responses
+
+Entries are content-addressed by the request: sha256 of the URL plus the
+normalized query parameters, with credentials left out so keys are stable
+across API keys. Each entry is one gzip'd JSON file holding the body and
+the validators (ETag / Last-Modified) used for conditional revalidation.
+
+HTTP_CACHE_MODE:
+    on       serve fresh entries, revalidate or fetch stale/missing ones (default)
+    refresh  always go to the network, then store
+    replay   serve only from the cache and never touch the network
+    off      no caching
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+HTTP_CACHE_DIR = os.getenv(
+    "HTTP_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), '../../http_cache')
+)
+HTTP_CACHE_TTL_S = float(os.getenv("HTTP_CACHE_TTL_S", str(7 * 24 * 3600)))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+HTTP_CACHE_MODES = ("on", "refresh", "replay", "off")
+
+
+class CacheMiss(Exception):
+    """Replay mode was asked for a request that is not cached"""
+
+
+class CachedResponse:
+    """The parts of an httpx.Response the importer uses"""
+
+    def __init__(self, status_code: int, body: str, from_cache: bool):
+        self.status_code = status_code
+        self.text = body
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def request_key(url: str, params: Dict, exclude: Iterable[str] = ()) -> str:
+    """Stable key for a GET: parameter order, value types and credentials do not matter"""
+    excluded = set(exclude)
+    normalized = sorted(
+        (str(name), str(value).lower() if isinstance(value, bool) else str(value))
+        for name, value in params.items()
+        if name not in excluded and value is not None
+    )
+    return hashlib.sha256(json.dumps([url, normalized]).encode()).hexdigest()
+
+
+class HttpCache:
+    def __init__(
+        self,
+        path: str = HTTP_CACHE_DIR,
+        ttl_s: float = HTTP_CACHE_TTL_S,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+        mode: Optional[str] = None
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.mode = (mode or os.getenv("HTTP_CACHE_MODE", "on")).lower()
+        if self.mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"Unknown HTTP_CACHE_MODE '{self.mode}'. Must be one of: {', '.join(HTTP_CACHE_MODES)}")
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.json.gz")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        try:
+            with gzip.open(self._file(key), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(self._file(key))  # mtime doubles as last-used time for eviction
+        return entry
+
+    def _store(self, key: str, entry: Dict):
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(f"{path}.tmp", path)
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is under max_bytes"""
+        files = []
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                if name.endswith(".json.gz"):
+                    stat = os.stat(os.path.join(root, name))
+                    files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.evictions += 1
+
+    async def get(self, client, url: str, params: Dict, secret_params: Iterable[str] = (), timeout: float = 30.0):
+        """
+        GET through the cache. Returns an httpx.Response-like object; raises
+        CacheMiss in replay mode and httpx errors for failed fetches.
+        """
+        if self.mode == "off":
+            response = await client.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return CachedResponse(response.status_code, response.text, from_cache=False)
+
+        key = request_key(url, params, secret_params)
+        entry = self._load(key)
+
+        if self.replay:
+            if entry is None:
+                self.misses += 1
+                raise CacheMiss(f"No cached response for {url} (key {key[:12]})")
+            self.hits += 1
+            return CachedResponse(entry["status_code"], entry["body"], from_cache=True)
+
+        if entry is not None and self.mode == "on" and time.time() - entry["fetched_at"] < self.ttl_s:
+            self.hits += 1
+            return CachedResponse(entry["status_code"], entry["body"], from_cache=True)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await client.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            entry["fetched_at"] = time.time()
+            self._store(key, entry)
+            return CachedResponse(entry["status_code"], entry["body"], from_cache=True)
+
+        response.raise_for_status()
+        self.misses += 1
+        self._store(key, {
+            "url": url,
+            "params": {name: value for name, value in params.items() if name not in set(secret_params)},
+            "status_code": response.status_code,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+            "body": response.text
+        })
+        return CachedResponse(response.status_code, response.text, from_cache=False)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions
+        }
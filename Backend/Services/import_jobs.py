@@ -0,0 +1,179 @@
+"""
+Background recipe import jobs
+
+POST /recipes/import submits a job and returns its id instead of running
+fetch -> MySQL -> embed inside the request. Jobs run as asyncio tasks behind
+a semaphore (IMPORT_MAX_CONCURRENT) so only a bounded number import at once.
+Blocking steps (MySQL writes, embedding) run in worker threads in chunks, so
+the event loop keeps serving plan and search requests between them, and
+cancellation is checked between chunks. Rows already written when a job is
+cancelled stay written (upserts make a re-run safe).
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+IMPORT_MAX_CONCURRENT = int(os.getenv("IMPORT_MAX_CONCURRENT", "1"))
+IMPORT_MAX_QUEUED = int(os.getenv("IMPORT_MAX_QUEUED", "10"))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "64"))
+IMPORT_JOB_HISTORY = 100
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class ImportQueueFull(Exception):
+    """Too many import jobs are already waiting"""
+
+
+class ImportJob:
+    def __init__(self, goal: str, cuisine: Optional[str], limit: int):
+        self.id = uuid.uuid4().hex
+        self.goal = goal
+        self.cuisine = cuisine
+        self.limit = limit
+        self.status = "queued"
+        self.phase = "queued"
+        self.fetched = 0
+        self.saved_mysql = 0
+        self.embedded = 0
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def progress(self) -> Dict:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "phase": self.phase,
+            "params": {"goal": self.goal, "cuisine": self.cuisine, "limit": self.limit},
+            "counts": {"fetched": self.fetched, "saved_mysql": self.saved_mysql, "embedded": self.embedded},
+            "recipes_per_s": round(self.embedded / elapsed, 1) if elapsed > 0 else 0.0,
+            "queued_s": round((self.started_at or time.time()) - self.submitted_at, 2),
+            "elapsed_s": round(elapsed, 2),
+            "error": self.error
+        }
+
+
+class ImportJobManager:
+    """Runs ImportJobs against a RecipeRepository with bounded concurrency"""
+
+    def __init__(self, repo, max_concurrent: int = IMPORT_MAX_CONCURRENT,
+                 max_queued: int = IMPORT_MAX_QUEUED, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.repo = repo
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.chunk_size = chunk_size
+        self.jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.submitted = 0
+        self.rejected = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def submit(self, goal: str, cuisine: Optional[str] = None, limit: int = 50) -> ImportJob:
+        queued = sum(1 for job in self.jobs.values() if job.status == "queued")
+        if queued >= self.max_queued:
+            self.rejected += 1
+            raise ImportQueueFull(f"{queued} import jobs already queued")
+
+        job = ImportJob(goal, cuisine, limit)
+        self.jobs[job.id] = job
+        self.submitted += 1
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        return [job.progress() for job in reversed(self.jobs.values())]
+
+    def cancel(self, job_id: str) -> Optional[ImportJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        # Awaiting the semaphore or the API fetch can be interrupted directly;
+        # a chunk running in a worker thread finishes first, then the job stops
+        if job.phase in ("queued", "fetching") and job.task is not None:
+            job.task.cancel()
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self.jobs) - IMPORT_JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    def _check_cancelled(self, job: ImportJob):
+        if job.cancel_requested:
+            raise asyncio.CancelledError()
+
+    async def _run(self, job: ImportJob):
+        try:
+            async with self.semaphore:
+                job.status = "running"
+                job.started_at = time.time()
+
+                job.phase = "fetching"
+                recipes = await self.repo.importer.fetch_recipes_by_goal(job.goal, job.cuisine, job.limit)
+                job.fetched = len(recipes)
+
+                job.phase = "saving_mysql"
+                for start in range(0, len(recipes), self.chunk_size):
+                    self._check_cancelled(job)
+                    chunk = recipes[start:start + self.chunk_size]
+                    job.saved_mysql += await asyncio.to_thread(self.repo.bulk_upsert_recipes, chunk, self.chunk_size)
+
+                job.phase = "embedding"
+                store = self.repo.vector_store
+                with store.deferred_saves():
+                    for start in range(0, len(recipes), self.chunk_size):
+                        self._check_cancelled(job)
+                        chunk = recipes[start:start + self.chunk_size]
+                        await asyncio.to_thread(self._embed_chunk, chunk)
+                        job.embedded += len(chunk)
+                    await asyncio.to_thread(store.flush)  # off the event loop
+
+                job.status = "completed"
+                job.phase = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _embed_chunk(self, recipes: List[Dict]):
+        store = self.repo.vector_store
+        _, documents, _ = store.embedding_rows(recipes)
+        store.add_embedded_recipes(recipes, store.embedding_model.encode(documents))
+        self.repo.ingredient_index.add_recipes(recipes)
+
+    def stats(self) -> Dict:
+        counts = {status: 0 for status in ("queued", "running") + FINISHED_STATUSES}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            **counts
+        }
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set
+
+INGREDIENT_INDEX_DIR = os.getenv(
+    "INGREDIENT_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), '../../vector_index/ingredients')
+)
+
+# Bits set per byte, for numpy builds without np.bitwise_count (< 2.0)
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+_NON_WORD = re.compile(r"[^a-z ]+")
+
+
+def normalize_ingredient(name: str) -> str:
+    """'Chicken Breasts, boneless' -> 'chicken breast boneless'"""
+    words = []
+    for word in _NON_WORD.sub(" ", (name or "").lower()).split():
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a uint64 bitmap matrix"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = words.view(np.uint8).reshape(words.shape[:-1] + (-1,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+class IngredientBitmapIndex:
+    """
+    Recipe ingredients as fixed-width bitmaps.
+
+    Each normalized ingredient name gets an integer ID at import time and a
+    recipe is one row of uint64 words with a bit per ingredient it uses.
+    Fridge coverage for a whole candidate set is then an AND plus popcount
+    over those rows instead of per-recipe string matching.
+    """
+
+    def __init__(self, path: str = INGREDIENT_INDEX_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    # ==================== PERSISTENCE ====================
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        vocab_path = self._file("ingredient_vocab.json")
+        if not os.path.exists(vocab_path):
+            self.vocab: List[str] = []
+            self.ids: List[str] = []
+            self.bitmaps = np.zeros((0, 1), dtype=np.uint64)
+        else:
+            with open(vocab_path) as f:
+                manifest = json.load(f)
+            self.vocab = manifest["vocab"]
+            self.ids = manifest["ids"]
+            self.bitmaps = np.load(self._file("bitmaps.npy"))
+        self._term_ids = {term: i for i, term in enumerate(self.vocab)}
+        self._row_by_id = {recipe_id: row for row, recipe_id in enumerate(self.ids)}
+        self._word_postings: Dict[str, Set[int]] = {}
+        for term_id, term in enumerate(self.vocab):
+            self._index_words(term_id, term)
+
+    def _save(self):
+        with open(self._file("bitmaps.npy.tmp"), "wb") as f:
+            np.save(f, self.bitmaps)
+        with open(self._file("ingredient_vocab.json.tmp"), "w") as f:
+            json.dump({"vocab": self.vocab, "ids": self.ids}, f)
+        # Vocab last so it never refers to bits the bitmaps lack
+        os.replace(self._file("bitmaps.npy.tmp"), self._file("bitmaps.npy"))
+        os.replace(self._file("ingredient_vocab.json.tmp"), self._file("ingredient_vocab.json"))
+
+    def _index_words(self, term_id: int, term: str):
+        for word in term.split():
+            self._word_postings.setdefault(word, set()).add(term_id)
+
+    # ==================== WRITES ====================
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = len(self.vocab)
+            self.vocab.append(term)
+            self._term_ids[term] = term_id
+            self._index_words(term_id, term)
+        return term_id
+
+    def _bitmap(self, term_ids: Iterable[int], words: int) -> np.ndarray:
+        bitmap = np.zeros(words, dtype=np.uint64)
+        for term_id in term_ids:
+            bitmap[term_id // 64] |= np.uint64(1) << np.uint64(term_id % 64)
+        return bitmap
+
+    def add_recipes(self, recipes: List[Dict]):
+        """Assign ingredient IDs and (re)write the bitmap row of each recipe"""
+        with self._lock:
+            rows = []
+            for recipe in recipes:
+                terms = {normalize_ingredient(name) for name in recipe.get("ingredients") or []}
+                rows.append((recipe["id"], [self._term_id(term) for term in terms if term]))
+
+            words = max(1, (len(self.vocab) + 63) // 64)
+            if words > self.bitmaps.shape[1]:
+                grown = np.zeros((len(self.ids), words), dtype=np.uint64)
+                grown[:, :self.bitmaps.shape[1]] = self.bitmaps
+                self.bitmaps = grown
+
+            new_rows = []
+            for recipe_id, term_ids in rows:
+                bitmap = self._bitmap(term_ids, self.bitmaps.shape[1])
+                row = self._row_by_id.get(recipe_id)
+                if row is None:
+                    self._row_by_id[recipe_id] = len(self.ids)
+                    self.ids.append(recipe_id)
+                    new_rows.append(bitmap)
+                else:
+                    self.bitmaps[row] = bitmap
+            if new_rows:
+                self.bitmaps = np.vstack([self.bitmaps, np.stack(new_rows)])
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self.vocab, self.ids = [], []
+            self.bitmaps = np.zeros((0, 1), dtype=np.uint64)
+            self._term_ids, self._row_by_id, self._word_postings = {}, {}, {}
+            self._save()
+
+    # ==================== READS ====================
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def term_ids_for(self, item: str) -> Set[int]:
+        """
+        Ingredient IDs an on-hand item stands for: the exact normalized name,
+        else every ingredient containing all its words ('chicken' covers
+        'chicken breast' and 'chicken thigh').
+        """
+        term = normalize_ingredient(item)
+        if not term:
+            return set()
+        if term in self._term_ids:
+            return {self._term_ids[term]}
+        postings = [self._word_postings.get(word, set()) for word in term.split()]
+        return set.intersection(*postings) if postings else set()
+
+    def fridge_bitmap(self, items: List[str]) -> np.ndarray:
+        term_ids = set()
+        for item in items:
+            term_ids |= self.term_ids_for(item)
+        return self._bitmap(term_ids, self.bitmaps.shape[1])
+
+    def coverage(self, recipe_ids: List[str], items: List[str]) -> np.ndarray:
+        """
+        Fraction of each recipe's ingredients that are on hand (0 for recipes
+        not in the index), computed for all candidates at once.
+        """
+        with self._lock:
+            scores = np.zeros(len(recipe_ids), dtype=np.float32)
+            rows = np.array([self._row_by_id.get(recipe_id, -1) for recipe_id in recipe_ids], dtype=np.int64)
+            known = rows >= 0
+            if not items or not known.any():
+                return scores
+            candidate_bitmaps = self.bitmaps[rows[known]]
+            on_hand = popcount(candidate_bitmaps & self.fridge_bitmap(items))
+            totals = popcount(candidate_bitmaps)
+            scores[known] = on_hand / np.maximum(totals, 1)
+            return scores
+
+
+_ingredient_index: Optional[IngredientBitmapIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index() -> IngredientBitmapIndex:
+    """Process-wide ingredient index, loaded on first use"""
+    global _ingredient_index
+    if _ingredient_index is None:
+        with _index_lock:
+            if _ingredient_index is None:
+                _ingredient_index = IngredientBitmapIndex()
+    return _ingredient_index
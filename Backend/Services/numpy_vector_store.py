@@ -0,0 +1,524 @@
+import os
+import json
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+from Backend.Services.recipe_embedder import RecipeVectorStore, embedding_version_metadata, producing_model_name
+from Backend.Services.recipe_filters import build_cuisine_filter
+from Backend.Services.diversity import mmr_rerank, MMR_FETCH_MULTIPLIER
+
+INDEX_DIR = os.getenv(
+    "NUMPY_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), '../../vector_index')
+)
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+# Inside deferred_saves(), metadata is persisted after this many written rows
+# (and when the block exits) instead of after every upsert
+NUMPY_SAVE_EVERY_ROWS = int(os.getenv("NUMPY_SAVE_EVERY_ROWS", "50000"))
+
+
+class NumpyVectorIndex:
+    """
+    Exact in-process vector index.
+
+    Embeddings live in a memory-mapped float16 matrix (one row per recipe);
+    metadata is kept column-wise (float32 macros, integer cuisine/source codes,
+    a boolean tag matrix) so filters evaluate as vectorized masks. Search is an
+    exact dot product over the (pre-filtered) rows followed by argpartition.
+
+    Columns are views into buffers that double when full, so appending a
+    batch does not copy the catalog. Each upsert persists the metadata
+    unless it runs inside deferred_saves(); call flush() to persist earlier.
+    """
+    NUMERIC_COLUMNS = ("calories", "protein", "carbs", "fat")
+    CATEGORICAL_COLUMNS = ("cuisine", "source")
+    SCAN_CHUNK_ROWS = 16384  # rows converted to float32 at a time
+
+    def __init__(self, path: str = INDEX_DIR, dim: int = EMBEDDING_DIM):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._deferred = 0
+        self.unsaved_rows = 0
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    # ==================== PERSISTENCE ====================
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        manifest_path = self._file("manifest.json")
+        if not os.path.exists(manifest_path):
+            self._reset_in_memory()
+            return
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        self.count = manifest["count"]
+        self.capacity = manifest["capacity"]
+        self.ids = manifest["ids"]
+        self.names = manifest["names"]
+        self.vocab = manifest["vocab"]
+        self.tag_vocab = manifest["tag_vocab"]
+        with open(self._file("documents.json")) as f:
+            self.documents = np.array(json.load(f), dtype=str)
+
+        columns = np.load(self._file("columns.npz"))
+        self.numeric = {name: columns[name] for name in self.NUMERIC_COLUMNS}
+        self.codes = {name: columns[f"{name}_code"] for name in self.CATEGORICAL_COLUMNS}
+        self.tag_matrix = columns["tags"]
+
+        self._adopt_columns(self.count)
+        self._row_by_id = {recipe_id: row for row, recipe_id in enumerate(self.ids)}
+        self._matrix = np.memmap(
+            self._file("embeddings.f16"), dtype=np.float16, mode="r+",
+            shape=(self.capacity, self.dim)
+        )
+
+    def _reset_in_memory(self):
+        self.count = 0
+        self.capacity = 0
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.vocab: Dict[str, List[str]] = {name: [] for name in self.CATEGORICAL_COLUMNS}
+        self.tag_vocab: List[str] = []
+        self.documents = np.array([], dtype=str)
+        self.numeric = {name: np.zeros(0, dtype=np.float32) for name in self.NUMERIC_COLUMNS}
+        self.codes = {name: np.zeros(0, dtype=np.int32) for name in self.CATEGORICAL_COLUMNS}
+        self.tag_matrix = np.zeros((0, 0), dtype=bool)
+        self._adopt_columns(0)
+        self._row_by_id: Dict[str, int] = {}
+        self._matrix = None
+
+    def _save(self):
+        """Persist metadata atomically; embeddings are flushed in place"""
+        self.unsaved_rows = 0
+        if self._matrix is not None:
+            self._matrix.flush()
+
+        columns = {name: self.numeric[name] for name in self.NUMERIC_COLUMNS}
+        columns.update({f"{name}_code": self.codes[name] for name in self.CATEGORICAL_COLUMNS})
+        columns["tags"] = self.tag_matrix
+        with open(self._file("columns.npz.tmp"), "wb") as f:
+            np.savez(f, **columns)
+
+        with open(self._file("documents.json.tmp"), "w") as f:
+            json.dump(self.documents.tolist(), f)
+
+        with open(self._file("manifest.json.tmp"), "w") as f:
+            json.dump({
+                "count": self.count,
+                "capacity": self.capacity,
+                "dim": self.dim,
+                "ids": self.ids,
+                "names": self.names,
+                "vocab": self.vocab,
+                "tag_vocab": self.tag_vocab
+            }, f)
+
+        # Manifest last so a crash never points at half-written columns
+        os.replace(self._file("columns.npz.tmp"), self._file("columns.npz"))
+        os.replace(self._file("documents.json.tmp"), self._file("documents.json"))
+        os.replace(self._file("manifest.json.tmp"), self._file("manifest.json"))
+
+    def flush(self):
+        """Persist rows written since the last save"""
+        with self._lock:
+            if self.unsaved_rows:
+                self._save()
+
+    @contextmanager
+    def deferred_saves(self):
+        """Bulk-load block: save every NUMPY_SAVE_EVERY_ROWS rows and on exit"""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                self.flush()
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self.capacity:
+            return
+        new_capacity = max(rows, self.capacity * 2, 1024)
+        tmp_path = self._file("embeddings.f16.tmp")
+        grown = np.memmap(tmp_path, dtype=np.float16, mode="w+", shape=(new_capacity, self.dim))
+        if self._matrix is not None and self.count:
+            grown[:self.count] = self._matrix[:self.count]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp_path, self._file("embeddings.f16"))
+        self._matrix = np.memmap(
+            self._file("embeddings.f16"), dtype=np.float16, mode="r+",
+            shape=(new_capacity, self.dim)
+        )
+        self.capacity = new_capacity
+
+    # ==================== COLUMN BUFFERS ====================
+
+    def _column_views(self) -> Dict[str, np.ndarray]:
+        columns = {f"numeric.{name}": self.numeric[name] for name in self.NUMERIC_COLUMNS}
+        columns.update({f"codes.{name}": self.codes[name] for name in self.CATEGORICAL_COLUMNS})
+        columns["documents"] = self.documents
+        columns["tags"] = self.tag_matrix.reshape(self.count, len(self.tag_vocab))
+        return columns
+
+    def _adopt_columns(self, rows: int):
+        """Use the current (exactly sized) columns as the buffers"""
+        self._buffers = self._column_views()
+        self._column_capacity = rows
+
+    def _slice_columns(self, rows: int):
+        for name in self.NUMERIC_COLUMNS:
+            self.numeric[name] = self._buffers[f"numeric.{name}"][:rows]
+        for name in self.CATEGORICAL_COLUMNS:
+            self.codes[name] = self._buffers[f"codes.{name}"][:rows]
+        self.documents = self._buffers["documents"][:rows]
+        self.tag_matrix = self._buffers["tags"][:rows]
+
+    def _grow_columns(self, rows: int):
+        """Extend every column to rows (new rows zeroed), doubling the buffers when full"""
+        if rows > self._column_capacity:
+            capacity = max(rows, self._column_capacity * 2, 1024)
+            for key, column in self._column_views().items():
+                buffer = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+                buffer[:self.count] = column
+                self._buffers[key] = buffer
+            self._column_capacity = capacity
+        self._slice_columns(rows)
+
+    def _widen_documents(self, width: int):
+        """Widen the fixed-width document buffer (only when a longer document arrives)"""
+        if width > self._buffers["documents"].dtype.itemsize // 4:
+            self._buffers["documents"] = self._buffers["documents"].astype(f"<U{width}")
+            self.documents = self._buffers["documents"][:self.count]
+
+    def _add_tag_column(self):
+        tags = self._buffers["tags"]
+        self._buffers["tags"] = np.hstack([tags, np.zeros((tags.shape[0], 1), dtype=bool)])
+        self.tag_matrix = self._buffers["tags"][:self.count]
+
+    # ==================== WRITES ====================
+
+    def _code(self, column: str, value: str) -> int:
+        values = self.vocab[column]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def upsert(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict], documents: List[str]):
+        """Insert or overwrite rows (embeddings are L2-normalized before storing)"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            new_ids = [recipe_id for recipe_id in dict.fromkeys(ids) if recipe_id not in self._row_by_id]
+            for recipe_id in new_ids:
+                self._row_by_id[recipe_id] = len(self.ids)
+                self.ids.append(recipe_id)
+                self.names.append("")
+            total = len(self.ids)
+
+            self._ensure_capacity(total)
+            self._grow_columns(total)
+            self.count = total
+
+            rows = np.array([self._row_by_id[recipe_id] for recipe_id in ids], dtype=np.int64)
+            self._matrix[rows] = embeddings.astype(np.float16)
+
+            # Only the written rows are lower-cased and stored
+            documents_lower = [document.lower() for document in documents]
+            self._widen_documents(max(map(len, documents_lower), default=0))
+            for row, metadata, document in zip(rows, metadatas, documents_lower):
+                self.names[row] = metadata.get("name", "")
+                for name in self.NUMERIC_COLUMNS:
+                    self.numeric[name][row] = float(metadata.get(name, 0) or 0)
+                for name in self.CATEGORICAL_COLUMNS:
+                    self.codes[name][row] = self._code(name, metadata.get(name, "") or "")
+                self._set_tags(row, [t for t in (metadata.get("tags") or "").split(",") if t])
+                self.documents[row] = document
+
+            self.unsaved_rows += len(ids)
+            if not self._deferred or self.unsaved_rows >= NUMPY_SAVE_EVERY_ROWS:
+                self._save()
+
+    def _set_tags(self, row: int, tags: List[str]):
+        for tag in tags:
+            if tag not in self.tag_vocab:
+                self.tag_vocab.append(tag)
+                self._add_tag_column()
+        self.tag_matrix[row, :] = False
+        for tag in tags:
+            self.tag_matrix[row, self.tag_vocab.index(tag)] = True
+
+    def clear(self):
+        with self._lock:
+            for name in ("manifest.json", "columns.npz", "documents.json", "embeddings.f16"):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self._reset_in_memory()
+            self.unsaved_rows = 0
+
+    # ==================== READS ====================
+
+    def metadata(self, row: int) -> Dict:
+        """Rebuild the Chroma-style metadata dict for a row"""
+        metadata = {
+            "recipe_id": self.ids[row],
+            "name": self.names[row],
+            "cuisine": self.vocab["cuisine"][self.codes["cuisine"][row]],
+            "source": self.vocab["source"][self.codes["source"][row]],
+            "tags": ",".join(tag for tag, on in zip(self.tag_vocab, self.tag_matrix[row]) if on)
+        }
+        for name in self.NUMERIC_COLUMNS:
+            metadata[name] = float(self.numeric[name][row])
+        return metadata
+
+    def embeddings(self, rows: np.ndarray) -> np.ndarray:
+        """float32 copy of the stored (normalized) embeddings for the given rows"""
+        return np.asarray(self._matrix[rows], dtype=np.float32)
+
+    def mask_for(self, where: Optional[Dict]) -> np.ndarray:
+        """
+        Evaluate a Chroma-style where clause as a boolean mask over all rows.
+
+        Supports $and/$or and $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin on the
+        numeric (calories, protein, carbs, fat) and categorical (cuisine, source)
+        columns, in any combination.
+        """
+        if not where:
+            return np.ones(self.count, dtype=bool)
+
+        mask = np.ones(self.count, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.mask_for(clause)
+            elif key == "$or":
+                any_mask = np.zeros(self.count, dtype=bool)
+                for clause in condition:
+                    any_mask |= self.mask_for(clause)
+                mask &= any_mask
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    mask &= self._column_mask(key, op, value)
+        return mask
+
+    def _column_mask(self, column: str, op: str, value) -> np.ndarray:
+        if column in self.NUMERIC_COLUMNS:
+            values = self.numeric[column]
+        elif column in self.CATEGORICAL_COLUMNS:
+            # Compare integer codes; unknown values match nothing
+            vocab = self.vocab[column]
+            values = self.codes[column]
+            if op in ("$in", "$nin"):
+                value = [vocab.index(v) if v in vocab else -1 for v in value]
+            else:
+                value = vocab.index(value) if value in vocab else -1
+        else:
+            raise ValueError(f"Unsupported filter column '{column}'")
+
+        if op == "$eq":
+            return values == value
+        if op == "$ne":
+            return values != value
+        if op == "$gt":
+            return values > value
+        if op == "$gte":
+            return values >= value
+        if op == "$lt":
+            return values < value
+        if op == "$lte":
+            return values <= value
+        if op == "$in":
+            return np.isin(values, value)
+        if op == "$nin":
+            return ~np.isin(values, value)
+        raise ValueError(f"Unsupported filter operator '{op}'")
+
+    def tag_mask(self, required: Optional[List[str]] = None, excluded: Optional[List[str]] = None) -> np.ndarray:
+        """Mask of rows carrying every required tag and none of the excluded ones"""
+        mask = np.ones(self.count, dtype=bool)
+        columns = {tag.lower(): i for i, tag in enumerate(self.tag_vocab)}
+        for tag in required or []:
+            column = columns.get(tag.lower())
+            if column is None:
+                return np.zeros(self.count, dtype=bool)
+            mask &= self.tag_matrix[:, column]
+        for tag in excluded or []:
+            column = columns.get(tag.lower())
+            if column is not None:
+                mask &= ~self.tag_matrix[:, column]
+        return mask
+
+    def exclude_terms_mask(self, terms: List[str]) -> np.ndarray:
+        """Mask of rows whose document text contains none of the terms"""
+        mask = np.ones(self.count, dtype=bool)
+        for term in terms:
+            mask &= np.char.find(self.documents, term.lower()) < 0
+        return mask
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+        boost: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k by cosine similarity over the rows allowed by mask.
+
+        boost (one value per row) is added to the similarity before ranking,
+        e.g. +2 for preferred-cuisine rows ranks them ahead of all others.
+        Returns (rows, scores) sorted by descending boosted score.
+        """
+        with self._lock:
+            if self.count == 0 or k <= 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+            query = np.asarray(query, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            rows = np.arange(self.count) if mask is None else np.flatnonzero(mask[:self.count])
+            if rows.size == 0:
+                return rows, np.zeros(0, dtype=np.float32)
+
+            scores = np.empty(rows.size, dtype=np.float32)
+            contiguous = mask is None
+            for start in range(0, rows.size, self.SCAN_CHUNK_ROWS):
+                stop = min(start + self.SCAN_CHUNK_ROWS, rows.size)
+                block = self._matrix[start:stop] if contiguous else self._matrix[rows[start:stop]]
+                scores[start:stop] = np.asarray(block, dtype=np.float32) @ query
+            if boost is not None:
+                scores += boost[rows]
+
+            k = min(k, rows.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return rows[top], scores[top]
+
+
+class NumpyRecipeVectorStore(RecipeVectorStore):
+    """RecipeVectorStore backed by NumpyVectorIndex instead of ChromaDB"""
+
+    def __init__(self, path: str = INDEX_DIR):
+        super().__init__()
+        self.path = path
+        self._index = None
+
+    @property
+    def index(self) -> NumpyVectorIndex:
+        if self._index is None:
+            self._index = NumpyVectorIndex(self.path)
+            print(f"✅ NumPy vector index loaded. Current recipe count: {self._index.count}")
+        return self._index
+
+    def warm_up(self):
+        self.embedding_model.encode("warm up")
+        _ = self.index
+
+    def readiness(self) -> Dict[str, bool]:
+        status = super().readiness()
+        status["vector_store"] = self._index is not None
+        return status
+
+    def is_empty(self) -> bool:
+        return self.index.count == 0
+
+    def get_recipe_count(self) -> int:
+        return self.index.count
+
+    def add_recipes(self, recipes: List[Dict]):
+        """Add (or overwrite) recipes in the in-process index"""
+        if not recipes:
+            print("No recipes to add")
+            return
+
+        print(f"Embedding {len(recipes)} recipes...")
+        documents = [self._create_embedding_text(recipe) for recipe in recipes]
+        embeddings = self.embedding_model.encode(documents)
+        self.index.upsert(
+            ids=[recipe["id"] for recipe in recipes],
+            embeddings=embeddings,
+            metadatas=[self._recipe_metadata(recipe) for recipe in recipes],
+            documents=documents
+        )
+        print(f"✅ Added {len(recipes)} recipes to vector database")
+
+    def add_embedded_recipes(self, recipes: List[Dict], embeddings):
+        ids, documents, metadatas = self.embedding_rows(recipes)
+        self.index.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def deferred_saves(self):
+        return self.index.deferred_saves()
+
+    def flush(self):
+        self.index.flush()
+
+    def unsaved_rows(self) -> int:
+        return self.index.unsaved_rows
+
+    def embedding_version(self) -> Dict:
+        return embedding_version_metadata(producing_model_name())
+
+    def get_embeddings(self, recipe_ids: List[str]) -> Dict[str, np.ndarray]:
+        known = [recipe_id for recipe_id in recipe_ids if recipe_id in self.index._row_by_id]
+        rows = np.array([self.index._row_by_id[recipe_id] for recipe_id in known], dtype=np.int64)
+        return dict(zip(known, self.index.embeddings(rows))) if known else {}
+
+    def search_by_goals_and_taste(
+        self,
+        goal: str,
+        preferences: Optional[List[str]] = None,
+        allergies: Optional[List[str]] = None,
+        n_results: int = 15,
+        required_tags: Optional[List[str]] = None,
+        excluded_tags: Optional[List[str]] = None,
+        diversity: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Same contract as RecipeVectorStore, but filters are applied before
+        ranking, so up to n_results compliant recipes come back in one pass.
+
+        Macro bounds, allergies and tags are hard masks; preferred cuisines
+        are a boost, so they rank first and other cuisines fill the rest.
+        """
+        index = self.index
+        if index.count == 0:
+            print("⚠️  Vector database is empty. Run seed script first.")
+            return []
+
+        query_text = self._build_query_text(goal, preferences or [])
+        query_embedding = self.embedding_model.encode(query_text)
+
+        mask = index.mask_for(self._build_nutrition_filters(goal))
+        if allergies:
+            mask &= index.exclude_terms_mask(allergies)
+        if required_tags or excluded_tags:
+            mask &= index.tag_mask(required_tags, excluded_tags)
+
+        cuisine_filter = build_cuisine_filter(preferences)
+        boost = index.mask_for(cuisine_filter) * np.float32(2.0) if cuisine_filter else None
+
+        if diversity is None:
+            rows, _ = index.search(query_embedding, n_results, mask, boost)
+        else:
+            # Over-fetch, then MMR over the candidates' stored embeddings
+            rows, scores = index.search(query_embedding, n_results * MMR_FETCH_MULTIPLIER, mask, boost)
+            order = mmr_rerank(query_embedding, index.embeddings(rows), n_results, diversity, scores)
+            rows = rows[order]
+        return [index.metadata(row) for row in rows]
+
+    def clear_all(self):
+        """Clear all recipes from the index (use with caution!)"""
+        self.index.clear()
+        print("✅ Vector database cleared")
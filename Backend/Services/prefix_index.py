@@ -0,0 +1,300 @@
+import bisect
+import re
+import threading
+import unicodedata
+import numpy as np
+from typing import Dict, Iterable, List
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Terms indexed per recipe: the name from each word on ("chicken tikka masala",
+# "tikka masala", "masala") and each ingredient the same way
+MAX_NAME_WORDS = 8
+MAX_INGREDIENTS = 20
+MAX_TERM_LENGTH = 64
+
+# Tie-breakers under popularity_score (an integer): name prefix > name word > ingredient
+NAME_BONUS = 0.5
+NAME_WORD_BONUS = 0.25
+INGREDIENT_BONUS = 0.0
+
+# Entries per block for the block maxima that bound broad prefix ranges
+BLOCK_SIZE = 256
+
+# Ranges up to this many entries are ranked with one partial sort, taking
+# OVERFETCH x limit candidates before dropping repeats of the same recipe
+DIRECT_RANGE = 65536
+OVERFETCH = 8
+# Blocks partially sorted up front when walking a broad range
+HEAD_BLOCKS = 64
+
+# Prefixes this short match much of the catalog; their results are memoized
+CACHED_PREFIX_LENGTH = 2
+
+
+def normalize_text(text: str) -> str:
+    """'Crème Brûlée (Easy!)' -> 'creme brulee easy'"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_NON_ALNUM.sub(" ", text.lower()).split())
+
+
+def _suffixes(words: List[str]) -> List[str]:
+    return [" ".join(words[i:])[:MAX_TERM_LENGTH] for i in range(len(words))]
+
+
+def recipe_terms(name: str, ingredients: Iterable[str]) -> Dict[str, float]:
+    """Indexed term -> bonus for one recipe"""
+    terms: Dict[str, float] = {}
+    for ingredient in list(ingredients or [])[:MAX_INGREDIENTS]:
+        for term in _suffixes(normalize_text(ingredient).split()):
+            terms.setdefault(term, INGREDIENT_BONUS)
+    words = normalize_text(name).split()[:MAX_NAME_WORDS]
+    for i, term in enumerate(_suffixes(words)):
+        terms[term] = NAME_BONUS if i == 0 else max(NAME_WORD_BONUS, terms.get(term, 0.0))
+    return terms
+
+
+class _Entries:
+    """
+    Sorted (term, doc) entries as parallel arrays with each entry's score
+    (popularity + bonus, -inf once its recipe is replaced) and the maximum
+    score of every BLOCK_SIZE entries. Replaced whole by updates; only
+    popularity bumps adjust scores in place.
+    """
+
+    def __init__(self, terms: List[str], docs: np.ndarray, bonus: np.ndarray,
+                 popularity: np.ndarray, alive: np.ndarray):
+        self.terms = terms
+        self.docs = docs
+        self.bonus = bonus
+        self.scores = np.where(alive[docs], popularity[docs] + bonus, -np.inf)
+        padded = np.full(-(-len(docs) // BLOCK_SIZE) * BLOCK_SIZE, -np.inf)
+        padded[:len(docs)] = self.scores
+        self.block_max = padded.reshape(-1, BLOCK_SIZE).max(axis=1, initial=-np.inf)
+
+
+class PrefixIndex:
+    """
+    In-memory typeahead over recipe names and ingredients.
+
+    Every indexed term is kept in one sorted list, so the terms starting with
+    a prefix are the contiguous range [bisect_left(q), bisect_left(q + '\\uffff')).
+    Narrow ranges are ranked with a partial sort. For broad ones (a one- or two-letter
+    prefix can cover most of the catalog) blocks are visited in order of their
+    maximum score and the walk stops once no remaining block can beat the
+    current top results, so only a few blocks are ever scored. Updates build
+    new arrays and swap them in; readers never take a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._doc_of: Dict[str, int] = {}
+        self._doc_terms: List[tuple] = []
+        self._popularity = np.zeros(0, dtype=np.float64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._entries = _Entries([], np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32),
+                                 self._popularity, self._alive)
+        self._dead_entries = 0
+        self._cache: Dict[tuple, List[Dict]] = {}
+        self.built = False
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._entries.terms)
+
+    # ==================== UPDATES ====================
+
+    def _new_docs(self, recipes: List[Dict]) -> List[tuple]:
+        """Assign doc numbers (replacing earlier versions); returns sorted (term, doc, bonus) entries"""
+        entries = []
+        popularity = []
+        for recipe in {recipe["id"]: recipe for recipe in recipes}.values():
+            previous = self._doc_of.get(recipe["id"])
+            score = recipe.get("popularity_score") or 0
+            if previous is not None:
+                # Upserts keep the stored popularity (see bulk_upsert_recipes)
+                score = self._popularity[previous]
+                self._alive[previous] = False
+                self._dead_entries += len(self._doc_terms[previous])
+            doc = len(self._ids)
+            self._ids.append(recipe["id"])
+            self._names.append(recipe.get("name", ""))
+            self._doc_of[recipe["id"]] = doc
+            popularity.append(score)
+            terms = recipe_terms(recipe.get("name", ""), recipe.get("ingredients", []))
+            self._doc_terms.append(tuple(terms))
+            entries.extend((term, doc, bonus) for term, bonus in terms.items())
+        self._popularity = np.concatenate([self._popularity, np.asarray(popularity, dtype=np.float64)])
+        self._alive = np.concatenate([self._alive, np.ones(len(popularity), dtype=bool)])
+        entries.sort()
+        return entries
+
+    def build(self, recipes: Iterable[Dict]):
+        """Index a full catalog (rows with id, name, ingredients, popularity_score)"""
+        with self._lock:
+            self._ids, self._names, self._doc_of, self._doc_terms = [], [], {}, []
+            self._popularity = np.zeros(0, dtype=np.float64)
+            self._alive = np.zeros(0, dtype=bool)
+            self._dead_entries = 0
+            entries = self._new_docs(list(recipes))
+            self._entries = _Entries(
+                [term for term, _, _ in entries],
+                np.fromiter((doc for _, doc, _ in entries), dtype=np.int32, count=len(entries)),
+                np.fromiter((bonus for _, _, bonus in entries), dtype=np.float32, count=len(entries)),
+                self._popularity, self._alive
+            )
+            self._cache = {}
+            self.built = True
+
+    def add_recipes(self, recipes: List[Dict]):
+        """Insert or replace recipes (merged into the sorted arrays, O(n) per batch)"""
+        if not recipes:
+            return
+        with self._lock:
+            new = self._new_docs(recipes)
+            old = self._entries
+            positions = [bisect.bisect_left(old.terms, term) for term, _, _ in new]
+            terms: List[str] = []
+            start = 0
+            for position, (term, _, _) in zip(positions, new):
+                terms.extend(old.terms[start:position])
+                terms.append(term)
+                start = position
+            terms.extend(old.terms[start:])
+            docs = np.insert(old.docs, positions, [doc for _, doc, _ in new]).astype(np.int32, copy=False)
+            bonus = np.insert(old.bonus, positions, [bonus for _, _, bonus in new]).astype(np.float32, copy=False)
+            if self._dead_entries > len(terms) // 4:
+                keep = self._alive[docs]
+                terms = [term for term, live in zip(terms, keep) if live]
+                docs, bonus = docs[keep], bonus[keep]
+                self._dead_entries = 0
+            self._entries = _Entries(terms, docs, bonus, self._popularity, self._alive)
+            self._cache = {}
+
+    def bump_popularity(self, recipe_ids: Iterable[str], amount: float = 1.0):
+        """Mirror popularity_score increments (track_recipe_usage)"""
+        with self._lock:
+            entries = self._entries
+            for recipe_id in recipe_ids:
+                doc = self._doc_of.get(recipe_id)
+                if doc is None:
+                    continue
+                self._popularity[doc] += amount
+                for term in self._doc_terms[doc]:
+                    lo = bisect.bisect_left(entries.terms, term)
+                    hi = bisect.bisect_right(entries.terms, term, lo)
+                    for position in np.nonzero(entries.docs[lo:hi] == doc)[0] + lo:
+                        entries.scores[position] += amount
+                        block = position // BLOCK_SIZE
+                        entries.block_max[block] = max(entries.block_max[block], entries.scores[position])
+            self._cache = {}
+
+    # ==================== QUERIES ====================
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Recipes with a name or ingredient term starting with query, by popularity"""
+        prefix = normalize_text(query)
+        if not prefix or limit <= 0:
+            return []
+
+        cache_key = (prefix, limit)
+        cache = self._cache
+        if len(prefix) <= CACHED_PREFIX_LENGTH and cache_key in cache:
+            return cache[cache_key]
+
+        entries = self._entries
+        lo = bisect.bisect_left(entries.terms, prefix)
+        hi = bisect.bisect_left(entries.terms, prefix + "\uffff", lo)
+
+        best: Dict[int, tuple] = {}  # doc -> (score, entry position)
+        if hi - lo <= DIRECT_RANGE:
+            self._collect_top(entries, np.arange(lo, hi), limit, best)
+        else:
+            first, last = lo // BLOCK_SIZE, (hi - 1) // BLOCK_SIZE
+            block_max = entries.block_max[first:last + 1]
+            blocks = self._blocks_by_max(block_max)
+            # Seed with the best `limit` blocks in one partial sort, so the
+            # threshold is already high when the walk starts
+            seed = [int(block) for _, block in zip(range(limit), blocks)]
+            self._collect_top(entries, np.concatenate([
+                np.arange(max((first + block) * BLOCK_SIZE, lo), min((first + block + 1) * BLOCK_SIZE, hi))
+                for block in seed
+            ]), limit, best)
+            for block in blocks:
+                threshold = self._kth_score(best, limit)
+                if block_max[block] <= threshold:
+                    break  # no entry left in the range can beat the top results
+                start = (first + int(block)) * BLOCK_SIZE
+                self._collect(entries, max(start, lo), min(start + BLOCK_SIZE, hi), threshold, best)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1]))[:limit]
+        results = [{
+            "id": self._ids[doc],
+            "name": self._names[doc],
+            "popularity_score": int(self._popularity[doc]),
+            "match": entries.terms[position]
+        } for doc, (_, position) in ranked]
+
+        if len(prefix) <= CACHED_PREFIX_LENGTH:
+            cache[cache_key] = results
+        return results
+
+    def _collect_top(self, entries: _Entries, positions: np.ndarray, limit: int, best: Dict[int, tuple]):
+        """Partial sort of the entries at positions, widened if repeats of a recipe crowd out others"""
+        scores = entries.scores[positions]
+        take = min(len(scores), limit * OVERFETCH)
+        while True:
+            if take < len(scores):
+                candidates = np.argpartition(-scores, take - 1)[:take]
+            else:
+                candidates = np.arange(len(scores))
+            best.clear()
+            self._collect_positions(entries, positions[candidates[scores[candidates] > -np.inf]], best)
+            if len(best) >= limit or take == len(scores):
+                return
+            take = len(scores)
+
+    def _blocks_by_max(self, block_max: np.ndarray):
+        """Block numbers by descending maximum: the top few by partial sort, the rest only if needed"""
+        head = min(len(block_max), HEAD_BLOCKS)
+        top = np.argpartition(-block_max, head - 1)[:head] if head < len(block_max) else np.arange(head)
+        top = top[np.argsort(-block_max[top], kind="stable")]
+        yield from top
+        if head < len(block_max):
+            seen = set(top.tolist())
+            for block in np.argsort(-block_max, kind="stable"):
+                if int(block) not in seen:
+                    yield block
+
+    def _collect_positions(self, entries: _Entries, positions: np.ndarray, best: Dict[int, tuple]):
+        """Keep the best-scoring entry per recipe"""
+        for position in positions.tolist():
+            doc = int(entries.docs[position])
+            score = float(entries.scores[position])
+            if doc not in best or score > best[doc][0]:
+                best[doc] = (score, position)
+
+    def _collect(self, entries: _Entries, start: int, end: int, threshold: float, best: Dict[int, tuple]):
+        """Live entries of entries[start:end] that beat threshold (ties keep what was found first)"""
+        scores = entries.scores[start:end]
+        self._collect_positions(entries, np.nonzero(scores > threshold)[0] + start, best)
+
+    def _kth_score(self, best: Dict[int, tuple], k: int) -> float:
+        """Score a new entry must reach to matter (-inf until k recipes are found)"""
+        if len(best) < k:
+            return -np.inf
+        return sorted((score for score, _ in best.values()), reverse=True)[k - 1]
+
+    def stats(self) -> Dict:
+        return {
+            "recipes": len(self),
+            "entries": self.entry_count,
+            "dead_entries": self._dead_entries,
+            "built": self.built
+        }
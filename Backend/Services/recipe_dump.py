@@ -0,0 +1,91 @@
+"""
+Streaming reader for partner recipe dumps
+
+A dump is JSONL (optionally .gz): one recipe per line, either a raw
+Spoonacular recipe, an Edamam recipe or search hit ({"recipe": {...}}), or a
+recipe already in our normalized format. Lines are read one at a time and
+yielded with the byte offset just past them, so a caller can checkpoint after
+a batch is committed and resume from there without holding the file in memory.
+"""
+import gzip
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DUMP_SOURCES = ("auto", "spoonacular", "edamam", "normalized")
+
+
+def open_dump(path: str):
+    """Binary file object; for .gz, offsets are positions in the decompressed stream"""
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def dump_size(path: str) -> int:
+    return os.path.getsize(path)
+
+
+def iter_dump(path: str, offset: int = 0) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Yield (offset after the line, record) for each non-empty line starting at
+    offset. record is None for lines that are not a JSON object.
+    """
+    with open_dump(path) as f:
+        if offset:
+            f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            position = f.tell()
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield position, record if isinstance(record, dict) else None
+
+
+def _is_normalized(record: Dict) -> bool:
+    return "name" in record and isinstance(record.get("nutrition"), dict) and "calories" in record["nutrition"]
+
+
+def normalize_dump_record(importer, record: Dict, source: str = "auto") -> Optional[Dict]:
+    """Normalize one dump record with the RecipeImporter normalizers; None if it is not a usable recipe"""
+    if source not in DUMP_SOURCES:
+        raise ValueError(f"Unknown dump source '{source}'. Must be one of: {', '.join(DUMP_SOURCES)}")
+
+    if isinstance(record.get("recipe"), dict):
+        record = record["recipe"]  # Edamam search hit
+
+    try:
+        if source == "spoonacular":
+            recipe = importer._normalize_spoonacular(record)
+        elif source == "edamam":
+            recipe = importer._normalize_edamam(record)
+        elif source == "normalized" or (source == "auto" and _is_normalized(record)):
+            recipe = {
+                "source": "partner_dump",
+                "cuisine": "General",
+                "description": "",
+                "ingredients": [],
+                "instructions": "",
+                "tags": [],
+                **record
+            }
+        else:
+            normalized = importer._normalize_recipes([record])
+            recipe = normalized[0] if normalized else None
+    except (KeyError, TypeError, AttributeError, IndexError):
+        return None
+
+    if not recipe or not recipe.get("id") or not recipe.get("name"):
+        return None
+    recipe["id"] = str(recipe["id"])
+    return recipe
+
+
+def dedupe_batch(recipes: List[Dict]) -> List[Dict]:
+    """Last occurrence of each id wins (a vector store upsert rejects repeated ids)"""
+    return list({recipe["id"]: recipe for recipe in recipes}.values())
@@ -1,4 +1,7 @@
 import os
+import json
+import threading
+import time
 # CRITICAL: Disable onnxruntime BEFORE importing sentence_transformers AND chromadb
 # onnxruntime 1.23.2 is built for macOS 13.4+ and incompatible with macOS 13.2.1
 os.environ['DISABLE_ONNXRUNTIME_OPTIMIZATION'] = '1'
@@ -6,52 +9,245 @@ os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 # Tell ChromaDB to NOT use onnxruntime
 os.environ['CHROMA_ONNX_PROVIDER'] = 'none'
 
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
+import numpy as np
+from contextlib import nullcontext
 from typing import List, Dict, Optional
+from Backend.Services.diversity import mmr_rerank, MMR_FETCH_MULTIPLIER
+from Backend.Services.recipe_filters import build_macro_filter, build_cuisine_filter, combine_filters, matches_tags
+
+# sentence_transformers (torch) and chromadb are imported lazily below so that
+# importing the API does not pay for them before it can answer /health
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Bump whenever _create_embedding_text changes so stored vectors can be told apart
+EMBEDDING_TEXT_VERSION = 1
+CHROMA_DIR = os.path.join(os.path.dirname(__file__), '../../chroma_db')
+
+# HNSW index parameters for newly created collections (Chroma's defaults).
+# Existing collections keep the parameters they were built with; rebuild
+# with Backend/rebuildVectorCollection.py to change them.
+HNSW_SPACE = os.getenv("HNSW_SPACE", "l2")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "10"))
+
+# Name of the collection currently serving searches (switched by the rebuild tool)
+DEFAULT_COLLECTION = "recipes"
+ACTIVE_COLLECTION_FILE = os.path.join(CHROMA_DIR, 'active_collection.json')
+ALIAS_CHECK_INTERVAL_S = 5.0
+
+# Cached collection.count() lifetime (picks up writes from other processes)
+VECTOR_COUNT_TTL_S = float(os.getenv("VECTOR_COUNT_TTL_S", "30"))
+
+_load_lock = threading.Lock()
+_embedding_models: Dict[str, object] = {}
+_chroma_client = None
+
+
+def load_sentence_transformer(model_name: str = EMBEDDING_MODEL_NAME):
+    """Load the SentenceTransformer weights into this process"""
+    from sentence_transformers import SentenceTransformer
+    print(f"Loading embedding model {model_name}...")
+    # Force PyTorch backend only (no ONNX optimization)
+    return SentenceTransformer(
+        model_name,
+        device='cpu',
+        backend='torch'  # Explicitly use PyTorch backend
+    )
+
+
+def get_embedding_model(model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    Shared embedding model, loaded on first use (one copy per process and
+    model name), or a client of the embedding service when
+    EMBEDDING_SERVICE_ADDRESS is set (the service decides the model)
+    """
+    model = _embedding_models.get(model_name)
+    if model is None:
+        with _load_lock:
+            model = _embedding_models.get(model_name)
+            if model is None:
+                address = os.getenv("EMBEDDING_SERVICE_ADDRESS")
+                if address:
+                    from Backend.Services.embedding_service import EmbeddingClient
+                    print(f"Using embedding service at {address}")
+                    model = EmbeddingClient(address)
+                else:
+                    model = load_sentence_transformer(model_name)
+                _embedding_models[model_name] = model
+    return model
+
+
+def producing_model_name(model_name: str = EMBEDDING_MODEL_NAME) -> str:
+    """
+    Model whose vectors get_embedding_model(model_name) returns: the embedding
+    service's model when EMBEDDING_SERVICE_ADDRESS is set, model_name otherwise
+    """
+    if os.getenv("EMBEDDING_SERVICE_ADDRESS"):
+        return get_embedding_model(model_name).model_name
+    return model_name
+
+
+def embedding_version_metadata(model_name: str = EMBEDDING_MODEL_NAME, text_version: int = EMBEDDING_TEXT_VERSION) -> Dict:
+    """Collection metadata recording what produced the stored vectors"""
+    return {
+        "embedding_model": model_name,
+        "embedding_text_version": text_version
+    }
+
+
+def collection_embedding_version(collection) -> Dict:
+    """
+    embedding_version_metadata recorded on a collection; collections from
+    before versioning were built with the default model and template 1
+    """
+    metadata = collection.metadata or {}
+    return embedding_version_metadata(
+        metadata.get("embedding_model", "all-MiniLM-L6-v2"),
+        metadata.get("embedding_text_version", 1)
+    )
+
+
+def get_chroma_client():
+    """Open the shared persistent ChromaDB client on first use"""
+    global _chroma_client
+    if _chroma_client is None:
+        with _load_lock:
+            if _chroma_client is None:
+                import chromadb
+                from chromadb.config import Settings
+                os.makedirs(CHROMA_DIR, exist_ok=True)
+                # CRITICAL: Configure ChromaDB to NOT use onnxruntime
+                _chroma_client = chromadb.PersistentClient(
+                    path=CHROMA_DIR,
+                    settings=Settings(
+                        anonymized_telemetry=False,
+                        allow_reset=True
+                    )
+                )
+    return _chroma_client
+
+
+def hnsw_metadata(
+    space: str = HNSW_SPACE,
+    m: int = HNSW_M,
+    construction_ef: int = HNSW_CONSTRUCTION_EF,
+    search_ef: int = HNSW_SEARCH_EF
+) -> Dict:
+    """Collection metadata carrying the HNSW index parameters"""
+    return {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef
+    }
+
+
+def active_collection_name() -> str:
+    """Collection that searches should use"""
+    try:
+        with open(ACTIVE_COLLECTION_FILE) as f:
+            return json.load(f)["name"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return DEFAULT_COLLECTION
+
+
+def set_active_collection(name: str):
+    """Point searches at another collection (atomic; running workers follow within seconds)"""
+    os.makedirs(CHROMA_DIR, exist_ok=True)
+    previous = active_collection_name()
+    tmp_path = f"{ACTIVE_COLLECTION_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"name": name, "previous": previous, "activated_at": time.time()}, f)
+    os.replace(tmp_path, ACTIVE_COLLECTION_FILE)
+
+
+def previous_collection_name() -> Optional[str]:
+    """Collection that was active before the last switch (rollback target)"""
+    try:
+        with open(ACTIVE_COLLECTION_FILE) as f:
+            return json.load(f).get("previous")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_embedding_model_loaded() -> bool:
+    """Check whether an embedding model has been loaded in this process"""
+    return bool(_embedding_models)
+
 
 class RecipeVectorStore:
     """Manages recipe embeddings in ChromaDB using free embedding model"""
     
     def __init__(self):
-        # Initialize free embedding model (all-MiniLM-L6-v2 - fast and good quality)
-        print("Loading embedding model...")
-        # Force PyTorch backend only (no ONNX optimization)
-        self.embedding_model = SentenceTransformer(
-            'all-MiniLM-L6-v2',
-            device='cpu',
-            backend='torch'  # Explicitly use PyTorch backend
-        )
-        
-        # Initialize ChromaDB with persistent storage
-        chroma_dir = os.path.join(os.path.dirname(__file__), '../../chroma_db')
-        os.makedirs(chroma_dir, exist_ok=True)
+        # Model and ChromaDB are opened on first use (or by warm_up) so that
+        # constructing the store is cheap
+        self._collection = None
+        self._collection_name = None
+        self._collection_model = EMBEDDING_MODEL_NAME
+        self._alias_checked_at = 0.0
+        self._count: Optional[int] = None
+        self._counted_at = 0.0
+    
+    @property
+    def embedding_model(self):
+        """
+        Free embedding model (all-MiniLM-L6-v2 - fast and good quality); the
+        one recorded on the active collection, so queries match its vectors
+        """
+        return get_embedding_model(self._collection_model)
+    
+    @property
+    def chroma_client(self):
+        return get_chroma_client()
+    
+    @property
+    def collection(self):
+        """Active recipes collection, created on first access"""
+        now = time.monotonic()
+        if self._collection is None or now - self._alias_checked_at >= ALIAS_CHECK_INTERVAL_S:
+            self._alias_checked_at = now
+            name = active_collection_name()
+            if name != self._collection_name:
+                self._collection = None
+                self._collection_name = name
+                self._count = None
         
-        # CRITICAL: Configure ChromaDB to NOT use onnxruntime
-        self.chroma_client = chromadb.PersistentClient(
-            path=chroma_dir,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        if self._collection is None:
+            # CRITICAL: Set embedding_function=None to prevent ChromaDB from using
+            # its default ONNXMiniLM_L6_V2 which requires the broken onnxruntime
+            # We provide embeddings manually using our SentenceTransformer
+            self._collection = self.chroma_client.get_or_create_collection(
+                name=self._collection_name,
+                metadata={
+                    "description": "Recipe embeddings for meal planning",
+                    **hnsw_metadata(),
+                    **embedding_version_metadata(producing_model_name())
+                },
+                embedding_function=None  # Don't use ChromaDB's default ONNX embedder
             )
-        )
-        
-        # Create or get collection
-        # CRITICAL: Set embedding_function=None to prevent ChromaDB from using
-        # its default ONNXMiniLM_L6_V2 which requires the broken onnxruntime
-        # We provide embeddings manually using our SentenceTransformer
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="recipes",
-            metadata={"description": "Recipe embeddings for meal planning"},
-            embedding_function=None  # Don't use ChromaDB's default ONNX embedder
-        )
-        
-        print(f"✅ ChromaDB initialized. Current recipe count: {self.collection.count()}")
+            version = collection_embedding_version(self._collection)
+            self._collection_model = version["embedding_model"]
+            if version["embedding_text_version"] != EMBEDDING_TEXT_VERSION:
+                print(f"⚠️  Collection '{self._collection_name}' uses embedding text v{version['embedding_text_version']}, "
+                      f"code is v{EMBEDDING_TEXT_VERSION}; run Backend/reembedRecipes.py")
+            print(f"✅ ChromaDB collection '{self._collection_name}' initialized. Current recipe count: {self._collection.count()}")
+        return self._collection
+    
+    def warm_up(self):
+        """Open the collection and load its embedding model ahead of the first request"""
+        _ = self.collection
+        self.embedding_model.encode("warm up")
+    
+    def readiness(self) -> Dict[str, bool]:
+        """Report which heavy components are loaded, without loading them"""
+        return {
+            "embedding_model": is_embedding_model_loaded(),
+            "vector_store": self._collection is not None
+        }
     
     def is_empty(self) -> bool:
         """Check if vector database is empty"""
-        return self.collection.count() == 0
+        return self.get_recipe_count() == 0
     
     def add_recipes(self, recipes: List[Dict]):
         """Add recipes to vector database"""
@@ -61,44 +257,76 @@ class RecipeVectorStore:
         
         print(f"Embedding {len(recipes)} recipes...")
         
-        embeddings = []
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for recipe in recipes:
-            # Create rich text representation for embedding
-            text = self._create_embedding_text(recipe)
-            
-            # Generate embedding
-            embedding = self.embedding_model.encode(text).tolist()
-            
-            embeddings.append(embedding)
-            documents.append(text)
-            ids.append(recipe["id"])
-            
-            metadatas.append({
-                "recipe_id": recipe["id"],
-                "name": recipe["name"],
-                "cuisine": recipe["cuisine"],
-                "source": recipe["source"],
-                "calories": float(recipe["nutrition"]["calories"]),
-                "protein": float(recipe["nutrition"]["protein"]),
-                "carbs": float(recipe["nutrition"]["carbs"]),
-                "fat": float(recipe["nutrition"]["fat"]),
-                "tags": ",".join(recipe.get("tags", []))
-            })
+        collection = self.collection
+        ids, documents, metadatas = self.embedding_rows(recipes)
+        
+        # Generate embeddings in one batched forward pass
+        embeddings = self.embedding_model.encode(documents).tolist()
         
         # Add to ChromaDB
-        self.collection.add(
+        collection.add(
             embeddings=embeddings,
             documents=documents,
             metadatas=metadatas,
             ids=ids
         )
+        self._count = None
         
         print(f"✅ Added {len(recipes)} recipes to vector database")
     
+    def add_embedded_recipes(self, recipes: List[Dict], embeddings):
+        """Upsert recipes whose embeddings were computed elsewhere (e.g. a snapshot)"""
+        ids, documents, metadatas = self.embedding_rows(recipes)
+        self.collection.upsert(
+            embeddings=[list(map(float, vector)) for vector in embeddings],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+        self._count = None
+    
+    def deferred_saves(self):
+        """Bulk-load block in which writes may be persisted lazily (Chroma persists every write)"""
+        return nullcontext()
+
+    def flush(self):
+        """Persist writes held back by deferred_saves()"""
+
+    def unsaved_rows(self) -> int:
+        """Rows written but not yet persisted"""
+        return 0
+
+    def embedding_version(self) -> Dict:
+        """Model and text template that produced the stored vectors"""
+        return collection_embedding_version(self.collection)
+    
+    def get_embeddings(self, recipe_ids: List[str]) -> Dict[str, List[float]]:
+        """Stored embedding per recipe id (ids without one are left out)"""
+        result = self.collection.get(ids=recipe_ids, include=["embeddings"])
+        return dict(zip(result["ids"], result["embeddings"]))
+    
+    def embedding_rows(self, recipes: List[Dict]):
+        """(ids, documents, metadatas) to embed and store for these recipes"""
+        # Create rich text representation for embedding
+        documents = [self._create_embedding_text(recipe) for recipe in recipes]
+        ids = [recipe["id"] for recipe in recipes]
+        metadatas = [self._recipe_metadata(recipe) for recipe in recipes]
+        return ids, documents, metadatas
+    
+    def _recipe_metadata(self, recipe: Dict) -> Dict:
+        """Flat metadata stored alongside each embedding (used for filtering)"""
+        return {
+            "recipe_id": recipe["id"],
+            "name": recipe["name"],
+            "cuisine": recipe["cuisine"],
+            "source": recipe["source"],
+            "calories": float(recipe["nutrition"]["calories"]),
+            "protein": float(recipe["nutrition"]["protein"]),
+            "carbs": float(recipe["nutrition"]["carbs"]),
+            "fat": float(recipe["nutrition"]["fat"]),
+            "tags": ",".join(recipe.get("tags", []))
+        }
+    
     def _create_embedding_text(self, recipe: Dict) -> str:
         """Create rich text representation for better embeddings"""
         ingredients_text = ', '.join(recipe.get('ingredients', [])[:10])  # Limit to first 10
@@ -121,12 +349,21 @@ class RecipeVectorStore:
         goal: str,
         preferences: Optional[List[str]] = None,
         allergies: Optional[List[str]] = None,
-        n_results: int = 15
+        n_results: int = 15,
+        required_tags: Optional[List[str]] = None,
+        excluded_tags: Optional[List[str]] = None,
+        diversity: Optional[float] = None
     ) -> List[Dict]:
         """
         Search recipes by BOTH goals (nutrition) and taste (preferences)
+        
+        Every macro bound for the goal is enforced. Recipes in the preferred
+        cuisines come first; other cuisines that meet the bounds fill the rest.
+        diversity is the MMR lambda (None = plain nearest neighbours, lower =
+        more varied results).
         """
-        if self.collection.count() == 0:
+        total = self.get_recipe_count()
+        if total == 0:
             print("⚠️  Vector database is empty. Run seed script first.")
             return []
         
@@ -137,34 +374,69 @@ class RecipeVectorStore:
         # Can't use query_texts= because embedding_function=None
         query_embedding = self.embedding_model.encode(query_text).tolist()
         
-        # Build filters for nutrition goals
-        filters = self._build_nutrition_filters(goal, preferences)
+        # Build filters for nutrition goals and cuisine preference
+        macro_filter = self._build_nutrition_filters(goal)
+        cuisine_filter = build_cuisine_filter(preferences)
+        passes = [combine_filters(macro_filter, cuisine_filter), macro_filter] if cuisine_filter else [macro_filter]
         
-        try:
-            # Search using query_embeddings instead of query_texts
-            results = self.collection.query(
-                query_embeddings=[query_embedding],  # Use our embeddings, not ChromaDB's ONNX
-                n_results=min(n_results * 2, self.collection.count()),
-                where=filters if filters else None
-            )
-            
-            # Filter out allergies
-            filtered_results = self._filter_allergies(results, allergies or [])
-            
-            return filtered_results[:n_results]
-        except Exception as e:
-            print(f"Error searching: {e}")
-            # Fallback: search without filters
-            try:
-                results = self.collection.query(
-                    query_embeddings=[query_embedding],  # Use our embeddings here too
-                    n_results=min(n_results * 2, self.collection.count())
-                )
-                filtered_results = self._filter_allergies(results, allergies or [])
-                return filtered_results[:n_results]
-            except Exception as e2:
-                print(f"Error in fallback search: {e2}")
-                return []
+        # With diversity, over-fetch and let MMR pick a varied subset
+        target = n_results * MMR_FETCH_MULTIPLIER if diversity is not None else n_results
+        
+        results = []
+        embeddings = []
+        boosts = []
+        seen = set()
+        for preferred, where in zip([bool(cuisine_filter), False], passes):
+            fetch = min(target * 2, total)
+            while len(results) < target:
+                try:
+                    # Search using query_embeddings instead of query_texts
+                    candidates = self.collection.query(
+                        query_embeddings=[query_embedding],  # Use our embeddings, not ChromaDB's ONNX
+                        n_results=fetch,
+                        where=where,
+                        include=["metadatas", "documents", "embeddings"]
+                    )
+                except Exception as e:
+                    if where is None:
+                        print(f"Error in fallback search: {e}")
+                        break
+                    print(f"Error searching with filter {where}: {e}")
+                    # Fallback: search without filters
+                    preferred, where = False, None
+                    continue
+                
+                # Filter out allergies and tag mismatches
+                for metadata, document, embedding in zip(
+                    candidates["metadatas"][0], candidates["documents"][0], candidates["embeddings"][0]
+                ):
+                    if metadata["recipe_id"] in seen or self._has_allergen(document, allergies or []):
+                        continue
+                    if not matches_tags(metadata.get("tags", ""), required_tags, excluded_tags):
+                        continue
+                    seen.add(metadata["recipe_id"])
+                    results.append(metadata)
+                    embeddings.append(embedding)
+                    boosts.append(2.0 if preferred else 0.0)
+                
+                # Tags are a joined string the where clause can't match, so widen the
+                # query until enough candidates pass or the filter has no more rows
+                if len(candidates["ids"][0]) < fetch or fetch >= total:
+                    break
+                fetch = min(fetch * 2, total)
+        
+        results = results[:target]
+        if diversity is not None and len(results) > n_results:
+            # Preferred-cuisine candidates keep their lead (+2 relevance boost)
+            candidate_matrix = np.asarray(embeddings[:target], dtype=np.float32)
+            candidate_matrix /= np.maximum(np.linalg.norm(candidate_matrix, axis=1, keepdims=True), 1e-12)
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            relevance = candidate_matrix @ (query_vector / max(float(np.linalg.norm(query_vector)), 1e-12))
+            relevance += np.asarray(boosts[:target], dtype=np.float32)
+            order = mmr_rerank(query_vector, candidate_matrix, n_results, diversity, relevance)
+            return [results[i] for i in order]
+        
+        return results[:n_results]
     
     def _build_query_text(self, goal: str, preferences: List[str]) -> str:
         """Build query text combining goals and preferences"""
@@ -180,53 +452,50 @@ class RecipeVectorStore:
         
         return query
     
-    def _build_nutrition_filters(self, goal: str, preferences: Optional[List[str]] = None) -> Optional[Dict]:
+    def _build_nutrition_filters(self, goal: str) -> Optional[Dict]:
         """
-        Build simple nutrition filters based on goal
-        ChromaDB 0.3.23 has limited query support - using single conditions only
+        Build nutrition filters based on goal: every bound the importer uses
+        (min/max calories, protein, carbs) combined with $and
         """
-        # Use simple filters that ChromaDB 0.3.23 can handle
-        if goal == "lose_fat":
-            filter_dict = {"calories": {"$lt": 600}}
-        elif goal == "gain_muscle":
-            filter_dict = {"protein": {"$gt": 25}}
-        else:  # maintain
-            filter_dict = {"calories": {"$gte": 200}}
-        
-        # Add cuisine preference if provided (but separately, not nested)
-        if preferences and len(preferences) > 0:
-            # For ChromaDB 0.3.23, we can't combine $and with $in easily
-            # So we'll rely on semantic search for cuisine matching
-            pass
-        
-        return filter_dict
-    
-    def _filter_allergies(self, results: Dict, allergies: List[str]) -> List[Dict]:
-        """Filter out recipes with allergens"""
-        if not allergies or not results["metadatas"]:
-            return results["metadatas"][0] if results["metadatas"] else []
-        
-        filtered = []
-        for metadata, document in zip(results["metadatas"][0], results["documents"][0]):
-            # Check if any allergen is in the recipe
-            has_allergen = any(
-                allergen.lower() in document.lower() 
-                for allergen in allergies
-            )
-            if not has_allergen:
-                filtered.append(metadata)
-        
-        return filtered
+        return build_macro_filter(goal)
+    
+    def _has_allergen(self, document: str, allergies: List[str]) -> bool:
+        """Check if any allergen is mentioned in the recipe text"""
+        document = document.lower()
+        return any(allergen.lower() in document for allergen in allergies)
     
     def get_recipe_count(self) -> int:
-        """Get total number of recipes in vector database"""
-        return self.collection.count()
+        """
+        Get total number of recipes in vector database. Cached: reset by this
+        store's writes, re-counted after VECTOR_COUNT_TTL_S for other writers
+        """
+        collection = self.collection
+        now = time.monotonic()
+        if self._count is None or now - self._counted_at >= VECTOR_COUNT_TTL_S:
+            self._count = collection.count()
+            self._counted_at = now
+        return self._count
     
     def clear_all(self):
         """Clear all recipes from vector database (use with caution!)"""
-        self.chroma_client.delete_collection("recipes")
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="recipes",
-            metadata={"description": "Recipe embeddings for meal planning"}
-        )
+        self.chroma_client.delete_collection(self.collection.name)
+        self._collection = None
+        self._count = None
+        _ = self.collection
         print("✅ Vector database cleared")
+
+
+def create_vector_store():
+    """
+    Build the configured vector backend.
+    
+    VECTOR_BACKEND=chroma (default) uses the persistent ChromaDB collection;
+    VECTOR_BACKEND=numpy uses the in-process memory-mapped index.
+    """
+    backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    if backend == "numpy":
+        from Backend.Services.numpy_vector_store import NumpyRecipeVectorStore
+        return NumpyRecipeVectorStore()
+    if backend != "chroma":
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}'. Must be 'chroma' or 'numpy'")
+    return RecipeVectorStore()
@@ -0,0 +1,81 @@
+from typing import List, Dict, Optional, Tuple
+from Backend.Services.recipe_importer import GOAL_NUTRITION_PARAMS
+
+# Importer param -> (metadata column, where operator)
+NUTRITION_PARAM_CLAUSES = {
+    "minCalories": ("calories", "$gte"),
+    "maxCalories": ("calories", "$lte"),
+    "minProtein": ("protein", "$gte"),
+    "maxProtein": ("protein", "$lte"),
+    "minCarbs": ("carbs", "$gte"),
+    "maxCarbs": ("carbs", "$lte"),
+    "minFat": ("fat", "$gte"),
+    "maxFat": ("fat", "$lte"),
+}
+
+
+def build_macro_filter(goal: str) -> Dict:
+    """
+    Where clause enforcing every nutrition bound the importer uses for a goal,
+    e.g. lose_fat -> calories <= 500 AND protein >= 25 AND carbs <= 50
+    """
+    params = GOAL_NUTRITION_PARAMS.get(goal, GOAL_NUTRITION_PARAMS["maintain"])
+    clauses = [
+        {column: {op: value}}
+        for param, value in params.items()
+        for column, op in [NUTRITION_PARAM_CLAUSES[param]]
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def build_macro_sql(goal: str) -> Tuple[List[str], List]:
+    """
+    The same bounds as build_macro_filter as SQL conditions on the generated
+    macro columns of Recipes, e.g. (["calories <= %s", ...], [500, ...])
+    """
+    params = GOAL_NUTRITION_PARAMS.get(goal, GOAL_NUTRITION_PARAMS["maintain"])
+    conditions, values = [], []
+    for param, value in params.items():
+        column, op = NUTRITION_PARAM_CLAUSES[param]
+        conditions.append(f"{column} {'>=' if op == '$gte' else '<='} %s")
+        values.append(value)
+    return conditions, values
+
+
+def cuisine_variants(cuisines: List[str]) -> List[str]:
+    """Spoonacular stores 'Mediterranean', Edamam 'mediterranean'; match both"""
+    variants = []
+    for cuisine in cuisines:
+        for variant in (cuisine, cuisine.lower(), cuisine.title()):
+            if variant not in variants:
+                variants.append(variant)
+    return variants
+
+
+def build_cuisine_filter(cuisines: Optional[List[str]]) -> Optional[Dict]:
+    """Where clause for cuisine IN (...), or None when there is no preference"""
+    if not cuisines:
+        return None
+    return {"cuisine": {"$in": cuisine_variants(cuisines)}}
+
+
+def combine_filters(*filters: Optional[Dict]) -> Optional[Dict]:
+    """AND together where clauses, skipping empty ones"""
+    clauses = []
+    for where in filters:
+        if not where:
+            continue
+        clauses.extend(where["$and"] if list(where) == ["$and"] else [where])
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def matches_tags(tags: str, required_tags: Optional[List[str]] = None, excluded_tags: Optional[List[str]] = None) -> bool:
+    """Check a comma-joined metadata tag string against required/excluded tags"""
+    recipe_tags = {tag.lower() for tag in tags.split(",") if tag}
+    if required_tags and not all(tag.lower() in recipe_tags for tag in required_tags):
+        return False
+    if excluded_tags and any(tag.lower() in recipe_tags for tag in excluded_tags):
+        return False
+    return True
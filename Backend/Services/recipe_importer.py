@@ -3,14 +3,42 @@ import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 import json
+import hashlib
+from Backend.Services.http_cache import HttpCache, CacheMiss
 
 load_dotenv()
 
+# Per-serving nutrition bounds for each goal (Spoonacular complexSearch params).
+# Also enforced at search time by Backend.Services.recipe_filters.
+GOAL_NUTRITION_PARAMS = {
+    "lose_fat": {
+        "maxCalories": 500,
+        "minProtein": 25,
+        "maxCarbs": 50
+    },
+    "gain_muscle": {
+        "minCalories": 400,
+        "minProtein": 35,
+        "minCarbs": 40
+    },
+    "maintain": {
+        "minCalories": 300,
+        "maxCalories": 600,
+        "minProtein": 20
+    }
+}
+
+# Credentials are left out of response cache keys
+SPOONACULAR_SECRET_PARAMS = ("apiKey",)
+EDAMAM_SECRET_PARAMS = ("app_id", "app_key")
+
 class RecipeImporter:
-    def __init__(self):
+    def __init__(self, http_cache: Optional[HttpCache] = None):
         self.spoonacular_key = os.getenv("SPOONACULAR_API_KEY")
         self.edamam_id = os.getenv("EDAMAM_APP_ID")
         self.edamam_key = os.getenv("EDAMAM_APP_KEY")
+        # Provider responses are cached on disk (HTTP_CACHE_MODE=replay works offline)
+        self.http_cache = http_cache or HttpCache()
     
     async def fetch_recipes_by_goal(self, goal: str, cuisine: Optional[str] = None, limit: int = 50) -> List[Dict]:
         """Fetch recipes optimized for specific fitness goals"""
@@ -21,7 +49,7 @@ class RecipeImporter:
         nutrition_params = self._get_nutrition_params(goal)
         
         # Fetch from Spoonacular (better nutrition filtering)
-        if self.spoonacular_key:
+        if self.spoonacular_key or self.http_cache.replay:
             spoonacular_recipes = await self._fetch_spoonacular(
                 cuisine=cuisine,
                 nutrition_params=nutrition_params,
@@ -30,7 +58,7 @@ class RecipeImporter:
             recipes.extend(spoonacular_recipes)
         
         # Fetch from Edamam (more variety)
-        if self.edamam_id and self.edamam_key:
+        if (self.edamam_id and self.edamam_key) or self.http_cache.replay:
             edamam_recipes = await self._fetch_edamam(
                 cuisine=cuisine,
                 goal=goal,
@@ -42,28 +70,11 @@ class RecipeImporter:
     
     def _get_nutrition_params(self, goal: str) -> Dict:
         """Get nutrition parameters for each goal"""
-        params = {
-            "lose_fat": {
-                "maxCalories": 500,
-                "minProtein": 25,
-                "maxCarbs": 50
-            },
-            "gain_muscle": {
-                "minCalories": 400,
-                "minProtein": 35,
-                "minCarbs": 40
-            },
-            "maintain": {
-                "minCalories": 300,
-                "maxCalories": 600,
-                "minProtein": 20
-            }
-        }
-        return params.get(goal, params["maintain"])
+        return GOAL_NUTRITION_PARAMS.get(goal, GOAL_NUTRITION_PARAMS["maintain"])
     
     async def _fetch_spoonacular(self, cuisine: Optional[str], nutrition_params: Dict, limit: int) -> List[Dict]:
         """Fetch from Spoonacular with nutrition filters"""
-        if not self.spoonacular_key:
+        if not self.spoonacular_key and not self.http_cache.replay:
             return []
             
         async with httpx.AsyncClient() as client:
@@ -79,21 +90,25 @@ class RecipeImporter:
                 params["cuisine"] = cuisine
             
             try:
-                response = await client.get(
+                response = await self.http_cache.get(
+                    client,
                     "https://api.spoonacular.com/recipes/complexSearch",
                     params=params,
+                    secret_params=SPOONACULAR_SECRET_PARAMS,
                     timeout=30.0
                 )
-                response.raise_for_status()
                 data = response.json()
                 return data.get("results", [])
+            except CacheMiss as e:
+                print(f"Spoonacular replay: {e}")
+                return []
             except Exception as e:
                 print(f"Error fetching from Spoonacular: {e}")
                 return []
     
     async def _fetch_edamam(self, cuisine: Optional[str], goal: str, limit: int) -> List[Dict]:
         """Fetch from Edamam"""
-        if not self.edamam_id or not self.edamam_key:
+        if (not self.edamam_id or not self.edamam_key) and not self.http_cache.replay:
             return []
             
         async with httpx.AsyncClient() as client:
@@ -118,14 +133,18 @@ class RecipeImporter:
                 params["cuisineType"] = cuisine.lower()
             
             try:
-                response = await client.get(
+                response = await self.http_cache.get(
+                    client,
                     "https://api.edamam.com/api/recipes/v2",
                     params=params,
+                    secret_params=EDAMAM_SECRET_PARAMS,
                     timeout=30.0
                 )
-                response.raise_for_status()
                 data = response.json()
                 return [hit["recipe"] for hit in data.get("hits", [])]
+            except CacheMiss as e:
+                print(f"Edamam replay: {e}")
+                return []
             except Exception as e:
                 print(f"Error fetching from Edamam: {e}")
                 return []
@@ -143,9 +162,16 @@ class RecipeImporter:
         
         return normalized
     
+    def _spoonacular_nutrients(self, recipe: Dict) -> Dict[str, float]:
+        """Nutrient name -> amount in one pass (first entry wins, as before)"""
+        amounts = {}
+        for nutrient in (recipe.get("nutrition") or {}).get("nutrients", []):
+            amounts.setdefault(nutrient.get("name"), nutrient.get("amount", 0))
+        return amounts
+    
     def _normalize_spoonacular(self, recipe: Dict) -> Dict:
         """Normalize Spoonacular recipe"""
-        nutrition = recipe.get("nutrition", {}).get("nutrients", [])
+        nutrition = self._spoonacular_nutrients(recipe)
         
         return {
             "id": f"spoon_{recipe['id']}",
@@ -156,12 +182,12 @@ class RecipeImporter:
             "ingredients": [ing.get("name", "") for ing in recipe.get("extendedIngredients", [])],
             "instructions": recipe.get("instructions", ""),
             "nutrition": {
-                "calories": next((n["amount"] for n in nutrition if n["name"] == "Calories"), 0),
-                "protein": next((n["amount"] for n in nutrition if n["name"] == "Protein"), 0),
-                "carbs": next((n["amount"] for n in nutrition if n["name"] == "Carbohydrates"), 0),
-                "fat": next((n["amount"] for n in nutrition if n["name"] == "Fat"), 0)
+                "calories": nutrition.get("Calories", 0),
+                "protein": nutrition.get("Protein", 0),
+                "carbs": nutrition.get("Carbohydrates", 0),
+                "fat": nutrition.get("Fat", 0)
             },
-            "tags": self._extract_tags_spoonacular(recipe)
+            "tags": self._extract_tags_spoonacular(recipe, nutrition)
         }
     
     def _normalize_edamam(self, recipe: Dict) -> Dict:
@@ -169,7 +195,7 @@ class RecipeImporter:
         nutrients = recipe.get("totalNutrients", {})
         
         return {
-            "id": f"edamam_{hash(recipe['uri'])}",
+            "id": f"edamam_{self._edamam_id(recipe['uri'])}",
             "name": recipe.get("label", ""),
             "source": "edamam",
             "cuisine": recipe.get("cuisineType", ["General"])[0] if recipe.get("cuisineType") else "General",
@@ -185,7 +211,13 @@ class RecipeImporter:
             "tags": recipe.get("healthLabels", []) + recipe.get("dietLabels", [])
         }
     
-    def _extract_tags_spoonacular(self, recipe: Dict) -> List[str]:
+    def _edamam_id(self, uri: str) -> str:
+        """Stable id from the recipe URI ('...#recipe_<id>'); hash() changes between processes"""
+        if "#recipe_" in uri:
+            return uri.rsplit("#recipe_", 1)[1]
+        return hashlib.sha1(uri.encode()).hexdigest()[:32]
+    
+    def _extract_tags_spoonacular(self, recipe: Dict, nutrition: Optional[Dict[str, float]] = None) -> List[str]:
         """Extract tags from Spoonacular recipe"""
         tags = []
         
@@ -198,9 +230,9 @@ class RecipeImporter:
             tags.append("gluten-free")
         
         # Add nutrition-based tags
-        nutrition = recipe.get("nutrition", {}).get("nutrients", [])
-        protein = next((n["amount"] for n in nutrition if n["name"] == "Protein"), 0)
-        carbs = next((n["amount"] for n in nutrition if n["name"] == "Carbohydrates"), 0)
+        nutrition = nutrition if nutrition is not None else self._spoonacular_nutrients(recipe)
+        protein = nutrition.get("Protein", 0)
+        carbs = nutrition.get("Carbohydrates", 0)
         
         if protein > 30:
             tags.append("high-protein")
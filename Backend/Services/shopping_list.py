@@ -0,0 +1,81 @@
+from typing import Dict, List, Optional
+from Backend.Services.ingredient_bitmaps import normalize_ingredient
+
+# Words that describe how an ingredient is prepared or sized, not what it is:
+# "boneless chicken breast" is on hand when the fridge has "chicken breast"
+ON_HAND_MODIFIERS = {
+    "fresh", "raw", "organic", "ripe", "large", "medium", "small", "whole",
+    "boneless", "skinless", "peeled", "chopped", "diced", "sliced", "minced",
+    "cubed", "grated", "shredded"
+}
+
+
+def _ingredient_parts(ingredient) -> tuple:
+    """(name, amount, unit) from a plain name or an {name, amount, unit} dict"""
+    if isinstance(ingredient, dict):
+        return ingredient.get("name", ""), ingredient.get("amount"), ingredient.get("unit") or ""
+    return str(ingredient), None, ""
+
+
+def _core_term(term: str) -> tuple:
+    """Normalized words without ON_HAND_MODIFIERS, in order"""
+    return tuple(word for word in term.split() if word not in ON_HAND_MODIFIERS)
+
+
+def _is_on_hand(term: str, fridge_terms: set) -> bool:
+    """
+    Only the same ingredient counts: 'rice' does not cover 'rice vinegar',
+    nor 'milk' 'coconut milk'. Modifiers are ignored on both sides.
+    """
+    core = _core_term(term)
+    return bool(core) and core in fridge_terms
+
+
+def build_shopping_list(
+    recipe_ids: List[str],
+    recipes_by_id: Dict[str, Dict],
+    fridge: Optional[List[str]] = None
+) -> Dict:
+    """
+    Aggregate the ingredients of the planned meals into one shopping list.
+
+    recipe_ids has one entry per planned meal (repeats count again). Names
+    are normalized and de-duplicated; amounts are summed per unit when the
+    recipe data has them. Ingredients already in the fridge are listed under
+    on_hand instead of items.
+    """
+    fridge_terms = {_core_term(normalize_ingredient(item)) for item in fridge or []} - {()}
+    aggregated: Dict[str, Dict] = {}
+
+    for recipe_id in recipe_ids:
+        recipe = recipes_by_id.get(recipe_id)
+        if not recipe:
+            continue
+        for ingredient in recipe.get("ingredients") or []:
+            name, amount, unit = _ingredient_parts(ingredient)
+            term = normalize_ingredient(name)
+            if not term:
+                continue
+            entry = aggregated.setdefault(term, {"name": term, "meals": 0, "amounts": {}, "recipe_ids": []})
+            entry["meals"] += 1
+            if recipe_id not in entry["recipe_ids"]:
+                entry["recipe_ids"].append(recipe_id)
+            if isinstance(amount, (int, float)):
+                entry["amounts"][unit] = entry["amounts"].get(unit, 0) + amount
+
+    items, on_hand = [], []
+    for term in sorted(aggregated):
+        entry = aggregated[term]
+        if not entry["amounts"]:
+            del entry["amounts"]
+        if _is_on_hand(term, fridge_terms):
+            on_hand.append(term)
+        else:
+            items.append(entry)
+
+    return {"items": items, "on_hand": on_hand}
+
+
+def ingredients_used(meal_plan: Dict) -> List[str]:
+    """Every normalized ingredient a plan uses (bought or already on hand)"""
+    return sorted(list(meal_plan.get("shopping_list") or []) + list(meal_plan.get("on_hand") or []))
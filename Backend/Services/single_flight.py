@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+
+
+def normalize_key(*parts: Any) -> tuple:
+    """
+    Build a hashable key from request parameters so equivalent requests match:
+    lists become sorted tuples (order-insensitive). Strings are kept as given,
+    since the handler may treat case as significant (e.g. goal names); pass
+    casefold(values) for parameters matched case-insensitively downstream.
+    """
+    normalized = []
+    for part in parts:
+        if isinstance(part, (list, tuple, set)):
+            normalized.append(tuple(sorted(normalize_key(*part))))
+        else:
+            normalized.append(part)
+    return tuple(normalized)
+
+
+def casefold(values: Iterable[str]) -> List[str]:
+    """Lower-case key parts whose downstream handling ignores case"""
+    return [value.lower() for value in values]
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one in-flight computation.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive the same result (or
+    exception). The work is shielded, so one caller disconnecting does not
+    cancel it for the others. Results are shared: callers must not mutate them.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable):
+        """
+        Start a fresh computation for the next caller of key (its inputs
+        changed); callers already waiting still get the running result.
+        """
+        self._inflight.pop(key, None)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,123 @@
+"""
+Export/import the recipe catalog (MySQL rows + embeddings) as a snapshot
+
+Usage:
+    python -m Backend.catalogSnapshot export snapshots/catalog-2026-10 [--float16]
+    python -m Backend.catalogSnapshot import snapshots/catalog-2026-10
+
+Export reads Recipes from MySQL in id order together with the stored
+embeddings of the active vector store. Import verifies the checksums, then
+bulk-loads MySQL, the vector store (VECTOR_BACKEND) and the ingredient
+bitmaps straight from the snapshot. It calls no recipe APIs and does not
+re-embed. See Backend/Services/catalog_snapshot.py for the format.
+"""
+import argparse
+import time
+from contextlib import nullcontext
+from Backend.database import get_db_connection, get_db_cursor
+from Backend.Routers.recipe_repo import RecipeRepository, RECIPE_FIELDS, parse_recipe_row
+from Backend.Services.catalog_snapshot import SnapshotWriter, read_manifest, iter_snapshot
+
+SNAPSHOT_BATCH = 1000
+
+
+def export_snapshot(repo: RecipeRepository, path: str, batch_size: int = SNAPSHOT_BATCH, dtype: str = "float32") -> dict:
+    version = repo.vector_store.embedding_version()
+    writer = None
+    skipped = 0
+    last_id = ""
+    while True:
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute(f"""
+                SELECT {', '.join(RECIPE_FIELDS)}
+                FROM Recipes
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            recipes = [parse_recipe_row(row) for row in cursor.fetchall()]
+        if not recipes:
+            break
+        last_id = recipes[-1]["id"]
+
+        embeddings = repo.vector_store.get_embeddings([recipe["id"] for recipe in recipes])
+        embedded = [recipe for recipe in recipes if recipe["id"] in embeddings]
+        skipped += len(recipes) - len(embedded)
+        if not embedded:
+            continue
+        if writer is None:
+            dim = len(embeddings[embedded[0]["id"]])
+            writer = SnapshotWriter(path, dim, version["embedding_model"], version["embedding_text_version"], dtype)
+        writer.write_batch(embedded, [embeddings[recipe["id"]] for recipe in embedded])
+        print(f"  exported {writer.count} recipes")
+
+    if writer is None:
+        raise SystemExit("❌ No embedded recipes to export")
+    if skipped:
+        print(f"⚠️  Skipped {skipped} recipes without a stored embedding")
+    return writer.close()
+
+
+def import_snapshot(repo: RecipeRepository, path: str, batch_size: int = SNAPSHOT_BATCH,
+                    load_mysql: bool = True, load_vectors: bool = True, force: bool = False) -> dict:
+    timings = {}
+    started = time.perf_counter()
+    manifest = read_manifest(path, verify=True)
+    timings["verify_s"] = time.perf_counter() - started
+
+    if load_vectors and not force:
+        version = repo.vector_store.embedding_version()
+        if version["embedding_model"] != manifest["embedding_model"]:
+            raise SystemExit(f"❌ Snapshot embeddings are from {manifest['embedding_model']}, "
+                             f"vector store uses {version['embedding_model']} (--force to load anyway)")
+
+    timings.update({"mysql_s": 0.0, "vectors_s": 0.0, "ingredients_s": 0.0})
+    loaded = 0
+    with repo.vector_store.deferred_saves() if load_vectors else nullcontext():
+        for recipes, embeddings in iter_snapshot(path, batch_size):
+            if load_mysql:
+                step = time.perf_counter()
+                repo.bulk_upsert_recipes(recipes, batch_size)
+                timings["mysql_s"] += time.perf_counter() - step
+            if load_vectors:
+                step = time.perf_counter()
+                repo.vector_store.add_embedded_recipes(recipes, embeddings)
+                timings["vectors_s"] += time.perf_counter() - step
+                step = time.perf_counter()
+                repo.ingredient_index.add_recipes(recipes)
+                timings["ingredients_s"] += time.perf_counter() - step
+            loaded += len(recipes)
+            print(f"  loaded {loaded}/{manifest['recipe_count']} recipes")
+        if load_vectors:
+            step = time.perf_counter()
+            repo.vector_store.flush()
+            timings["vectors_s"] += time.perf_counter() - step
+
+    timings["total_s"] = time.perf_counter() - started
+    return {"recipes": loaded, **{key: round(value, 2) for key, value in timings.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--batch", type=int, default=SNAPSHOT_BATCH)
+    parser.add_argument("--float16", action="store_true", help="Store embeddings as float16 (half the size)")
+    parser.add_argument("--skip-mysql", action="store_true", help="Import: only load the vector store")
+    parser.add_argument("--skip-vectors", action="store_true", help="Import: only load MySQL")
+    parser.add_argument("--force", action="store_true", help="Import even if the embedding model differs")
+    args = parser.parse_args()
+
+    repo = RecipeRepository()
+    if args.command == "export":
+        manifest = export_snapshot(repo, args.path, args.batch, "float16" if args.float16 else "float32")
+        size_mb = sum(f["bytes"] for f in manifest["files"].values()) / 1e6
+        print(f"✅ Snapshot of {manifest['recipe_count']} recipes written to {args.path} ({size_mb:.1f} MB)")
+    else:
+        result = import_snapshot(repo, args.path, args.batch, not args.skip_mysql, not args.skip_vectors, args.force)
+        print(f"✅ Imported {result['recipes']} recipes: {result}")
+
+
+if __name__ == "__main__":
+    main()
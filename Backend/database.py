@@ -1,17 +1,24 @@
 import pymysql
 from pymysql.cursors import DictCursor
 import os
+import json
 from dotenv import load_dotenv
 from contextlib import contextmanager
 
 load_dotenv()
 
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib decoder
+    orjson = None
+
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'user': os.getenv('DB_USER', 'hassanismael'),
     'password': os.getenv('DB_PASSWORD', 'Hassan123!'),
     'database': os.getenv('DB_NAME', 'GardenOfEaten'),
-    'cursorclass': DictCursor
+    'cursorclass': DictCursor,
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '10'))
 }
 
 @contextmanager
@@ -30,3 +37,47 @@ def get_db_connection():
 def get_db_cursor(connection):
     """Get a cursor from a connection"""
     return connection.cursor()
+
+def json_column(value, default=None):
+    """Decode a JSON column (orjson when installed); empty values give default"""
+    if not value:
+        return default
+    if not isinstance(value, (str, bytes)):
+        return value
+    return orjson.loads(value) if orjson is not None else json.loads(value)
+
+def check_db_connection() -> bool:
+    """Return True if MySQL accepts a connection and answers a trivial query"""
+    try:
+        with get_db_connection() as conn:
+            cursor = get_db_cursor(conn)
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return True
+    except Exception as e:
+        print(f"Database readiness check failed: {e}")
+        return False
+
+def acquire_named_lock(name: str):
+    """
+    Try to take a MySQL named lock (GET_LOCK, non-blocking) so only one
+    process runs a job. Returns the connection holding it, or None if
+    another session holds the lock; pass it to release_named_lock.
+    """
+    connection = pymysql.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (name,))
+        if cursor.fetchone()['acquired'] == 1:
+            return connection
+    except Exception:
+        connection.close()
+        raise
+    connection.close()
+    return None
+
+def release_named_lock(connection, name: str):
+    try:
+        connection.cursor().execute("SELECT RELEASE_LOCK(%s)", (name,))
+    finally:
+        connection.close()
@@ -0,0 +1,186 @@
+"""
+Stream a partner recipe dump (JSONL, optionally .gz) into the catalog
+
+Usage:
+    python -m Backend.importRecipeDump dumps/partner-2026-10.jsonl.gz [--batch 500] [--source auto]
+    python -m Backend.importRecipeDump dumps/partner-2026-10.jsonl.gz --restart
+
+Records are read one line at a time, normalized with the RecipeImporter
+normalizers and written per batch: bulk MySQL upsert, one embedding pass
+per batch into the vector store, then the ingredient bitmaps. Only one batch
+is held in memory. After each committed batch the byte offset is saved to
+<dump>.import-state.json, so an interrupted import resumes where it stopped
+(re-running at most one batch, which the upserts make harmless). A vector
+store that persists lazily (NUMPY_SAVE_EVERY_ROWS) holds the offset back
+until its rows are on disk, so a resume may re-run up to that many rows.
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from Backend.Routers.recipe_repo import RecipeRepository
+from Backend.Services.recipe_importer import RecipeImporter
+from Backend.Services.recipe_dump import (
+    DUMP_SOURCES, iter_dump, dump_size, normalize_dump_record, dedupe_batch
+)
+
+DUMP_BATCH = 500
+
+
+class DumpImportJob:
+    """Imports one dump file in batches, checkpointing the offset after each"""
+
+    def __init__(self, repo: RecipeRepository, path: str, batch_size: int = DUMP_BATCH,
+                 source: str = "auto", state_path: Optional[str] = None, load_vectors: bool = True):
+        self.repo = repo
+        self.path = path
+        self.batch_size = batch_size
+        self.source = source
+        self.state_path = state_path or f"{path}.import-state.json"
+        self.load_vectors = load_vectors
+        self.importer = RecipeImporter()
+        self.size = dump_size(path)
+        self.status = "pending"
+        self.offset = 0
+        self.imported = 0
+        self.skipped = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._session_start = (0, 0)  # (offset, imported) when this run started, for throughput
+
+    def load_state(self) -> bool:
+        """Resume from the saved offset; returns False if there is none"""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if state.get("size") != self.size:
+            raise SystemExit(f"❌ {self.path} changed since the saved offset (size {state.get('size')} -> {self.size}); "
+                             f"use --restart")
+        self.offset = state["offset"]
+        self.imported = state["imported"]
+        self.skipped = state["skipped"]
+        return True
+
+    def save_state(self):
+        state = {
+            "path": os.path.abspath(self.path),
+            "size": self.size,
+            "offset": self.offset,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "completed": self.status == "completed",
+            "updated_at": time.time()
+        }
+        with open(f"{self.state_path}.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+    def progress(self) -> Dict:
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        start_offset, start_imported = self._session_start
+        return {
+            "dump": self.path,
+            "status": self.status,
+            "offset": self.offset,
+            "file_bytes": self.size,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "recipes_per_s": round((self.imported - start_imported) / elapsed, 1) if elapsed > 0 else 0.0,
+            "mb_per_s": round((self.offset - start_offset) / 1e6 / elapsed, 2) if elapsed > 0 else 0.0,
+            "error": self.error
+        }
+
+    def _write_batch(self, recipes: List[Dict]):
+        recipes = dedupe_batch(recipes)
+        self.repo.bulk_upsert_recipes(recipes, self.batch_size)
+        if self.load_vectors:
+            store = self.repo.vector_store
+            _, documents, _ = store.embedding_rows(recipes)
+            store.add_embedded_recipes(recipes, store.embedding_model.encode(documents))
+            self.repo.ingredient_index.add_recipes(recipes)
+
+    def run(self, limit: Optional[int] = None) -> Dict:
+        self.status = "running"
+        self.started_at = time.monotonic()
+        self._session_start = (self.offset, self.imported)
+        batch: List[Dict] = []
+        skipped = 0  # counted into self.skipped when their batch is committed
+        position = self.offset
+        try:
+            with self.repo.vector_store.deferred_saves() if self.load_vectors else nullcontext():
+                for position, record in iter_dump(self.path, self.offset):
+                    recipe = normalize_dump_record(self.importer, record, self.source) if record is not None else None
+                    if recipe is None:
+                        skipped += 1
+                    else:
+                        batch.append(recipe)
+                    if len(batch) >= self.batch_size:
+                        self._commit(batch, skipped, position)
+                        batch, skipped = [], 0
+                        if limit is not None and self.imported - self._session_start[1] >= limit:
+                            break
+                else:
+                    self._commit(batch, skipped, position)
+                    self.status = "completed"
+                if self.status == "running":
+                    self.status = "stopped"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+            self._checkpoint()
+        return self.progress()
+
+    def _checkpoint(self):
+        """Save the offset, unless vectors below it are still only in memory"""
+        if not self.load_vectors or not self.repo.vector_store.unsaved_rows():
+            self.save_state()
+
+    def _commit(self, batch: List[Dict], skipped: int, position: int):
+        if batch:
+            self._write_batch(batch)
+        self.imported += len(batch)
+        self.skipped += skipped
+        self.offset = position
+        self._checkpoint()
+        progress = self.progress()
+        percent = f" ({100 * self.offset / self.size:.1f}%)" if not self.path.endswith(".gz") else ""
+        print(f"  {self.imported} recipes, {self.skipped} skipped, offset {self.offset}{percent}: "
+              f"{progress['recipes_per_s']} recipes/s, {progress['mb_per_s']} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--batch", type=int, default=DUMP_BATCH)
+    parser.add_argument("--source", choices=DUMP_SOURCES, default="auto", help="Record format (default: detect per line)")
+    parser.add_argument("--state", help="Offset file (default: <dump>.import-state.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved offset and start from the beginning")
+    parser.add_argument("--limit", type=int, help="Stop after about this many recipes (resume later)")
+    parser.add_argument("--skip-vectors", action="store_true", help="Only load MySQL")
+    args = parser.parse_args()
+
+    job = DumpImportJob(RecipeRepository(), args.path, args.batch, args.source, args.state, not args.skip_vectors)
+    if not args.restart and job.load_state():
+        print(f"Resuming {args.path} at offset {job.offset} ({job.imported} recipes already imported)")
+    else:
+        print(f"Importing {args.path} ({job.size / 1e6:.1f} MB)")
+
+    result = job.run(limit=args.limit)
+    if result["status"] == "failed":
+        raise SystemExit(f"❌ Import failed at offset {result['offset']}: {result['error']} (re-run to resume)")
+    if result["status"] == "stopped":
+        print(f"⏸️  Stopped after {result['imported']} recipes at offset {result['offset']} (re-run to resume)")
+        return
+    print(f"✅ Imported {result['imported']} recipes ({result['skipped']} lines skipped) at "
+          f"{result['recipes_per_s']} recipes/s, {result['mb_per_s']} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from Backend.Routers.api import router
+from Backend.Routers.api import router, recipe_repo, plan_scheduler
+from Backend.Routers.responses import FastJSONResponse, CompressionMiddleware
 
-app = FastAPI(title="Garden Of Eaten API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and vector store in the background so the
+    # server starts listening (and answers /health) immediately
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(recipe_repo.warm_up))
+    # Next week's plans for active users, generated during the off-peak window
+    plan_task = asyncio.create_task(plan_scheduler.run_forever()) if plan_scheduler.enabled else None
+    yield
+    if plan_task is not None:
+        plan_task.cancel()
+
+
+app = FastAPI(
+    title="Garden Of Eaten API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
+
+# gzip/brotli for JSON bodies, negotiated from Accept-Encoding
+app.add_middleware(CompressionMiddleware)
 
 # Include API routes
 app.include_router(router)
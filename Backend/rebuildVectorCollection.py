@@ -0,0 +1,202 @@
+"""
+Rebuild the recipes ChromaDB collection with new HNSW parameters
+
+Usage:
+    python -m Backend.rebuildVectorCollection --m 32 --construction-ef 200 --search-ef 64
+    python -m Backend.rebuildVectorCollection --activate recipes   # switch back (rollback)
+    python -m Backend.rebuildVectorCollection --list
+
+Copies every embedding, document and metadata row from the active
+collection into a new one built with the given parameters. It then compares
+recall@k and query latency of both against exact search over the same
+embeddings, and only then switches the active-collection alias. The old
+collection keeps serving until the switch and is kept for rollback unless
+--drop-old is given. The new collection records the same embedding model
+and text version as the old one.
+
+Imports keep writing to the old collection during the copy. Recipes changed
+in MySQL since the copy started are re-copied until a pass finds nothing new,
+and the alias is switched right after. Recipes that only the old collection
+got while workers were still following the alias (up to
+ALIAS_CHECK_INTERVAL_S) are copied over once they have.
+"""
+import argparse
+import time
+import numpy as np
+from typing import List
+from Backend.database import get_db_connection, get_db_cursor
+from Backend.Services.recipe_embedder import (
+    get_chroma_client, active_collection_name, set_active_collection, hnsw_metadata, collection_embedding_version,
+    HNSW_SPACE, HNSW_M, HNSW_CONSTRUCTION_EF, HNSW_SEARCH_EF, ALIAS_CHECK_INTERVAL_S
+)
+
+COPY_BATCH = 1000
+CATCH_UP_PASSES = 5
+
+
+def copy_collection(source, target, batch: int = COPY_BATCH):
+    """Copy all rows in pages; returns the copied ids and their embeddings"""
+    ids, embeddings = [], []
+    total = source.count()
+    for offset in range(0, total, batch):
+        page = source.get(include=["embeddings", "documents", "metadatas"], limit=batch, offset=offset)
+        if not page["ids"]:
+            break
+        target.add(
+            ids=page["ids"],
+            embeddings=page["embeddings"],
+            documents=page["documents"],
+            metadatas=page["metadatas"]
+        )
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        print(f"  copied {min(offset + batch, total)}/{total}")
+    return ids, np.asarray(embeddings, dtype=np.float32)
+
+
+def db_now():
+    with get_db_connection() as conn:
+        cursor = get_db_cursor(conn)
+        cursor.execute("SELECT NOW(6) as now")
+        return cursor.fetchone()["now"]
+
+
+def changed_recipe_ids(since) -> List[str]:
+    """Recipes written at or after since (MySQL is written before the vector store)"""
+    with get_db_connection() as conn:
+        cursor = get_db_cursor(conn)
+        cursor.execute("SELECT id FROM Recipes WHERE last_updated >= %s ORDER BY id", (since,))
+        return [row["id"] for row in cursor.fetchall()]
+
+
+def sync_rows(source, target, ids: List[str], batch: int = COPY_BATCH) -> int:
+    """Upsert the given ids from source into target; returns how many were found"""
+    synced = 0
+    for start in range(0, len(ids), batch):
+        page = source.get(ids=ids[start:start + batch], include=["embeddings", "documents", "metadatas"])
+        if page["ids"]:
+            target.upsert(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"]
+            )
+            synced += len(page["ids"])
+    return synced
+
+
+def catch_up(source, target, since, max_passes: int = CATCH_UP_PASSES):
+    """Re-copy recipes changed since `since` until a pass finds no newer writes; returns the last pass start"""
+    for _ in range(max_passes):
+        started = db_now()
+        synced = sync_rows(source, target, changed_recipe_ids(since))
+        print(f"  caught up {synced} recipes changed during the copy")
+        since = started
+        if not changed_recipe_ids(started):
+            break
+    return since
+
+
+def measure(collection, ids, vectors, sample, k: int):
+    """Mean recall@k against exact cosine search, plus p50/p95 query latency in ms"""
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    recalls, latencies = [], []
+    for row in sample:
+        query = normalized[row]
+        truth = {ids[i] for i in np.argsort(-(normalized @ query))[:k]}
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[vectors[row].tolist()], n_results=k)
+        latencies.append(time.perf_counter() - started)
+        recalls.append(len(truth & set(result["ids"][0])) / k)
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    return float(np.mean(recalls)), p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", help="New collection name (default recipes_<timestamp>)")
+    parser.add_argument("--space", default=HNSW_SPACE, choices=["l2", "cosine", "ip"])
+    parser.add_argument("--m", type=int, default=HNSW_M)
+    parser.add_argument("--construction-ef", type=int, default=HNSW_CONSTRUCTION_EF)
+    parser.add_argument("--search-ef", type=int, default=HNSW_SEARCH_EF)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=100, help="Sample queries for the recall check")
+    parser.add_argument("--min-recall", type=float, default=0.0, help="Do not switch if recall@k is below this")
+    parser.add_argument("--no-activate", action="store_true", help="Build and measure only")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the previous collection after switching")
+    parser.add_argument("--activate", metavar="NAME", help="Only switch the alias to an existing collection")
+    parser.add_argument("--list", action="store_true", help="List collections and exit")
+    args = parser.parse_args()
+
+    client = get_chroma_client()
+    current = active_collection_name()
+
+    if args.list:
+        for collection in client.list_collections():
+            name = getattr(collection, "name", collection)
+            marker = "*" if name == current else " "
+            print(f"{marker} {name}")
+        return
+
+    if args.activate:
+        client.get_collection(args.activate)  # fail early if it does not exist
+        set_active_collection(args.activate)
+        print(f"✅ Active collection: {current} -> {args.activate}")
+        return
+
+    source = client.get_collection(current)
+    name = args.name or f"recipes_{time.strftime('%Y%m%d%H%M%S')}"
+    metadata = hnsw_metadata(args.space, args.m, args.construction_ef, args.search_ef)
+    print(f"Rebuilding '{current}' ({source.count()} recipes) into '{name}' with {metadata}")
+    target = client.create_collection(
+        name=name,
+        metadata={
+            "description": "Recipe embeddings for meal planning",
+            **metadata,
+            **collection_embedding_version(source)  # queried with the same model as before
+        },
+        embedding_function=None
+    )
+
+    copy_started = db_now()
+    ids, vectors = copy_collection(source, target)
+    last_pass = catch_up(source, target, copy_started)
+    if target.count() < source.count():
+        raise SystemExit(f"❌ Copied {target.count()} of {source.count()} rows; '{current}' stays active")
+    if not len(vectors):
+        raise SystemExit(f"❌ '{current}' is empty; nothing to rebuild")
+
+    sample = np.random.default_rng(0).choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    k = min(args.k, len(vectors))
+    print(f"\n{'collection':>24} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, collection in ((current, source), (name, target)):
+        recall, p50, p95 = measure(collection, ids, vectors, sample, k)
+        print(f"{label:>24} {recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+
+    if args.no_activate:
+        print(f"\nBuilt '{name}'; activate with --activate {name}")
+        return
+    if recall < args.min_recall:
+        raise SystemExit(f"❌ recall@{k} {recall:.3f} < {args.min_recall}; '{current}' stays active")
+
+    switch_pass = catch_up(source, target, last_pass)  # writes during the recall check
+    set_active_collection(name)
+    print(f"\n✅ Active collection: {current} -> {name} (rollback: --activate {current})")
+
+    # Workers follow the alias within ALIAS_CHECK_INTERVAL_S; recipes only the old
+    # collection got meanwhile are added (rows already in the new one may be newer)
+    print(f"Waiting {ALIAS_CHECK_INTERVAL_S * 2:.0f}s for workers to follow the alias...")
+    time.sleep(ALIAS_CHECK_INTERVAL_S * 2)
+    changed = changed_recipe_ids(switch_pass)
+    present = set(target.get(ids=changed, include=[])["ids"]) if changed else set()
+    added = sync_rows(source, target, [recipe_id for recipe_id in changed if recipe_id not in present])
+    if added:
+        print(f"  added {added} recipes written to '{current}' during the switch")
+
+    if args.drop_old:
+        client.delete_collection(current)
+        print(f"Dropped '{current}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Blue/green re-embedding of the recipe catalog from MySQL
+
+Usage:
+    python -m Backend.reembedRecipes [--model all-MiniLM-L6-v2] [--batch 256]
+    python -m Backend.reembedRecipes --rollback
+
+Builds a new ChromaDB collection from the Recipes table (the source of
+truth) with the current embedding text template (EMBEDDING_TEXT_VERSION) and
+the given model, recording both on the collection. The live collection keeps
+serving while the job runs. Search switches to the new collection only when
+every recipe is embedded, and the previous one is kept for --rollback.
+
+With EMBEDDING_SERVICE_ADDRESS set the service's model does the encoding, so
+that model is recorded and a different --model is rejected.
+"""
+import argparse
+import time
+from typing import Dict, Optional
+from Backend.database import get_db_connection, get_db_cursor
+from Backend.Routers.recipe_repo import parse_recipe_row
+from Backend.Services.recipe_embedder import (
+    RecipeVectorStore, get_chroma_client, get_embedding_model, producing_model_name, hnsw_metadata, embedding_version_metadata,
+    active_collection_name, previous_collection_name, set_active_collection,
+    EMBEDDING_MODEL_NAME, EMBEDDING_TEXT_VERSION
+)
+
+REEMBED_BATCH = 256
+
+
+class ReembedJob:
+    """Re-embeds all recipes into a new collection in keyset-paginated batches"""
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: int = REEMBED_BATCH, name: Optional[str] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.name = name or f"recipes_t{EMBEDDING_TEXT_VERSION}_{time.strftime('%Y%m%d%H%M%S')}"
+        self.store = RecipeVectorStore()
+        self.status = "pending"
+        self.total = 0
+        self.processed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def progress(self) -> Dict:
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.processed
+        return {
+            "collection": self.name,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "recipes_per_s": round(rate, 1),
+            "eta_s": round(remaining / rate, 1) if rate > 0 and self.status == "running" else None,
+            "error": self.error
+        }
+
+    def _batches(self, changed_since=None):
+        """Recipes in id order, one batch per query (WHERE id > last seen)"""
+        last_id = ""
+        while True:
+            with get_db_connection() as conn:
+                cursor = get_db_cursor(conn)
+                cursor.execute(f"""
+                    SELECT id, name, source, cuisine, description, nutrition, ingredients, tags
+                    FROM Recipes
+                    WHERE id > %s {"AND last_updated >= %s" if changed_since else ""}
+                    ORDER BY id
+                    LIMIT %s
+                """, (last_id, changed_since, self.batch_size) if changed_since else (last_id, self.batch_size))
+                rows = [parse_recipe_row(row) for row in cursor.fetchall()]
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    def _embed_batch(self, model, target, recipes):
+        ids, documents, metadatas = self.store.embedding_rows(recipes)
+        embeddings = model.encode(documents).tolist()
+        target.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def run(self, activate: bool = True) -> Dict:
+        self.status = "running"
+        self.started_at = time.monotonic()
+        target = None
+        try:
+            with get_db_connection() as conn:
+                cursor = get_db_cursor(conn)
+                cursor.execute("SELECT COUNT(*) as count, NOW() as started FROM Recipes")
+                row = cursor.fetchone()
+                self.total, db_started = row["count"], row["started"]
+
+            model = get_embedding_model(self.model_name or EMBEDDING_MODEL_NAME)
+            # Record the model that actually encodes (the service's, in service mode)
+            producing = producing_model_name(self.model_name or EMBEDDING_MODEL_NAME)
+            if self.model_name and producing != self.model_name:
+                raise ValueError(f"Embedding service encodes with {producing}, not {self.model_name}; "
+                                 f"restart it with EMBEDDING_MODEL={self.model_name} or drop --model")
+            self.model_name = producing
+            target = get_chroma_client().create_collection(
+                name=self.name,
+                metadata={
+                    "description": "Recipe embeddings for meal planning",
+                    **hnsw_metadata(),
+                    **embedding_version_metadata(self.model_name)
+                },
+                embedding_function=None
+            )
+
+            for recipes in self._batches():
+                self._embed_batch(model, target, recipes)
+                self.processed += len(recipes)
+                progress = self.progress()
+                print(f"  {self.processed}/{self.total} recipes ({progress['recipes_per_s']}/s, eta {progress['eta_s']}s)")
+            
+            # Catch up on recipes imported while the job was running
+            for recipes in self._batches(changed_since=db_started):
+                self._embed_batch(model, target, recipes)
+                print(f"  caught up {len(recipes)} recipes changed during the run")
+
+            if target.count() < self.processed:
+                raise RuntimeError(f"Collection has {target.count()} of {self.processed} embedded recipes")
+
+            if activate:
+                set_active_collection(self.name)
+            self.status = "completed"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            if target is not None and active_collection_name() != self.name:
+                get_chroma_client().delete_collection(self.name)  # never served; drop the partial build
+        finally:
+            self.finished_at = time.monotonic()
+        return self.progress()
+
+
+def rollback() -> Optional[str]:
+    """Switch search back to the previously active collection"""
+    previous = previous_collection_name()
+    if previous:
+        get_chroma_client().get_collection(previous)  # fail early if it was dropped
+        set_active_collection(previous)
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help=f"Embedding model (default {EMBEDDING_MODEL_NAME}, or the embedding service's)")
+    parser.add_argument("--batch", type=int, default=REEMBED_BATCH)
+    parser.add_argument("--name", help="New collection name")
+    parser.add_argument("--no-activate", action="store_true", help="Build only; switch later with rebuildVectorCollection --activate")
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previous collection")
+    args = parser.parse_args()
+
+    if args.rollback:
+        current = active_collection_name()
+        previous = rollback()
+        print(f"✅ Active collection: {current} -> {previous}" if previous else "❌ No previous collection recorded")
+        return
+
+    job = ReembedJob(args.model, args.batch, args.name)
+    print(f"Re-embedding recipes into '{job.name}' (model {args.model or 'default'}, text v{EMBEDDING_TEXT_VERSION}); "
+          f"'{active_collection_name()}' keeps serving")
+    result = job.run(activate=not args.no_activate)
+    if result["status"] != "completed":
+        raise SystemExit(f"❌ Re-embed failed: {result['error']}; '{active_collection_name()}' stays active")
+    print(f"✅ {result['processed']} recipes embedded with {job.model_name} at {result['recipes_per_s']}/s; active collection: {active_collection_name()}")
+
+
+if __name__ == "__main__":
+    main()
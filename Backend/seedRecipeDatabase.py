@@ -1,7 +1,7 @@
 import asyncio
+import os
 import sys
 from Backend.Routers.recipe_repo import RecipeRepository
-from Backend.Services.recipe_embedder import RecipeVectorStore
 
 async def seed_recipe_database(user_goal: str = "lose_fat"):
     """
@@ -19,7 +19,7 @@ async def seed_recipe_database(user_goal: str = "lose_fat"):
     - Run full seed across all goals and cuisines
     """
     repo = RecipeRepository()
-    vector_store = RecipeVectorStore()
+    vector_store = repo.vector_store
     
     # Validate user goal
     valid_goals = ["lose_fat", "gain_muscle", "maintain"]
@@ -105,6 +105,10 @@ async def seed_recipe_database(user_goal: str = "lose_fat"):
 
 if __name__ == "__main__":
     # Allow passing user goal as command line argument
-    # Usage: python -m Backend.seedRecipeDatabase [lose_fat|gain_muscle|maintain]
-    user_goal = sys.argv[1] if len(sys.argv) > 1 else "lose_fat"
+    # Usage: python -m Backend.seedRecipeDatabase [lose_fat|gain_muscle|maintain] [--replay]
+    # --replay serves provider responses from the on-disk HTTP cache only (no network)
+    args = [arg for arg in sys.argv[1:] if arg != "--replay"]
+    if "--replay" in sys.argv:
+        os.environ["HTTP_CACHE_MODE"] = "replay"
+    user_goal = args[0] if args else "lose_fat"
     asyncio.run(seed_recipe_database(user_goal))
\ No newline at end of file
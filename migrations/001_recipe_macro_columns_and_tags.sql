@@ -0,0 +1,65 @@
+-- Indexed nutrition columns and a normalized tag table for Recipes
+--
+-- Apply once to an existing database (requires MySQL 8.0.21+ for JSON_VALUE):
+--     mysql GardenOfEaten < migrations/001_recipe_macro_columns_and_tags.sql
+--
+-- calories/protein/carbs/fat are STORED generated columns extracted from the
+-- nutrition JSON, so MySQL keeps them in step with every write and the macro
+-- filters can use indexes. RecipeTags is maintained from Recipes.tags by
+-- triggers, so no write path has to change.
+USE GardenOfEaten;
+
+ALTER TABLE Recipes
+    ADD COLUMN calories FLOAT
+        AS (JSON_VALUE(nutrition, '$.calories' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    ADD COLUMN protein FLOAT
+        AS (JSON_VALUE(nutrition, '$.protein' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    ADD COLUMN carbs FLOAT
+        AS (JSON_VALUE(nutrition, '$.carbs' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    ADD COLUMN fat FLOAT
+        AS (JSON_VALUE(nutrition, '$.fat' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    ADD INDEX idx_recipes_cuisine_calories (cuisine, calories),
+    ADD INDEX idx_recipes_protein (protein);
+
+-- RecipeTags table (one row per lower-cased tag)
+CREATE TABLE IF NOT EXISTS RecipeTags (
+    recipe_id VARCHAR(255) NOT NULL,
+    tag VARCHAR(255) NOT NULL,
+    PRIMARY KEY (tag, recipe_id),
+    INDEX idx_recipe_tags_recipe (recipe_id),
+    FOREIGN KEY (recipe_id) REFERENCES Recipes(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO RecipeTags (recipe_id, tag)
+SELECT r.id, LOWER(t.tag)
+FROM Recipes r,
+     JSON_TABLE(COALESCE(r.tags, JSON_ARRAY()), '$[*]' COLUMNS (tag VARCHAR(255) PATH '$')) t
+WHERE t.tag IS NOT NULL AND t.tag <> '';
+
+DROP TRIGGER IF EXISTS recipes_tags_after_insert;
+DROP TRIGGER IF EXISTS recipes_tags_after_update;
+
+DELIMITER //
+
+CREATE TRIGGER recipes_tags_after_insert AFTER INSERT ON Recipes
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO RecipeTags (recipe_id, tag)
+    SELECT NEW.id, LOWER(t.tag)
+    FROM JSON_TABLE(COALESCE(NEW.tags, JSON_ARRAY()), '$[*]' COLUMNS (tag VARCHAR(255) PATH '$')) t
+    WHERE t.tag IS NOT NULL AND t.tag <> '';
+END//
+
+CREATE TRIGGER recipes_tags_after_update AFTER UPDATE ON Recipes
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.tags <=> OLD.tags) THEN
+        DELETE FROM RecipeTags WHERE recipe_id = NEW.id;
+        INSERT IGNORE INTO RecipeTags (recipe_id, tag)
+        SELECT NEW.id, LOWER(t.tag)
+        FROM JSON_TABLE(COALESCE(NEW.tags, JSON_ARRAY()), '$[*]' COLUMNS (tag VARCHAR(255) PATH '$')) t
+        WHERE t.tag IS NOT NULL AND t.tag <> '';
+    END IF;
+END//
+
+DELIMITER ;
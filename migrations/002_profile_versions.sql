@@ -0,0 +1,29 @@
+-- Profile versions and history snapshots for PATCH /users/{user_id}
+--
+-- Apply once to an existing database:
+--     mysql GardenOfEaten < migrations/002_profile_versions.sql
+--
+-- User.Profile_version is incremented by every profile update that changes
+-- something. Before a section table is updated its current row is copied
+-- into the matching *History table together with the version it belonged
+-- to; Replaced_at records when it was superseded.
+USE GardenOfEaten;
+
+ALTER TABLE User
+    ADD COLUMN Profile_version INT NOT NULL DEFAULT 1;
+
+ALTER TABLE UserNutritionProfileHistory
+    ADD COLUMN Profile_version INT NULL,
+    ADD COLUMN Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE UserPreferencesHistory
+    ADD COLUMN Profile_version INT NULL,
+    ADD COLUMN Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE UserInsightsHistory
+    ADD COLUMN Profile_version INT NULL,
+    ADD COLUMN Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE UserFridgeContentsHistory
+    ADD COLUMN Profile_version INT NULL,
+    ADD COLUMN Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP;
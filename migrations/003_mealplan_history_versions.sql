@@ -0,0 +1,14 @@
+-- Version tokens for GET /users/{user_id}/mealplans (ETag / If-None-Match)
+--
+-- Apply once to an existing database:
+--     mysql GardenOfEaten < migrations/003_mealplan_history_versions.sql
+--
+-- updated_at changes on every write to a row (feedback included), so a
+-- history page's version is COUNT/MAX(id)/MAX(updated_at) over the page,
+-- answered from the (User_id, created_at) index and the page rows without
+-- reading the JSON columns.
+USE GardenOfEaten;
+
+ALTER TABLE MealPlanHistory
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_mealplan_history_user_created (User_id, created_at);
@@ -0,0 +1,18 @@
+-- Meal plans precomputed off-peak (Agents/plan_precompute.py)
+--
+-- Apply once to an existing database:
+--     mysql GardenOfEaten < migrations/004_pending_meal_plans.sql
+--
+-- At most one pending plan per user. It records the Profile_version it was
+-- generated from; POST /users/{user_id}/mealplans serves it only while the
+-- profile is still at that version and the plan is recent enough, then
+-- moves it into MealPlanHistory like a freshly generated plan.
+USE GardenOfEaten;
+
+CREATE TABLE IF NOT EXISTS PendingMealPlans (
+    User_id INT PRIMARY KEY,
+    Profile_version INT NOT NULL,
+    Generated_meals JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
+);
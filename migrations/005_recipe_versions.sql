@@ -0,0 +1,12 @@
+-- Version token for GET /recipes/{recipe_id} (ETag / If-None-Match)
+--
+-- Apply once to an existing database:
+--     mysql GardenOfEaten < migrations/005_recipe_versions.sql
+--
+-- The ETag is built from last_updated, read with one primary key lookup
+-- before the recipe is fetched. Microsecond precision keeps two writes in
+-- the same second from sharing a version.
+USE GardenOfEaten;
+
+ALTER TABLE Recipes
+    MODIFY COLUMN last_updated DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
@@ -12,7 +12,8 @@ CREATE TABLE IF NOT EXISTS User (
     Goals JSON NOT NULL,
     Budget_weekly INT NULL,
     Scheduling_constraints JSON NULL,
-    Equipment_available JSON NULL
+    Equipment_available JSON NULL,
+    Profile_version INT NOT NULL DEFAULT 1
 );
 
 -- UserNutritionProfile table
@@ -57,6 +58,8 @@ CREATE TABLE IF NOT EXISTS UserInsightsHistory (
     Health_conditions JSON NULL,
     Energy_levels VARCHAR(255) NULL,
     User_id INT NOT NULL,
+    Profile_version INT NULL,
+    Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
 );
 
@@ -69,6 +72,8 @@ CREATE TABLE IF NOT EXISTS UserNutritionProfileHistory (
     Allergies JSON NULL,
     Dietary_identities JSON NULL,
     User_id INT NOT NULL,
+    Profile_version INT NULL,
+    Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
 );
 
@@ -80,6 +85,8 @@ CREATE TABLE IF NOT EXISTS UserPreferencesHistory (
     Meal_frequency INT NOT NULL,
     Snack_preference BOOLEAN NULL,
     User_id INT NOT NULL,
+    Profile_version INT NULL,
+    Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
 );
 
@@ -96,6 +103,8 @@ CREATE TABLE IF NOT EXISTS UserFridgeContentsHistory (
     id INT AUTO_INCREMENT PRIMARY KEY,
     Ingredients_on_hand JSON NULL,
     user_id INT NOT NULL,
+    Profile_version INT NULL,
+    Replaced_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES User(id) ON DELETE CASCADE
 );
 
@@ -108,6 +117,8 @@ CREATE TABLE IF NOT EXISTS MealPlanHistory (
     User_feedback JSON NULL,
     Energy_levels VARCHAR(255) NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_mealplan_history_user_created (User_id, created_at),
     FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
 );
 
@@ -125,10 +136,63 @@ CREATE TABLE IF NOT EXISTS Recipes (
     popularity_score INT DEFAULT 0,
     created_by INT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    last_updated DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    -- Macros extracted from nutrition so SQL filters can use indexes
+    calories FLOAT AS (JSON_VALUE(nutrition, '$.calories' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    protein FLOAT AS (JSON_VALUE(nutrition, '$.protein' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    carbs FLOAT AS (JSON_VALUE(nutrition, '$.carbs' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    fat FLOAT AS (JSON_VALUE(nutrition, '$.fat' RETURNING DOUBLE NULL ON EMPTY NULL ON ERROR)) STORED,
+    INDEX idx_recipes_cuisine_calories (cuisine, calories),
+    INDEX idx_recipes_protein (protein),
     FOREIGN KEY (created_by) REFERENCES User(id) ON DELETE SET NULL
 );
 
+-- RecipeTags table (lower-cased Recipes.tags, maintained by the triggers below)
+CREATE TABLE IF NOT EXISTS RecipeTags (
+    recipe_id VARCHAR(255) NOT NULL,
+    tag VARCHAR(255) NOT NULL,
+    PRIMARY KEY (tag, recipe_id),
+    INDEX idx_recipe_tags_recipe (recipe_id),
+    FOREIGN KEY (recipe_id) REFERENCES Recipes(id) ON DELETE CASCADE
+);
+
+DROP TRIGGER IF EXISTS recipes_tags_after_insert;
+DROP TRIGGER IF EXISTS recipes_tags_after_update;
+
+DELIMITER //
+
+CREATE TRIGGER recipes_tags_after_insert AFTER INSERT ON Recipes
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO RecipeTags (recipe_id, tag)
+    SELECT NEW.id, LOWER(t.tag)
+    FROM JSON_TABLE(COALESCE(NEW.tags, JSON_ARRAY()), '$[*]' COLUMNS (tag VARCHAR(255) PATH '$')) t
+    WHERE t.tag IS NOT NULL AND t.tag <> '';
+END//
+
+CREATE TRIGGER recipes_tags_after_update AFTER UPDATE ON Recipes
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.tags <=> OLD.tags) THEN
+        DELETE FROM RecipeTags WHERE recipe_id = NEW.id;
+        INSERT IGNORE INTO RecipeTags (recipe_id, tag)
+        SELECT NEW.id, LOWER(t.tag)
+        FROM JSON_TABLE(COALESCE(NEW.tags, JSON_ARRAY()), '$[*]' COLUMNS (tag VARCHAR(255) PATH '$')) t
+        WHERE t.tag IS NOT NULL AND t.tag <> '';
+    END IF;
+END//
+
+DELIMITER ;
+
+-- PendingMealPlans table (plans precomputed off-peak, served while Profile_version matches)
+CREATE TABLE IF NOT EXISTS PendingMealPlans (
+    User_id INT PRIMARY KEY,
+    Profile_version INT NOT NULL,
+    Generated_meals JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (User_id) REFERENCES User(id) ON DELETE CASCADE
+);
+
 -- RecipeUsage table (track which recipes were used in meal plans)
 CREATE TABLE IF NOT EXISTS RecipeUsage (
     id BIGINT AUTO_INCREMENT PRIMARY KEY,
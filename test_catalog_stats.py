@@ -0,0 +1,63 @@
+"""
+Unit tests for the in-memory catalog statistics
+
+Run with: python -m pytest -q test_catalog_stats.py
+"""
+import datetime
+from Backend.Services.catalog_stats import CatalogStats
+
+SYNCED = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+
+
+def loaded_stats() -> CatalogStats:
+    stats = CatalogStats()
+    stats.load([
+        {"source": "spoonacular", "cuisine": "Italian", "count": 3, "last_updated": SYNCED},
+        {"source": "spoonacular", "cuisine": None, "count": 1, "last_updated": SYNCED},
+        {"source": "edamam", "cuisine": "Thai", "count": 2, "last_updated": None},
+    ])
+    return stats
+
+
+def test_load_aggregates_group_by_rows():
+    snapshot = loaded_stats().snapshot()
+    assert snapshot["total"] == 6
+    assert snapshot["by_source"] == {"spoonacular": 4, "edamam": 2}
+    assert snapshot["by_cuisine"] == {"Italian": 3, "Thai": 2, "General": 1}
+    assert snapshot["last_sync"] == {"spoonacular": SYNCED.isoformat()}
+
+
+def test_record_upsert_counts_new_recipes_once():
+    stats = loaded_stats()
+    new = {"id": "r9", "source": "edamam", "cuisine": "Thai"}
+    stats.record_upsert([new, new], existing={})
+    assert stats.total == 7
+    assert stats.by_source["edamam"] == 3 and stats.by_cuisine["Thai"] == 3
+    assert "edamam" in stats.last_sync
+
+
+def test_record_upsert_moves_updated_recipes_between_buckets():
+    stats = loaded_stats()
+    stats.record_upsert(
+        [{"id": "r1", "source": "edamam", "cuisine": "Korean"}],
+        existing={"r1": {"source": "spoonacular", "cuisine": None}}
+    )
+    snapshot = stats.snapshot()
+    assert snapshot["total"] == 6
+    assert snapshot["by_source"] == {"spoonacular": 3, "edamam": 3}
+    assert snapshot["by_cuisine"] == {"Italian": 3, "Thai": 2, "Korean": 1}
+
+
+def test_missing_source_and_cuisine_use_the_defaults():
+    stats = CatalogStats()
+    stats.record_upsert([{"id": "u1", "cuisine": ""}], existing={})
+    assert stats.snapshot()["by_source"] == {"user_generated": 1}
+    assert stats.snapshot()["by_cuisine"] == {"General": 1}
+
+
+def test_stale_until_loaded_and_after_refresh_s():
+    assert CatalogStats().is_stale
+    assert not loaded_stats().is_stale
+    stats = CatalogStats(refresh_s=0)
+    stats.load([])
+    assert stats.is_stale
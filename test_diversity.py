@@ -0,0 +1,40 @@
+"""
+Unit tests for MMR re-ranking of search candidates
+
+Run with: python -m pytest -q test_diversity.py
+"""
+import numpy as np
+from Backend.Services.diversity import mmr_rerank
+
+QUERY = np.array([1.0, 0.0, 0.0])
+# Two near-duplicates closest to the query, then a distinct but less relevant dish
+CANDIDATES = np.array([
+    [0.95, 0.31, 0.0],
+    [0.94, 0.34, 0.0],
+    [0.80, 0.0, 0.60],
+    [0.10, 0.99, 0.0],
+])
+
+
+def test_lambda_one_is_nearest_neighbour_order():
+    assert mmr_rerank(QUERY, CANDIDATES, 4, lambda_mult=1.0) == [0, 1, 2, 3]
+
+
+def test_lower_lambda_skips_near_duplicates():
+    assert mmr_rerank(QUERY, CANDIDATES, 2, lambda_mult=0.5) == [0, 2]
+
+
+def test_selection_is_unique_and_capped_at_the_candidates():
+    order = mmr_rerank(QUERY, CANDIDATES, 10, lambda_mult=0.0)
+    assert sorted(order) == [0, 1, 2, 3]
+    assert mmr_rerank(QUERY, CANDIDATES, 0) == []
+    assert mmr_rerank(QUERY, np.empty((0, 3)), 3) == []
+
+
+def test_precomputed_relevance_overrides_similarity():
+    relevance = np.array([0.0, 0.0, 0.0, 5.0])
+    assert mmr_rerank(QUERY, CANDIDATES, 1, relevance=relevance) == [3]
+
+
+def test_unnormalized_vectors_rank_like_unit_vectors():
+    assert mmr_rerank(QUERY * 7, CANDIDATES * 3, 4, 0.5) == mmr_rerank(QUERY, CANDIDATES, 4, 0.5)
@@ -0,0 +1,110 @@
+"""
+Unit tests for the ETag helpers and recipe revalidation (no MySQL needed)
+
+Run with: python -m pytest -q test_etag.py
+"""
+import datetime
+import json
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from Backend.Routers import recipe_repo as recipe_repo_module
+from Backend.Routers.api import recipe_repo
+from Backend.Routers.responses import make_etag, etag_matches, etag_headers, not_modified
+from Backend.main import app
+
+V1 = datetime.datetime(2026, 10, 1, 12, 0, 0, 1)
+V2 = datetime.datetime(2026, 10, 1, 12, 0, 0, 2)
+
+
+def test_make_etag_is_weak_and_stable():
+    etag = make_etag("recipe", "r1", V1, ["name"])
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == make_etag("recipe", "r1", V1, ["name"])
+    assert etag != make_etag("recipe", "r1", V2, ["name"])
+    assert etag != make_etag("recipe", "r1", V1, [])
+    assert make_etag(b"body") != make_etag("body")
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = make_etag("user", 1, 3)
+    opaque = etag.removeprefix("W/")
+    assert etag_matches(etag, etag)
+    assert etag_matches(opaque, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('W/"other"', etag)
+
+
+def test_not_modified_carries_validators():
+    etag = make_etag("user", 1, 3)
+    response = not_modified(etag)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == etag_headers(etag)["Cache-Control"]
+
+
+class FakeRecipes:
+    """Recipes table stand-in behind get_db_connection"""
+
+    def __init__(self):
+        self.rows = {"r1": {"id": "r1", "name": "Shakshuka", "cuisine": "Levantine", "description": "",
+                            "nutrition": json.dumps({"calories": 520}), "ingredients": json.dumps(["eggs"]),
+                            "instructions": "", "tags": json.dumps([]), "last_updated": V1}}
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.queries.append(" ".join(sql.split()))
+        self.result = [dict(self.rows[recipe_id]) for recipe_id in params if recipe_id in self.rows]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+@pytest.fixture
+def recipes(monkeypatch):
+    fake = FakeRecipes()
+    monkeypatch.setattr(recipe_repo_module, "get_db_connection", fake.connection)
+    monkeypatch.setattr(recipe_repo_module, "get_db_cursor", lambda conn: conn.cursor())
+    recipe_repo.recipe_cache.clear()
+    yield fake
+    recipe_repo.recipe_cache.clear()
+
+
+def test_get_recipe_revalidates_before_fetching(recipes):
+    client = TestClient(app)
+    first = client.get("/recipes/r1")
+    assert first.status_code == 200
+    assert "last_updated" not in first.json()["recipe"]
+    etag = first.headers["ETag"]
+
+    recipes.queries.clear()
+    second = client.get("/recipes/r1", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert recipes.queries == ["SELECT last_updated FROM Recipes WHERE id = %s"]
+
+    assert client.get("/recipes/r1?fields=name", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/recipes/missing").status_code == 404
+
+
+def test_newer_version_replaces_a_stale_cached_row(recipes):
+    client = TestClient(app)
+    etag = client.get("/recipes/r1").headers["ETag"]
+
+    # Written by another worker: this process's cache still holds the old row
+    recipes.rows["r1"].update(name="Green Shakshuka", last_updated=V2)
+    response = client.get("/recipes/r1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["recipe"]["name"] == "Green Shakshuka"
+    assert response.headers["ETag"] != etag
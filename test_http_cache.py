@@ -0,0 +1,84 @@
+"""
+Unit tests for the provider response cache and its replay mode (no network)
+
+Run with: python -m pytest -q test_http_cache.py
+"""
+import asyncio
+import pytest
+from Backend.Services.http_cache import HttpCache, CacheMiss, request_key
+
+URL = "https://api.example.com/recipes/complexSearch"
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeClient:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append({"url": url, "params": params, "headers": headers or {}})
+        return self.responses.pop(0)
+
+
+def get(cache, client, params, **kwargs):
+    return asyncio.run(cache.get(client, URL, params, secret_params=["apiKey"], **kwargs))
+
+
+def test_request_key_ignores_order_credentials_and_empty_params():
+    key = request_key(URL, {"query": "curry", "number": 10, "apiKey": "a"}, exclude=["apiKey"])
+    assert key == request_key(URL, {"number": "10", "query": "curry", "apiKey": "b", "diet": None}, exclude=["apiKey"])
+    assert key != request_key(URL, {"query": "curry", "number": 20}, exclude=["apiKey"])
+    assert request_key(URL, {"flag": True}) == request_key(URL, {"flag": "true"})
+
+
+def test_replay_serves_recorded_responses_without_the_network(tmp_path):
+    recorder = HttpCache(str(tmp_path), mode="refresh")
+    get(recorder, FakeClient(FakeResponse(200, '{"results": [1]}')), {"query": "curry", "apiKey": "secret"})
+
+    replay = HttpCache(str(tmp_path), mode="replay")
+    offline = FakeClient()
+    response = get(replay, offline, {"apiKey": "other", "query": "curry"})
+    assert response.from_cache and response.json() == {"results": [1]}
+    assert offline.requests == []
+
+    with pytest.raises(CacheMiss):
+        get(replay, offline, {"query": "ramen", "apiKey": "other"})
+    assert offline.requests == []
+    assert replay.stats()["hits"] == 1 and replay.stats()["misses"] == 1
+
+
+def test_stale_entries_are_revalidated_with_their_etag(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl_s=0, mode="on")
+    client = FakeClient(FakeResponse(200, '{"v": 1}', {"etag": '"abc"'}), FakeResponse(304))
+    assert not get(cache, client, {"query": "curry"}).from_cache
+
+    response = get(cache, client, {"query": "curry"})
+    assert response.from_cache and response.json() == {"v": 1}
+    assert client.requests[1]["headers"] == {"If-None-Match": '"abc"'}
+    assert cache.revalidated == 1
+
+
+def test_fresh_entries_are_served_and_errors_are_not_stored(tmp_path):
+    cache = HttpCache(str(tmp_path), mode="on")
+    client = FakeClient(FakeResponse(500), FakeResponse(200, "{}"))
+    with pytest.raises(RuntimeError):
+        get(cache, client, {"query": "curry"})
+    get(cache, client, {"query": "curry"})
+    assert get(cache, client, {"query": "curry"}).from_cache
+    assert len(client.requests) == 2
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        HttpCache(str(tmp_path), mode="record")
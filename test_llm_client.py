@@ -0,0 +1,102 @@
+"""
+Unit tests for the LLM client's circuit breaker and retry loop (no network)
+
+Run with: python -m pytest -q test_llm_client.py
+"""
+import asyncio
+from types import SimpleNamespace
+from Backend.Agents.llm_client import CircuitBreaker, LLMClient, LOCAL_MODEL
+from Backend.Agents.prompt_builder import ContextCache, MealPlanPrompt
+
+
+def expire(breaker: CircuitBreaker):
+    """Pretend reset_s has passed since the circuit opened"""
+    breaker.opened_at -= breaker.reset_s
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(threshold=2, reset_s=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(threshold=1, reset_s=30)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes_the_circuit():
+    breaker = CircuitBreaker(threshold=1, reset_s=30)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens_the_circuit():
+    breaker = CircuitBreaker(threshold=3, reset_s=30)
+    for _ in range(3):
+        breaker.record_failure()
+    expire(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_lost_probe_is_given_up_after_reset_s():
+    breaker = CircuitBreaker(threshold=1, reset_s=30)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.allow()
+    breaker.probe_started_at -= breaker.reset_s
+    assert breaker.allow()
+
+
+class FailingModel:
+    calls = []
+
+    def __init__(self, model_name: str, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, contents, **kwargs):
+        FailingModel.calls.append(self.model_name)
+        raise RuntimeError("503 Service Unavailable")
+
+
+def failing_genai():
+    return SimpleNamespace(GenerativeModel=FailingModel)
+
+
+def test_open_breaker_stops_retries_and_falls_back():
+    FailingModel.calls = []
+    client = LLMClient(
+        failing_genai, ContextCache(min_tokens=10 ** 9), models=["primary", "fallback"],
+        deadline_s=5, attempt_timeout_s=1, fallback_reserve_s=1, max_retries=3, backoff_base_s=0.01
+    )
+    for model_name in ("primary", "fallback"):
+        client._model_stats(model_name).breaker.threshold = 1
+
+    result = asyncio.run(client.generate(MealPlanPrompt("RECIPES:", "USER: {}", {}, 0), 3))
+
+    # One attempt per model: the first failure opens its circuit, so no retries
+    assert FailingModel.calls == ["primary", "fallback"]
+    assert result["model"] == LOCAL_MODEL
+
+
+def test_retries_back_off_while_the_breaker_allows():
+    FailingModel.calls = []
+    client = LLMClient(
+        failing_genai, ContextCache(min_tokens=10 ** 9), models=["primary"],
+        deadline_s=5, attempt_timeout_s=1, max_retries=2, backoff_base_s=0.01
+    )
+    asyncio.run(client.generate(MealPlanPrompt("RECIPES:", "USER: {}", {}, 0), 3))
+    assert FailingModel.calls == ["primary"] * 3
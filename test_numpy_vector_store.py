@@ -0,0 +1,97 @@
+"""
+Unit tests for the in-process NumpyVectorIndex (filter masks, upserts, persistence)
+
+Run with: python -m pytest -q test_numpy_vector_store.py
+"""
+import numpy as np
+import pytest
+from Backend.Services.numpy_vector_store import NumpyVectorIndex
+
+DIM = 4
+
+
+def recipe(recipe_id, cuisine, calories, protein, tags=""):
+    return {"recipe_id": recipe_id, "name": recipe_id.title(), "cuisine": cuisine, "source": "spoonacular",
+            "calories": calories, "protein": protein, "carbs": 40, "fat": 10, "tags": tags}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path), dim=DIM)
+    metadatas = [
+        recipe("pad thai", "Thai", 650, 20, "Dinner,Peanuts"),
+        recipe("green curry", "Thai", 450, 28, "Dinner,Spicy"),
+        recipe("risotto", "Italian", 550, 15, "Vegetarian"),
+        recipe("minestrone", "Italian", 300, 12, "Vegetarian,Vegan"),
+    ]
+    index.upsert(
+        [m["recipe_id"] for m in metadatas],
+        np.eye(DIM, dtype=np.float32),
+        metadatas,
+        ["Rice noodles, PEANUTS, egg", "Coconut milk, chicken", "Arborio rice, parmesan", "Beans, pasta"]
+    )
+    return index
+
+
+def ids(index, mask):
+    return [index.ids[row] for row in np.flatnonzero(mask)]
+
+
+def test_where_masks_combine_numeric_and_categorical_columns(index):
+    assert ids(index, index.mask_for({"calories": {"$lte": 500}})) == ["green curry", "minestrone"]
+    where = {"$and": [{"cuisine": {"$in": ["Thai", "Korean"]}}, {"protein": {"$gte": 25}}]}
+    assert ids(index, index.mask_for(where)) == ["green curry"]
+    where = {"$or": [{"cuisine": "Italian"}, {"calories": {"$gt": 600}}]}
+    assert ids(index, index.mask_for(where)) == ["pad thai", "risotto", "minestrone"]
+    assert not index.mask_for({"cuisine": {"$eq": "French"}}).any()
+    assert index.mask_for(None).all()
+    with pytest.raises(ValueError):
+        index.mask_for({"servings": {"$gt": 2}})
+
+
+def test_tag_and_allergen_masks(index):
+    assert ids(index, index.tag_mask(required=["vegetarian"], excluded=["VEGAN"])) == ["risotto"]
+    assert not index.tag_mask(required=["keto"]).any()
+    assert ids(index, index.exclude_terms_mask(["Peanuts", "chicken"])) == ["risotto", "minestrone"]
+
+
+def test_search_honours_mask_and_boost(index):
+    query = np.array([1.0, 0.9, 0.0, 0.0])
+    rows, _ = index.search(query, 2)
+    assert [index.ids[row] for row in rows] == ["pad thai", "green curry"]
+
+    rows, _ = index.search(query, 2, mask=index.mask_for({"cuisine": "Italian"}))
+    assert [index.ids[row] for row in rows] == ["risotto", "minestrone"]
+
+    boost = np.where(index.mask_for({"cuisine": "Italian"}), 2.0, 0.0).astype(np.float32)
+    rows, scores = index.search(query, 3, boost=boost)
+    assert sorted(index.ids[row] for row in rows[:2]) == ["minestrone", "risotto"]
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_upsert_overwrites_existing_rows_in_place(index):
+    index.upsert(
+        ["risotto", "shakshuka"],
+        np.array([[0, 0, 0, 3.0], [0, 0, 1.0, 0]], dtype=np.float32),
+        [recipe("risotto", "Italian", 700, 22, "Dinner"), recipe("shakshuka", "Levantine", 400, 25, "Breakfast")],
+        ["Arborio rice, butter", "Eggs, tomatoes"]
+    )
+    assert index.count == 5
+    assert index.ids == ["pad thai", "green curry", "risotto", "minestrone", "shakshuka"]
+    row = index.ids.index("risotto")
+    assert index.metadata(row)["calories"] == 700
+    assert index.metadata(row)["tags"] == "Dinner"
+    assert np.allclose(index.embeddings(np.array([row])), [[0, 0, 0, 1.0]], atol=1e-3)
+    assert ids(index, index.tag_mask(required=["vegetarian"])) == ["minestrone"]
+
+
+def test_rows_survive_a_reload_and_deferred_saves(tmp_path, index):
+    with index.deferred_saves():
+        index.upsert(["salad"], np.ones((1, DIM), dtype=np.float32), [recipe("salad", "Greek", 250, 8)], ["Feta"])
+        assert index.unsaved_rows == 1
+    assert index.unsaved_rows == 0
+
+    reloaded = NumpyVectorIndex(str(tmp_path), dim=DIM)
+    assert reloaded.ids == index.ids
+    assert reloaded.metadata(reloaded.ids.index("salad")) == index.metadata(index.ids.index("salad"))
+    assert ids(reloaded, reloaded.mask_for({"cuisine": "Greek"})) == ["salad"]
@@ -0,0 +1,89 @@
+"""
+Unit tests for the typeahead PrefixIndex
+
+Run with: python -m pytest -q test_prefix_index.py
+"""
+import random
+from Backend.Services import prefix_index as prefix_index_module
+from Backend.Services.prefix_index import PrefixIndex, normalize_text, recipe_terms
+
+RECIPES = [
+    {"id": "r1", "name": "Chicken Tikka Masala", "ingredients": ["chicken thigh", "garam masala"], "popularity_score": 5},
+    {"id": "r2", "name": "Crème Brûlée", "ingredients": ["cream", "sugar"], "popularity_score": 9},
+    {"id": "r3", "name": "Three Cheese Omelette", "ingredients": ["eggs", "cheddar cheese"], "popularity_score": 5},
+    {"id": "r4", "name": "Butter Chicken", "ingredients": ["chicken", "butter", "cream"], "popularity_score": 1},
+]
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_normalize_text_strips_accents_and_punctuation():
+    assert normalize_text("Crème Brûlée (Easy!)") == "creme brulee easy"
+    assert normalize_text(None) == ""
+
+
+def test_recipe_terms_rank_name_prefixes_above_words_and_ingredients():
+    terms = recipe_terms("Butter Chicken", ["chicken", "butter"])
+    assert terms["butter chicken"] == prefix_index_module.NAME_BONUS
+    assert terms["chicken"] == prefix_index_module.NAME_WORD_BONUS
+    assert terms["butter"] == prefix_index_module.INGREDIENT_BONUS
+
+
+def test_suggest_orders_by_popularity_then_match_kind():
+    index = PrefixIndex()
+    index.build(RECIPES)
+    assert ids(index.suggest("cre")) == ["r2", "r4"]
+    # Same popularity: the name prefix beats a later name word
+    assert ids(index.suggest("ch")) == ["r1", "r3", "r4"]
+    assert index.suggest("chick", limit=1)[0]["match"] == "chicken tikka masala"
+    assert index.suggest("Crème")[0]["name"] == "Crème Brûlée"
+    assert index.suggest("zucchini") == [] and index.suggest("  ") == []
+
+
+def test_replacing_a_recipe_drops_its_old_terms_and_keeps_popularity():
+    index = PrefixIndex()
+    index.build(RECIPES)
+    index.add_recipes([{"id": "r3", "name": "Spanish Omelette", "ingredients": ["potato"], "popularity_score": 0}])
+    assert "r3" not in ids(index.suggest("ched"))
+    assert index.suggest("spanish") == [{"id": "r3", "name": "Spanish Omelette", "popularity_score": 5,
+                                         "match": "spanish omelette"}]
+    assert len(index) == 4
+
+
+def test_popularity_bumps_reorder_cached_short_prefixes():
+    index = PrefixIndex()
+    index.build(RECIPES)
+    assert ids(index.suggest("bu"))[0] == "r4"
+    assert ids(index.suggest("ch"))[-1] == "r4"
+    index.bump_popularity(["r4"], 10)
+    assert ids(index.suggest("ch"))[0] == "r4"
+    assert index.suggest("ch")[0]["popularity_score"] == 11
+
+
+def test_broad_ranges_match_a_full_scan(monkeypatch):
+    monkeypatch.setattr(prefix_index_module, "BLOCK_SIZE", 4)
+    monkeypatch.setattr(prefix_index_module, "DIRECT_RANGE", 8)
+    monkeypatch.setattr(prefix_index_module, "HEAD_BLOCKS", 2)
+    rng = random.Random(7)
+    words = ["salmon", "salad", "salsa", "saffron", "sage", "sausage", "spinach", "squash"]
+    recipes = [{
+        "id": f"r{i}",
+        "name": " ".join(rng.sample(words, 2)),
+        "ingredients": rng.sample(words, 3),
+        "popularity_score": rng.randrange(50)
+    } for i in range(300)]
+    index = PrefixIndex()
+    index.build(recipes[:200])
+    index.add_recipes(recipes[200:])
+
+    for prefix in ("s", "sa", "sal", "sq"):
+        expected = {}
+        for recipe in recipes:
+            for term, bonus in recipe_terms(recipe["name"], recipe["ingredients"]).items():
+                if term.startswith(prefix):
+                    expected[recipe["id"]] = max(expected.get(recipe["id"], -1), recipe["popularity_score"] + bonus)
+        results = index.suggest(prefix, limit=10)
+        scores = sorted(expected.values(), reverse=True)[:10]
+        assert [expected[result["id"]] for result in results] == scores
@@ -0,0 +1,58 @@
+"""
+Unit tests for prompt token budgeting and its calibration against count_tokens
+
+Run with: python -m pytest -q test_prompt_builder.py
+"""
+from types import SimpleNamespace
+from Backend.Agents.fake_model import FakeGenerativeModel
+from Backend.Agents.prompt_builder import PromptBuilder, estimate_tokens
+
+RECIPES = [
+    {"id": f"recipe-{i}", "name": f"Recipe {i}", "cuisine": "Italian",
+     "nutrition": {"calories": 500, "protein": 30, "carbs": 40, "fat": 15}}
+    for i in range(40)
+]
+USER = {"goal": "maintain", "meals_per_day": 3}
+
+
+class DenseTokenizerModel:
+    """Counts twice as many tokens as the ~4 chars/token estimate"""
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=2 * estimate_tokens(contents))
+
+
+class UnavailableModel:
+    def count_tokens(self, contents):
+        raise RuntimeError("503 Service Unavailable")
+
+
+def test_estimate_scales_by_ratio():
+    assert estimate_tokens("x" * 40) == 10
+    assert estimate_tokens("x" * 40, 1.5) == 15
+    assert estimate_tokens("") == 1
+
+
+def test_calibration_with_a_matching_tokenizer_keeps_the_estimate():
+    builder = PromptBuilder(token_budget=300)
+    prompt = builder.build(RECIPES, USER)
+    assert builder.calibrate(FakeGenerativeModel(), prompt) == 1.0
+    assert builder.calibrated
+    assert builder.build(RECIPES, USER).tokens == prompt.tokens
+
+
+def test_calibration_shrinks_the_catalog_when_the_model_counts_more():
+    builder = PromptBuilder(token_budget=300)
+    before = builder.build(RECIPES, USER)
+    assert builder.calibrate(DenseTokenizerModel(), before) == 2.0
+
+    after = builder.build(RECIPES, USER)
+    assert after.dropped > before.dropped
+    assert after.tokens <= builder.token_budget
+    assert after.prefix_tokens == 2 * estimate_tokens(after.prefix)
+
+
+def test_failed_count_keeps_the_estimate_and_is_not_retried():
+    builder = PromptBuilder(token_budget=300)
+    assert builder.calibrate(UnavailableModel(), builder.build(RECIPES, USER)) == 1.0
+    assert builder.calibrated and builder.token_ratio == 1.0
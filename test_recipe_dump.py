@@ -0,0 +1,87 @@
+"""
+Unit tests for streaming dump imports and their resume offsets (no MySQL needed)
+
+Run with: python -m pytest -q test_recipe_dump.py
+"""
+import gzip
+import json
+import pytest
+from Backend.importRecipeDump import DumpImportJob
+from Backend.Services.recipe_dump import iter_dump
+
+
+def normalized(i):
+    return {"id": f"d{i}", "name": f"Dump Recipe {i}", "nutrition": {"calories": 400 + i}}
+
+
+def write_dump(path, records):
+    lines = [record if isinstance(record, str) else json.dumps(record) for record in records]
+    data = ("\n".join(lines) + "\n").encode()
+    if str(path).endswith(".gz"):
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    else:
+        path.write_bytes(data)
+    return str(path)
+
+
+class FakeRepo:
+    def __init__(self, fail_on_call=None):
+        self.batches = []
+        self.fail_on_call = fail_on_call
+
+    def bulk_upsert_recipes(self, recipes, batch_size):
+        if len(self.batches) + 1 == self.fail_on_call:
+            raise RuntimeError("MySQL server has gone away")
+        self.batches.append([recipe["id"] for recipe in recipes])
+
+    @property
+    def imported_ids(self):
+        return [recipe_id for batch in self.batches for recipe_id in batch]
+
+
+@pytest.mark.parametrize("name", ["dump.jsonl", "dump.jsonl.gz"])
+def test_iter_dump_resumes_from_the_offset_after_a_line(tmp_path, name):
+    path = write_dump(tmp_path / name, [normalized(0), "", "not json", "[1, 2]", normalized(1)])
+    records = list(iter_dump(path))
+    assert [record for _, record in records] == [normalized(0), None, None, normalized(1)]
+
+    offset = records[0][0]
+    assert [record for _, record in iter_dump(path, offset)] == [None, None, normalized(1)]
+    assert list(iter_dump(path, records[-1][0])) == []
+
+
+def test_stopped_import_resumes_without_reimporting(tmp_path):
+    path = write_dump(tmp_path / "dump.jsonl", [normalized(i) for i in range(5)] + ["garbage"] + [normalized(5)])
+    first = DumpImportJob(FakeRepo(), path, batch_size=2, load_vectors=False)
+    assert first.run(limit=2)["status"] == "stopped"
+    assert first.repo.batches == [["d0", "d1"]]
+
+    second = DumpImportJob(FakeRepo(), path, batch_size=2, load_vectors=False)
+    assert second.load_state()
+    assert (second.offset, second.imported) == (first.offset, 2)
+    result = second.run()
+    assert result["status"] == "completed"
+    assert second.repo.imported_ids == ["d2", "d3", "d4", "d5"]
+    assert (result["imported"], result["skipped"], result["offset"]) == (6, 1, second.size)
+
+
+def test_failed_batch_keeps_the_last_committed_offset(tmp_path):
+    path = write_dump(tmp_path / "dump.jsonl", [normalized(i) for i in range(6)])
+    job = DumpImportJob(FakeRepo(fail_on_call=2), path, batch_size=2, load_vectors=False)
+    result = job.run()
+    assert result["status"] == "failed" and "gone away" in result["error"]
+
+    retry = DumpImportJob(FakeRepo(), path, batch_size=2, load_vectors=False)
+    assert retry.load_state() and retry.imported == 2
+    retry.run()
+    assert retry.repo.imported_ids == ["d2", "d3", "d4", "d5"]
+
+
+def test_changed_dump_refuses_to_resume(tmp_path):
+    path = write_dump(tmp_path / "dump.jsonl", [normalized(i) for i in range(3)])
+    DumpImportJob(FakeRepo(), path, batch_size=2, load_vectors=False).run(limit=2)
+    write_dump(tmp_path / "dump.jsonl", [normalized(i) for i in range(4)])
+    with pytest.raises(SystemExit):
+        DumpImportJob(FakeRepo(), path, batch_size=2, load_vectors=False).load_state()
+    assert not DumpImportJob(FakeRepo(), path, state_path=str(tmp_path / "none.json")).load_state()
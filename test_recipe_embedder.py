@@ -0,0 +1,72 @@
+"""
+Unit tests for the Chroma search path of RecipeVectorStore (fake collection,
+no ChromaDB or SentenceTransformer needed)
+
+Run with: python -m pytest -q test_recipe_embedder.py
+"""
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from Backend.Services.recipe_embedder import RecipeVectorStore
+
+
+class FakeCollection:
+    """Returns rows in insertion order (as if by distance), ignoring where"""
+
+    def __init__(self, tags, fail_filtered=False):
+        self.rows = [
+            ({"recipe_id": f"r{i}", "tags": tag, "cuisine": "Italian"}, f"recipe {i}", [1.0, float(i)])
+            for i, tag in enumerate(tags)
+        ]
+        self.fail_filtered = fail_filtered
+        self.queries = []
+
+    def count(self):
+        return len(self.rows)
+
+    def query(self, query_embeddings, n_results, where=None, include=()):
+        self.queries.append((n_results, where))
+        if where is not None and self.fail_filtered:
+            raise ValueError("unsupported where clause")
+        page = self.rows[:n_results]
+        return {
+            "ids": [[metadata["recipe_id"] for metadata, _, _ in page]],
+            "metadatas": [[metadata for metadata, _, _ in page]],
+            "documents": [[document for _, document, _ in page]],
+            "embeddings": [[embedding for _, _, embedding in page]],
+        }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    encoder = SimpleNamespace(encode=lambda text: np.array([1.0, 0.0]))
+    monkeypatch.setattr(RecipeVectorStore, "embedding_model", property(lambda self: encoder))
+    monkeypatch.setattr(RecipeVectorStore, "collection", property(lambda self: self.fake))
+
+    def make(collection):
+        store = RecipeVectorStore()
+        store.fake = collection
+        return store
+    return make
+
+
+def test_tag_filter_widens_until_enough_results(store):
+    # Only every fifth recipe is vegan: the first 2 * n_results rows hold too few
+    collection = FakeCollection(["vegan" if i % 5 == 0 else "" for i in range(100)])
+    results = store(collection).search_by_goals_and_taste("maintain", n_results=5, required_tags=["vegan"])
+    assert [metadata["recipe_id"] for metadata in results] == ["r0", "r5", "r10", "r15", "r20"]
+    assert [n for n, _ in collection.queries] == [10, 20, 40]
+
+
+def test_tag_filter_stops_when_the_collection_is_exhausted(store):
+    collection = FakeCollection(["vegan", "", "", "", "", "", "vegan", ""])
+    results = store(collection).search_by_goals_and_taste("maintain", n_results=5, required_tags=["vegan"])
+    assert [metadata["recipe_id"] for metadata in results] == ["r0", "r6"]
+    assert [n for n, _ in collection.queries] == [8]
+
+
+def test_query_error_falls_back_to_an_unfiltered_search(store):
+    collection = FakeCollection([""] * 10, fail_filtered=True)
+    results = store(collection).search_by_goals_and_taste("maintain", n_results=3)
+    assert [metadata["recipe_id"] for metadata in results] == ["r0", "r1", "r2"]
+    assert collection.queries[-1] == (6, None)
@@ -0,0 +1,59 @@
+"""
+Unit tests for the locally built meal-plan shopping list
+
+Run with: python -m pytest -q test_shopping_list.py
+"""
+from Backend.Services.shopping_list import build_shopping_list, ingredients_used
+
+RECIPES = {
+    "r1": {"id": "r1", "ingredients": [
+        {"name": "Rice", "amount": 200, "unit": "g"},
+        {"name": "Rice Vinegar", "amount": 2, "unit": "tbsp"},
+        "Chicken Broth",
+        "Eggs"
+    ]},
+    "r2": {"id": "r2", "ingredients": [
+        {"name": "rice", "amount": 100, "unit": "g"},
+        "Coconut Milk",
+        "Egg Noodles",
+        "Boneless Skinless Chicken Breasts"
+    ]},
+}
+
+
+def names(items):
+    return [item["name"] for item in items]
+
+
+def test_aggregates_and_deduplicates_across_meals():
+    shopping = build_shopping_list(["r1", "r2", "r1"], RECIPES)
+    rice = next(item for item in shopping["items"] if item["name"] == "rice")
+    assert rice["meals"] == 3
+    assert rice["amounts"] == {"g": 500}
+    assert rice["recipe_ids"] == ["r1", "r2"]
+    assert "amounts" not in next(item for item in shopping["items"] if item["name"] == "coconut milk")
+    assert names(shopping["items"]) == sorted(names(shopping["items"]))
+
+
+def test_unknown_recipes_and_blank_names_are_skipped():
+    recipes = {"r3": {"id": "r3", "ingredients": ["", "  ", "Salt"]}}
+    assert names(build_shopping_list(["missing", "r3"], recipes)["items"]) == ["salt"]
+
+
+def test_fridge_items_do_not_cover_other_ingredients_sharing_a_word():
+    shopping = build_shopping_list(["r1", "r2"], RECIPES, ["rice", "milk", "eggs", "chicken"])
+    assert shopping["on_hand"] == ["egg", "rice"]
+    for term in ("rice vinegar", "coconut milk", "egg noodle", "chicken broth"):
+        assert term in names(shopping["items"])
+
+
+def test_preparation_modifiers_are_ignored_when_matching():
+    shopping = build_shopping_list(["r2"], RECIPES, ["Chicken Breast", "fresh rice"])
+    assert shopping["on_hand"] == ["boneless skinless chicken breast", "rice"]
+    assert names(shopping["items"]) == ["coconut milk", "egg noodle"]
+
+
+def test_ingredients_used_lists_bought_and_on_hand_items():
+    plan = {"shopping_list": ["rice vinegar", "salt"], "on_hand": ["egg"]}
+    assert ingredients_used(plan) == ["egg", "rice vinegar", "salt"]
+    assert ingredients_used({}) == []
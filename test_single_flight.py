@@ -0,0 +1,87 @@
+"""
+Unit tests for single-flight request coalescing
+
+Run with: python -m pytest -q test_single_flight.py
+"""
+import asyncio
+import pytest
+from Backend.Services.single_flight import SingleFlight, normalize_key, casefold
+
+
+def test_normalize_key_ignores_list_order_but_not_case():
+    assert normalize_key("lose_fat", ["thai", "italian"], 10) == normalize_key("lose_fat", ("italian", "thai"), 10)
+    assert normalize_key("lose_fat") != normalize_key("Lose_Fat")
+    assert normalize_key(casefold(["Thai", "italian"])) == normalize_key(casefold(["ITALIAN", "thai"]))
+    hash(normalize_key("maintain", [["b", "a"], ["c"]], None))
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"recipes": [1, 2]}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert started == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_exceptions_reach_every_caller_and_are_not_cached():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        return await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(main()) == "ok"
+    assert flight.executions == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_forget_starts_a_fresh_computation():
+    flight = SingleFlight("test")
+    versions = iter(["old", "new"])
+
+    async def work():
+        version = next(versions)
+        await asyncio.sleep(0.01)
+        return version
+
+    async def main():
+        waiting = asyncio.ensure_future(flight.do(1, work))
+        await asyncio.sleep(0)
+        flight.forget(1)
+        fresh = await flight.do(1, work)
+        return await waiting, fresh
+
+    assert asyncio.run(main()) == ("old", "new")